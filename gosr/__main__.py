@@ -0,0 +1,25 @@
+"""
+Command-line entry point for the gosr package.
+
+Usage:
+    python -m gosr run <project_dir> [options]
+"""
+
+import sys
+
+from gosr.main import run
+
+COMMANDS = {
+    "run": run.main,
+}
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in COMMANDS:
+        print(f"Usage: python -m gosr {{{','.join(COMMANDS)}}} ...")
+        return 1
+    return COMMANDS[sys.argv[1]](sys.argv[2:])
+
+
+if __name__ == "__main__":
+    sys.exit(main())
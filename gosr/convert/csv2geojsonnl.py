@@ -0,0 +1,209 @@
+"""
+Script: csv2geojsonnl.py
+
+Purpose:
+    Converts a CSV with a WKT geometry column (neighbourhoods, parcels, ...) to newline-delimited
+    GeoJSON: one Feature per line, with the other columns as its properties. Rows are read and
+    written a chunk at a time, so memory stays flat however large the layer is, and each chunk's
+    WKT is parsed, optionally simplified and serialized in bulk by shapely 2's vectorized
+    functions (from_wkt, simplify, to_geojson). If shapely cannot be imported, gosr.lib.wkt
+    parses and simplifies each geometry instead, more slowly but with the same output for valid WKT
+    (both drop Z/M values; GEOS also accepts some malformed WKT, such as untagged
+    four-number positions, that gosr.lib.wkt rejects).
+
+    As in the experimental scripts this replaces, an empty "name" becomes "" and an empty
+    "description" takes the name. --points-csv also writes the Point features as
+    latitude/longitude rows (geojson.csv).
+
+Usage:
+    python -m gosr.convert.csv2geojsonnl <project_subdirectory> [--input "Neighborhoods KC.csv"] [--output FILE]
+                                         [--wkt-column WKT] [--simplify TOLERANCE] [--chunk-size N] [--points-csv]
+
+Outputs:
+    - <input name>.geojsonl (or --output): One GeoJSON Feature per line. Rows with invalid WKT get
+      a null geometry and are counted in the summary.
+    - geojson.csv (--points-csv): latitude, longitude and properties of each Point feature.
+
+Dependencies:
+    - shapely >= 2 (in requirements.txt; gosr.lib.wkt is only the fallback)
+"""
+
+import argparse
+import csv
+import json
+import math
+import os
+import re
+import sys
+import time
+
+from gosr.lib.wkt import parse_wkt, simplify
+
+try:
+    import shapely
+    if not hasattr(shapely, "from_wkt"):  # shapely 1.x has no vectorized functions
+        shapely = None
+except ImportError:
+    shapely = None
+
+INPUT_FILENAME = "Neighborhoods KC.csv"
+POINTS_FILENAME = "geojson.csv"
+
+# WKT columns can be larger than the csv module's default field limit
+csv.field_size_limit(2 ** 31 - 1)
+
+# A JSON number: no leading zeros (ZIP codes stay strings), NaN, Infinity or underscores
+number_pattern = re.compile(r"-?(?:0|[1-9]\d*)(\.\d+)?([eE][+-]?\d+)?")
+
+
+def read_chunks(f, chunk_size):
+    """
+    Yield lists of up to chunk_size row dicts from an open CSV file.
+    """
+    chunk = []
+    for row in csv.DictReader(f):
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def value(v):
+    """
+    Return a CSV cell as JSON would want it: None when empty, else an int or float when it is
+    written as a JSON number ("00123", "NaN" and "inf" stay strings), else the string.
+    """
+    if v is None or v == "":
+        return None
+    m = number_pattern.fullmatch(v)
+    if m is None:
+        return v
+    if m.group(1) is None and m.group(2) is None:
+        return int(v)
+    f = float(v)
+    return f if math.isfinite(f) else v
+
+
+def properties(row, wkt_column):
+    """
+    Return a row's properties: every column but the geometry, with the name and description
+    defaults described above.
+    """
+    props = {k: value(v) for k, v in row.items() if k != wkt_column and k is not None}
+    if "name" in props and props["name"] is None:
+        props["name"] = ""
+    if "description" in props and props["description"] is None:
+        props["description"] = props.get("name")
+    return props
+
+
+def geometries_vectorized(wkts, tolerance):
+    """
+    Return the GeoJSON text of each WKT string (None for empty or invalid WKT), using shapely.
+    """
+    geoms = shapely.force_2d(shapely.from_wkt([w or None for w in wkts], on_invalid="ignore"))
+    if tolerance:
+        geoms = shapely.simplify(geoms, tolerance, preserve_topology=True)
+    missing = (shapely.is_missing(geoms) | shapely.is_empty(geoms)).tolist()
+    return [None if m else g for m, g in zip(missing, shapely.to_geojson(geoms).tolist())]
+
+
+def geometries_python(wkts, tolerance):
+    """
+    Return the GeoJSON text of each WKT string (None for empty or invalid WKT), using gosr.lib.wkt.
+    """
+    out = []
+    for w in wkts:
+        try:
+            geometry = simplify(parse_wkt(w), tolerance) if w else None
+        except ValueError:
+            geometry = None
+        out.append(None if geometry is None else json.dumps(geometry, separators=(",", ":")))
+    return out
+
+
+def convert(f_in, f_out, wkt_column="WKT", tolerance=0.0, chunk_size=10000, points=None, vectorized=None):
+    """
+    Stream a WKT CSV to newline-delimited GeoJSON.
+
+    Args:
+        f_in: Open CSV file.
+        f_out: Open text file the features are written to, one per line.
+        wkt_column (str): Column holding the geometry.
+        tolerance (float): Simplification tolerance in coordinate units (0 for none).
+        chunk_size (int): Rows parsed per batch.
+        points: Optional open CSV file for latitude/longitude rows of Point features; the
+            header is written with the first point.
+        vectorized (bool): Use shapely (default: when it is installed).
+
+    Returns:
+        dict: Counts of "features" written and "invalid" geometries.
+    """
+    if vectorized is None:
+        vectorized = shapely is not None
+    geometries = geometries_vectorized if vectorized else geometries_python
+    stats = {"features": 0, "invalid": 0}
+    points_writer = None
+    for chunk in read_chunks(f_in, chunk_size):
+        if wkt_column not in chunk[0]:
+            raise ValueError(f"No {wkt_column!r} column; columns are {list(chunk[0])}")
+        wkts = [row[wkt_column] for row in chunk]
+        lines = []
+        for row, geometry in zip(chunk, geometries(wkts, tolerance)):
+            props = properties(row, wkt_column)
+            if geometry is None:
+                stats["invalid"] += 1
+            elif points is not None and geometry.startswith('{"type":"Point"'):
+                x, y = json.loads(geometry)["coordinates"][:2]
+                point = {"latitude": y, "longitude": x, **props}
+                if points_writer is None:
+                    points_writer = csv.DictWriter(points, fieldnames=list(point))
+                    points_writer.writeheader()
+                points_writer.writerow(point)
+            lines.append('{"type":"Feature","geometry":' + (geometry or "null") +
+                         ',"properties":' + json.dumps(props, allow_nan=False) + '}\n')
+        f_out.writelines(lines)
+        stats["features"] += len(lines)
+    return stats
+
+
+def main():
+    """
+    Main entry point for the script.
+    Converts the WKT CSV in the project directory and prints a summary.
+    """
+    parser = argparse.ArgumentParser(description="Convert a WKT CSV to newline-delimited GeoJSON.")
+    parser.add_argument("path", help="Project directory containing the CSV")
+    parser.add_argument("--input", default=INPUT_FILENAME, help=f"CSV file in the project directory (default {INPUT_FILENAME!r})")
+    parser.add_argument("--output", default=None, help="Output file in the project directory (default: the input name with .geojsonl)")
+    parser.add_argument("--wkt-column", default="WKT", help="Column holding the geometry (default WKT)")
+    parser.add_argument("--simplify", type=float, default=0.0, help="Simplification tolerance in degrees, e.g. 0.0001 (default none)")
+    parser.add_argument("--chunk-size", type=int, default=10000, help="Rows parsed per batch (default 10000)")
+    parser.add_argument("--points-csv", action="store_true", help=f"Also write Point features to {POINTS_FILENAME}")
+    args = parser.parse_args()
+
+    path = args.path
+    output = args.output or os.path.splitext(args.input)[0] + ".geojsonl"
+    points_file = open(os.path.join(path, POINTS_FILENAME), "w", newline='', encoding="utf-8") if args.points_csv else None
+    start = time.perf_counter()
+    try:
+        with open(os.path.join(path, args.input), "r", newline='', encoding="utf-8") as f_in, \
+                open(os.path.join(path, output), "w", encoding="utf-8") as f_out:
+            stats = convert(f_in, f_out, args.wkt_column, args.simplify, args.chunk_size, points_file)
+    except ValueError as e:
+        print(e)
+        return 1
+    finally:
+        if points_file is not None:
+            points_file.close()
+
+    engine = "shapely" if shapely is not None else "gosr.lib.wkt"
+    print(f"{stats['features']} features ({stats['invalid']} without a valid geometry) written to {output} "
+          f"in {time.perf_counter() - start:.2f}s using {engine}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
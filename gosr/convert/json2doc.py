@@ -39,6 +39,8 @@ import sys
 import yaml
 from html import escape
 
+from gosr.lib.resource_store import load_resource_list
+
 config = None
 path = None
 
@@ -270,8 +272,7 @@ def main():
 
     # If working with resources, load the resource list and build a lookup dict
     if stage_name == "r":
-        with open(os.path.join(path, "resources.json"), "r", encoding='utf-8') as file:
-            global_resources_list = json.load(file)
+        global_resources_list = load_resource_list(path)
         for r in global_resources_list:
             global_resources_dict[r["id"]] = r
 
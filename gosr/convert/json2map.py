@@ -39,6 +39,8 @@ import yaml
 import html
 import argparse
 
+from gosr.lib.resource_store import load_resource_list
+
 config = None
 path = ""
 
@@ -160,42 +162,6 @@ def is_list_type(d):
             return True
     return False
 
-# Define aliases for standard keys used in resources
-aliases = {
-    'name': ['name', 'Name', 'program_name', 'program'],
-    'organization': ['organization', 'Organization', 'org'],
-    'address': ['address', 'Address', 'location'],
-    'email': ['email', 'Email'],
-    'website': ['website', 'Website', 'url', 'URL']
-}
-
-def get_value(key, d):
-    """
-    Get a value for a standard key from a resource dict, handling nested orgs.
-    """
-    for k in aliases[key]:
-        if k in d:
-            return d[k]
-    if 'organizations' in d:
-        if key == 'organization':
-            return d['organizations'][0]['name']
-        if key == 'address':
-            return d['organizations'][0]['address']
-        if key == 'email':
-            return d['organizations'][0]['email']
-        if key == 'website':
-            return d['organizations'][0]['website']
-    if key == 'name':
-        return d['organization']['name']
-    if key == 'address':
-        return d['organization']['address']
-    if key == 'email':
-        return d['organization']['email']
-    if key == 'website':
-        return d['organization']['website']
-    print(f"No key '{key}' found in {d}")
-    sys.exit(1)
-
 rcount = 0
 resource_keys = {}
 
@@ -262,8 +228,7 @@ def main():
     with open(os.path.join(path, 'config.yaml'), 'r', encoding='utf-8') as file:
         config = yaml.safe_load(file)
 
-    with open(os.path.join(path, "resources.json"), "r", encoding='utf-8') as f:
-        resource_list = json.load(f)
+    resource_list = load_resource_list(path)
 
     for r in resource_list:
         if "dup" in r:
@@ -0,0 +1,210 @@
+"""
+Script: json2parquet.py
+
+Purpose:
+    Exports the resource tree (r.json) and resource list (resources.json) as columnar tables for
+    analysis, so pandas, DuckDB or a dashboard can load them directly (with column pruning) instead
+    of reparsing the nested JSON and re-walking the tree.
+
+Tables:
+    - nodes: one row per tree node: node_id (pre-order number), parent_id, depth, tag, title,
+      description and resource_id (for resource nodes).
+    - resources: one row per resource in resources.json, with the standard fields from
+      gosr.lib.resource_schema plus url_valid and dup.
+    - edges: one row per resource link in the tree: resource_id, canonical_id (the resource it is a
+      duplicate of, or itself), solution_id, obstacle_id (the solution's parent) and theme (the
+      top-level obstacle's title). node ids refer to the nodes table.
+
+Usage:
+    python -m gosr.convert.json2parquet <project_dir> [--format parquet|arrow]
+
+Outputs:
+    - <project_dir>/tables/{nodes,resources,edges}.parquet (or .arrow with --format arrow).
+
+Dependencies:
+    - Python 3.x
+    - pyarrow (in requirements.txt; only needed to write the files)
+
+See the project README for more details.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+from gosr.lib.resource_schema import FIELDS, normalize
+from gosr.lib.resource_store import load_resource_list
+
+OUTPUT_DIRNAME = "tables"
+
+node_columns = ["node_id", "parent_id", "depth", "tag", "title", "description", "resource_id"]
+resource_columns = FIELDS + ["url_valid", "dup"]
+edge_columns = ["resource_id", "canonical_id", "solution_id", "obstacle_id", "theme"]
+
+
+def text(v):
+    """
+    Return v as a string column value: None stays None, and other non-strings become JSON
+    (so url_valid is "true", "false" or the corrected URL).
+    """
+    if v is None or isinstance(v, str):
+        return v
+    return json.dumps(v, ensure_ascii=False)
+
+
+def node_text(data):
+    """
+    Return (title, description) of a node's data, which is a dict or a plain string.
+    """
+    if isinstance(data, dict):
+        return text(data.get("title")), text(data.get("description"))
+    return text(data), None
+
+
+def tree_tables(j):
+    """
+    Flatten a saved tree into node and edge rows, in one walk.
+
+    Returns:
+        tuple: (nodes, edges) as lists of row dicts with node_columns and edge_columns.
+    """
+    nodes = []
+    edges = []
+    # (subtree, parent_id, depth, solution_id, obstacle_id, theme)
+    stack = [(j, None, 0, None, None, None)]
+    while stack:
+        subtree, parent_id, depth, solution_id, obstacle_id, theme = stack.pop()
+        for tag, v in subtree.items():
+            if not isinstance(v, dict):
+                continue
+            node_id = len(nodes)
+            data = v.get("data")
+            title, description = node_text(data)
+            resource_id = data.get("id") if tag == "resource" and isinstance(data, dict) else None
+            nodes.append({
+                "node_id": node_id,
+                "parent_id": parent_id,
+                "depth": depth,
+                "tag": tag,
+                "title": title,
+                "description": description,
+                "resource_id": resource_id,
+            })
+            child_solution, child_obstacle, child_theme = solution_id, obstacle_id, theme
+            if tag == "obstacle":
+                child_obstacle = node_id
+                if theme is None:
+                    child_theme = title
+            elif tag == "solution":
+                child_solution = node_id
+                child_obstacle = parent_id
+            elif tag == "resource":
+                edges.append({
+                    "resource_id": resource_id,
+                    "canonical_id": resource_id,
+                    "solution_id": solution_id,
+                    "obstacle_id": obstacle_id,
+                    "theme": theme,
+                })
+            # Reversed so children are numbered in document order
+            for c in reversed(v.get("children", [])):
+                if isinstance(c, dict):
+                    stack.append((c, node_id, depth + 1, child_solution, child_obstacle, child_theme))
+    return nodes, edges
+
+
+def resource_table(resources):
+    """
+    Return one row dict per resource, with resource_columns.
+    """
+    rows = []
+    for r in resources:
+        record, _ = normalize(r)
+        row = {field: record[field] if field == "id" else text(record[field]) for field in FIELDS}
+        row["url_valid"] = text(r.get("url_valid"))
+        row["dup"] = r.get("dup")
+        rows.append(row)
+    return rows
+
+
+def resolve_canonical(edges, resources):
+    """
+    Set each edge's canonical_id by following "dup" links in the resource list.
+    """
+    dups = {r["id"]: r["dup"] for r in resources if "dup" in r}
+    for e in edges:
+        rid = e["resource_id"]
+        seen = set()
+        while rid in dups and rid not in seen:
+            seen.add(rid)
+            rid = dups[rid]
+        e["canonical_id"] = rid
+
+
+def columns(rows, names):
+    """
+    Return {column: [values]} for a list of row dicts.
+    """
+    return {name: [row[name] for row in rows] for name in names}
+
+
+def write_tables(tables, out_dir, fmt="parquet"):
+    """
+    Write {name: (rows, column names)} as Parquet or Arrow IPC files in out_dir.
+
+    Returns:
+        list: The filenames written.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    os.makedirs(out_dir, exist_ok=True)
+    written = []
+    for name, (rows, names) in tables.items():
+        table = pa.table(columns(rows, names))
+        filename = os.path.join(out_dir, f"{name}.{fmt}")
+        if fmt == "parquet":
+            pq.write_table(table, filename)
+        else:
+            with pa.OSFile(filename, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+        written.append(filename)
+    return written
+
+
+def main():
+    """
+    Main entry point for the script.
+    Loads r.json and the resource list, builds the tables and writes them to <project_dir>/tables.
+    """
+    parser = argparse.ArgumentParser(description="Export r.json and resources.json as Parquet/Arrow tables.")
+    parser.add_argument("path", help="Project directory containing r.json and resources.json")
+    parser.add_argument("--format", choices=["parquet", "arrow"], default="parquet", help="Output file format (default parquet)")
+    args = parser.parse_args()
+
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        print("json2parquet needs pyarrow: pip install pyarrow")
+        return 1
+
+    with open(os.path.join(args.path, "r.json"), "r", encoding='utf-8') as f:
+        j = json.load(f)
+    resources = load_resource_list(args.path)
+
+    nodes, edges = tree_tables(j)
+    resolve_canonical(edges, resources)
+    tables = {
+        "nodes": (nodes, node_columns),
+        "resources": (resource_table(resources), resource_columns),
+        "edges": (edges, edge_columns),
+    }
+    for filename in write_tables(tables, os.path.join(args.path, OUTPUT_DIRNAME), args.format):
+        print(f"Wrote {filename}")
+    print(f"nodes: {len(nodes)} resources: {len(resources)} edges: {len(edges)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,8 +8,8 @@ Purpose:
 
 Workflow:
     1. Loads configuration and resource list from the specified project directory.
-    2. Loads the hierarchical resource tree (r.json).
-    3. Traverses the tree to collect all resources, associates them with their solution and obstacle.
+    2. Loads the resource index of the tree (r.index.json, rebuilt from r.json if that is newer).
+    3. Collects each theme's resources from the index and associates them with their solution and obstacle.
     4. Cleans and normalizes resource data, including URLs.
     5. Writes a CSV for each top-level theme and a combined mailing list CSV.
 
@@ -18,7 +18,8 @@ Usage:
     - <project_subdirectory> should contain config.yaml, r.json, and resources.json.
 
 Outputs:
-    - Google Maps/<theme>.csv: CSV files for each top-level theme.
+    - Google Maps/<theme>.csv: CSV files for each top-level theme (with lat/lng columns once
+      gosr.utils.geocode_resources has run, so the map needs no geocoding).
     - mailing_list.csv: Combined CSV of all unique resources with category.
 
 Dependencies:
@@ -36,6 +37,9 @@ import yaml
 import csv
 from html import escape
 
+from gosr.lib.resource_index import load_index
+from gosr.lib.resource_store import load_resource_list
+
 config = None
 path = None
 
@@ -64,100 +68,50 @@ def write_node(n, indent=0):
         s += f'{"  "*indent}<node TEXT="{escape(n)}"></node>\n'
     return s
 
-aliases = {
-    "name": [
-        "name", "Name", "program_name", "program", "event_name", "title", "Effort Name", "EffortName", "Effort",
-        "effort_name", "project_name", "description", "effort_description", "EffortDescription", "Effort_Name",
-        "ProgramName", "ProjectName", "effort"
-    ],
-    "description": ["description", "Description", "effort_description", "effort", "EffortDescription"],
-    "organization": ["organization", "address", "Organization", "ImplementingOrganization", "OrganizationName"],
-    "address": ["address", "Address"],
-    "email": ["email", "Email", "email unavailable"],
-    "website": ["website", "Website"]
-}
-
-def get_value(key, d):
-    """
-    Get a value for a standard key from a resource dict, handling nested orgs.
-    """
-    for k in aliases[key]:
-        if k in d:
-            return d[k]
-    if 'organizations' in d:
-        if key == 'organization':
-            return d['organizations'][0]['name']
-        if key == 'address':
-            return d['organizations'][0]['address']
-        if key == 'email':
-            return d['organizations'][0]['email']
-        if key == 'website':
-            return d['organizations'][0]['website']
-    if key == 'name':
-        return d['organization']['name']
-    if key == 'address':
-        return d['organization']['address']
-    if key == 'email':
-        return d['organization']['email']
-    if key == 'website':
-        return d['organization']['website']
-    print(f"No key '{key}' found in {d}")
-    sys.exit(1)
-
 resource_list = []
+resource_dict = {}
 
 def find_by_id(id):
     """
     Find a resource in the resource list by its ID, following duplicates if needed.
     """
-    global resource_list
-    for k in resource_list:
-        if k["id"] == id:
-            if "dup" in k:
-                return find_by_id(k["dup"])
-            else:
-                return k
-    return None
+    seen = set()
+    k = resource_dict.get(id)
+    while k is not None and "dup" in k and k["id"] not in seen:
+        seen.add(k["id"])
+        k = resource_dict.get(k["dup"])
+    return k
+
+def node_text(d):
+    """
+    Return "Title. Description." for a node's data dict, or the data itself if it is a string.
+    """
+    if type(d) == dict:
+        return d["title"].rstrip('. ')+'. '+d["description"].rstrip('. ')+'.'
+    return d
 
-def get_all_resources(j, parent):
+def get_all_resources(index, theme):
     """
-    Recursively collect all resources from the tree, associating them with their solution and obstacle.
+    Collect the resources linked under a theme, associating each with its solution and obstacle.
+    Uses the resource index (gosr.lib.resource_index) instead of walking r.json.
     """
-    global resource_list
     rs = []
-    key = list(j.keys())[0]
-    if key == "solution":
-        if "children" in j[key]:
-            for r in j[key]["children"]:
-                resource = find_by_id(r["resource"]["data"]["id"])
-                solving_dict = parent["obstacle"]["data"]
-                if type(solving_dict) == dict:
-                    solving = solving_dict["title"].rstrip('. ')+'. '+solving_dict["description"].rstrip('. ')+'.'
-                else:
-                    solving = solving_dict
-                solution_dict = j[key]["data"]
-                if type(solution_dict) == dict:
-                    solution = solution_dict["title"].rstrip('. ')+'. '+solution_dict["description"].rstrip('. ')+'.'
-                else:
-                    solution = solution_dict
-                resource["solving"] = solving
-                resource["solution"] = solution
-                # Clean up URLs
-                if "url_valid" in resource:
-                    if resource["url_valid"] == False:
-                        del resource["url_valid"]
-                        resource["website"] = "N/A"
-                    elif resource["url_valid"] == True:
-                        del resource["url_valid"]
-                    else:
-                        resource["website"] = resource["url_valid"]
-                        del resource["url_valid"]
-                rs.append(resource)
-        return rs
-    else:
-        for c in j[key]["children"]:
-            rs.extend(get_all_resources(c, j))
-        return rs
+    for rid, s in index.links(theme):
+        resource = find_by_id(rid)
+        resource["solving"] = node_text(s["obstacle"])
+        resource["solution"] = node_text(s["data"])
+        # Clean up URLs
+        if "url_valid" in resource:
+            if resource["url_valid"] == False:
+                del resource["url_valid"]
+                resource["website"] = "N/A"
+            elif resource["url_valid"] == True:
+                del resource["url_valid"]
+            else:
+                resource["website"] = resource["url_valid"]
+                del resource["url_valid"]
+        rs.append(resource)
+    return rs
 
 def main():
     """
@@ -166,7 +120,7 @@ def main():
     """
     global config
     global path
-    global resource_list
+    global resource_list, resource_dict
 
     if len(sys.argv) != 2:
         print(f'Usage: {sys.argv[0]} path')
@@ -176,22 +130,16 @@ def main():
     with open(os.path.join(path, 'config.yaml'), 'r', encoding='utf-8') as file:
         config = yaml.safe_load(file)
 
-    with open(os.path.join(path, "resources.json"), "r", encoding='utf-8') as f:
-        resource_list = json.load(f)
-
-    with open(os.path.join(path, 'r.json'), 'r', encoding='utf-8') as f:
-        j = json.load(f)
+    resource_list = load_resource_list(path)
+    resource_dict = {r["id"]: r for r in resource_list}
+    index = load_index(path)
 
     r_all = []
     unique = []
 
     # For each top-level theme (obstacle), extract resources and write a CSV
-    for top_level_theme in j["goal"]["children"]:
-        if "label" in top_level_theme["obstacle"]:
-            theme = top_level_theme["obstacle"]["label"]
-        else:
-            theme = top_level_theme["obstacle"]["data"]["title"]
-        r = get_all_resources(top_level_theme, None)
+    for theme in index.themes:
+        r = get_all_resources(index, theme)
 
         filename = theme.strip()
         filename = re.sub(r'/', ', ', filename)
@@ -201,7 +149,8 @@ def main():
 
         os.makedirs(os.path.join(path, "Google Maps"), exist_ok=True)
         with open(os.path.join(path, "Google Maps", f"{filename}.csv"), "w", newline='\n', encoding='utf-8') as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=r[0].keys())
+            # Columns of every row, since only some resources have e.g. lat/lng
+            writer = csv.DictWriter(csvfile, fieldnames=list(dict.fromkeys(k for d in r for k in d)))
             writer.writeheader()
             writer.writerows(r)
 
@@ -214,7 +163,7 @@ def main():
 
     # Write a combined mailing list CSV
     with open(os.path.join(path, "mailing_list.csv"), "w", newline='\n', encoding='utf-8') as csvfile:
-        header = list(r_all[0].keys())
+        header = list(dict.fromkeys(k for d in r_all for k in d))
         writer = csv.DictWriter(csvfile, fieldnames=header)
         writer.writeheader()
         writer.writerows(r_all)
@@ -11,8 +11,11 @@ from urllib.parse import urlparse
 import socket
 import urllib3
 
-from utils import setup_openai
+from utils import setup_openai, wait_for_rate_limit
 setup_openai()
+from program_verification import (
+    ProgramVerifier, RESULTS_FILENAME, checkpoint_filename, program_key, single_prompt, write_results_table
+)
 
 from utils import setup_logging
 setup_logging("dr-ruth.log", backup_count=5)
@@ -58,7 +61,8 @@ def call_gpt4(msg_text, use_cache=True):
     while attempts < 5:
         try:
             logger.debug(f'Sending: {messages[0]["content"]}')
-            # time.sleep(1)
+            # Shared with every other caller in this process, so concurrent validations stay within the limit
+            wait_for_rate_limit()
             response = client.chat.completions.create(model=model,
             messages=messages,
             # request_timeout=120,
@@ -91,14 +95,8 @@ def call_gpt4(msg_text, use_cache=True):
     return f"No valid response from OpenAI API after {attempts} attempts!"
 
 def validate_program(s, p):
-    msg_text = f"""\
-Verify that this program is real and that the website, address, and phone
-are correct. Set any unverifiable value to JSON null.
-Add a new field "validity" grading from A through F as to confidence
-that this program is real. 
-{p}
-"""
-    
+    msg_text = single_prompt(p)
+
     # If the program does not receive a minimum B grade, replace the entire
     # program with a valid program given these keywords: {','.join(s['topics'])} and this description 
     # of the context: "{s['description']}" and perform the same validation before
@@ -130,17 +128,40 @@ These must be real and operate anywhere in New York State, including NYC and any
     return(response)
 
 def validate_resources(path, data):
-    global cache4, cache_dirty
-
+    """
+    Verify every program's contact data concurrently (see gosr.lib.program_verification).
+    Each answer is checkpointed as it arrives, so an interrupted run picks up where it stopped.
+    Programs are replaced by their verified versions in data, which main then passes on to
+    write_resources, and a results table (verify.results.csv) is written. Programs without an
+    answer are kept as they were.
+
+    Config keys: verify_pack_size (programs per prompt, default 1) and verify_workers
+    (prompts in flight, default 8).
+    """
+    global cache_dirty
+
+    verifier = ProgramVerifier(
+        call_gpt4,
+        checkpoint_filename(path),
+        pack_size=config.get("verify_pack_size", 1),
+        max_workers=config.get("verify_workers", 8),
+    )
+    programs = [p for s in data for p in s["programs"]]
+    print(f"verifying {len(programs)} programs, {verifier.resumed} already verified")
+    results = verifier.verify(programs, on_done=lambda done, total: print(f"{done}/{total} prompts", end="\r"))
+    print(f"\n{verifier.calls} prompts sent")
+    if cache_dirty:
+        with open(cache_file, "w", encoding="utf-8") as f:
+            json.dump(cache4, f)
+            cache_dirty = False
+
+    rows = []
     for s in data:
-        for i,p in enumerate(s["programs"]):
-            s["programs"][i] = validate_program(s,p)
-            if cache_dirty:
-                with open(cache_file, "w", encoding="utf-8") as f:
-                    json.dump(cache4, f)
-
-    with open(os.path.join(path,"resources.json"), "w", encoding="utf-8") as f:
-        json.dump(new_data, f)
+        for i, p in enumerate(s["programs"]):
+            s["programs"][i] = results.get(program_key(p), p)
+            rows.append((s.get("section", s.get("description")), i + 1, s["programs"][i]))
+    write_results_table(os.path.join(path, RESULTS_FILENAME), rows)
+    return data
 
 def debug_programs(programs):
     print(programs)
@@ -377,8 +398,9 @@ def main(path):
         data = json.load(file)
 
     # analyze_resources(data)
-    # new_data = validate_resources(path,data)
     find_resources(path,data)
+    if config.get("verify_programs", False):
+        validate_resources(path, data)
     solns, programs = create_resources(data)
     # clean_urls(programs)
     clean_orgs(programs)
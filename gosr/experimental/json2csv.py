@@ -151,16 +151,6 @@ def json_flatten(js):
         flat.append(e)
     return flat
 
-def traverse_tree(rs, resource_dict):
-    key = list(rs.keys())[0]
-    value = rs[key]
-    if key == 'resource':
-        pass
-    
-    if 'children' in value:
-        for c in value['children']:
-            traverse_tree(c, resource_dict)
-
 def main():
     "Main functionality"
     # global global_resources_list
@@ -168,23 +158,6 @@ def main():
     #     with open(file_path, "r", encoding="utf-8") as f:
     #         global_resources_list = json.load(f)
 
-    resource_path = os.path.join(path, "resources.json")
-    if os.path.exists(resource_path) and os.access(resource_path, os.R_OK):
-        with open(resource_path, "r", encoding="utf-8") as f:
-            resources = json.load(f)
-
-    resource_dict = {}
-    for r in resources:
-        resource_dict[r["id"]] = r
-
-    resource_path = os.path.join(path, "r.json")
-    if os.path.exists(resource_path) and os.access(resource_path, os.R_OK):
-        with open(resource_path, "r", encoding="utf-8") as f:
-            rs = json.load(f)
-    
-    traverse_tree(rs, resource_dict)
-
-
     load_resources(os.path.join(path, "resources.json"))
     flat_df = json_flatten(global_resources_list)
     df = pd.DataFrame(flat_df)
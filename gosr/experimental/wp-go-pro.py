@@ -8,6 +8,7 @@ import sys
 # from html import escape
 import os
 import yaml
+from gosr.lib.resource_index import load_index
 # import csv
 
 class SlashEscapingEncoder(json.JSONEncoder):
@@ -72,35 +73,6 @@ def keep_just_valid_lat_long(data):
     data["markers"] = valid_markers
     return data
 
-def find_dicts_with_key(node, results = {}):
-    """
-    Recursively search for dictionaries containing the target key within a nested structure of dictionaries and lists.
-    
-    Args:
-    data (dict or list): The nested data structure to search.
-    target_key (str): The key to search for in the dictionaries.
-    
-    Returns:
-    list: A list of dictionaries containing the target key.
-    """
-
-    if isinstance(node, dict):
-        if "solution" in node:
-            if "data" in node["solution"]:
-                if "kc360-10" in node["solution"]["data"]:
-                    kc360_10 = node["solution"]["data"]["kc360-10"]
-                    results[kc360_10] = []
-                    for r in node["solution"].get("children", []):
-                        results[kc360_10].append(r["resource"]["data"]["id"])
-
-        for value in node.values():
-            results = find_dicts_with_key(value, results)
-    elif isinstance(node, list):
-        for item in node:
-            results = find_dicts_with_key(item, results)
-
-    return results
-
 def in_markers_set_icons(data):
 
     category_to_icon = {
@@ -184,8 +156,6 @@ def set_markers_from_resources(kc_map, resources, resource_map):
                     "pic": "",
                     "link": r["website"] if r.get("url_valid", True) else "",
                     "icon": "{\"url\":\"\/\/kccommongood.org\/wp-content\/uploads\/2023\/08\/kccg_pin_shadow.png\",\"retina\":false}",
-                    # "lat": "39.1003675",
-                    # "lng": "-94.5778788",
                     "anim": "0",
                     "title": r["program"],
                     "infoopen": "0",
@@ -215,13 +185,23 @@ def set_markers_from_resources(kc_map, resources, resource_map):
                         }
                     ]
                 }
+                # Coordinates from gosr.utils.geocode_resources; without them the plugin geocodes the address on page load
+                if "lat" in r and "lng" in r:
+                    m["lat"], m["lng"] = str(r["lat"]), str(r["lng"])
                 marker_list[key] = m
                 kc_map["markers"].append(m)
     return kc_map
 
-def label_resources(resources, model):
-    r = find_dicts_with_key(model)
-    return r
+def label_resources(index):
+    """
+    Map each solution's kc360-10 label to the ids of the resources linked under it.
+    Uses the resource index (gosr.lib.resource_index) instead of walking r.json.
+    """
+    results = {}
+    for s in index.solutions:
+        if isinstance(s["data"], dict) and "kc360-10" in s["data"]:
+            results[s["data"]["kc360-10"]] = list(s["resources"])
+    return results
 
 def main():
     if len(sys.argv) != 2:
@@ -236,10 +216,7 @@ def main():
     with open(os.path.join(path, "resources.json"), "r", encoding='utf-8') as f:
         resources = json.load(f)
     
-    with open(os.path.join(path, "r.json"), "r", encoding='utf-8') as f:
-        model = json.load(f)
-
-    resource_map = label_resources(resources, model)
+    resource_map = label_resources(load_index(path))
 
     kc_map_input_file = os.path.join("Export", "kccommongood.wpgooglemaps-1.json")
 
@@ -0,0 +1,279 @@
+"""
+dedup.py
+
+Fuzzy deduplication of resource lists.
+
+Exact matching on "program|organization" (raw2resources.normalize_resource_list) misses
+near-duplicates such as "KC Food Bank" and "Kansas City Food Bank, Inc.". This module finds
+them in roughly linear time:
+
+    1. Normalize names: lower case, punctuation and corporate suffixes (Inc, LLC, ...)
+       removed, and the locality's initialism expanded ("KC" -> "kansas city" when the
+       locality is Kansas City). Websites are reduced to their domain and addresses are
+       normalized as the registry does it (resource_registry.normalize_address).
+    2. Block: each resource gets a MinHash signature of its name's character shingles,
+       split into LSH bands; resources sharing a band bucket, a website domain or an
+       address are candidate pairs. In large buckets (e.g. a city government domain
+       shared by hundreds of programs) each resource is only paired with its nearest
+       neighbours in name order, so the number of pairs stays linear.
+    3. Score each candidate pair on program and organization similarity, with a bonus for
+       a shared domain or address, and merge pairs scoring at least the threshold with
+       union-find.
+
+Every resource merged into a group is given "dup": <id of the group's first resource>,
+the same link format raw2resources writes and the converters follow. Resources already
+marked "dup" are left alone.
+"""
+
+import difflib
+import hashlib
+from collections import defaultdict
+
+from gosr.lib.r_stats import get_program_value, get_organization_value
+from gosr.lib.resource_registry import (
+    address_keys, first_value, normalize_address, normalize_name, website_domain, website_keys,
+)
+
+num_perm = 32  # MinHash signature length
+bands = 8  # LSH bands of num_perm // bands rows each
+shingle_size = 3
+min_overlap = 0.3  # Pairs whose names share fewer shingles than this are not scored
+window = 10  # Resources in a large bucket are compared with their next `window` neighbours by name
+default_threshold = 0.85
+
+corporate_suffixes = {
+    "inc", "incorporated", "llc", "ltd", "limited", "corp", "corporation", "co", "company",
+    "pc", "pllc", "nfp", "the",
+}
+
+def locality_aliases(locality):
+    """
+    Return {initialism: locality} for a multi-word locality, e.g. {"kc": "kansas city"}.
+    """
+    words = normalize_name(locality).split()
+    if len(words) < 2:
+        return {}
+    return {"".join(w[0] for w in words): " ".join(words)}
+
+
+def normalize_text(s, aliases=None):
+    """
+    Normalize a program or organization name for fuzzy matching.
+    """
+    words = []
+    for w in normalize_name(s).split():
+        if w in corporate_suffixes:
+            continue
+        words.append((aliases or {}).get(w, w))
+    return " ".join(words)
+
+
+def shingles(s):
+    """
+    Return the set of character shingles of a string (the string itself if it is short).
+    """
+    s = s.replace(" ", "")
+    if len(s) <= shingle_size:
+        return {s} if s else set()
+    return {s[i:i + shingle_size] for i in range(len(s) - shingle_size + 1)}
+
+
+def minhash(shingle_set):
+    """
+    Return a one-permutation MinHash signature of num_perm values.
+
+    Each shingle is hashed once; the hash picks a bin and the rest of it is the value, and
+    each bin keeps its minimum. Empty bins borrow the next non-empty bin's value, so
+    similar sets still agree bin by bin. Cost is linear in the number of shingles.
+    """
+    sig = [None] * num_perm
+    for sh in shingle_set:
+        h = int.from_bytes(hashlib.blake2b(sh.encode(), digest_size=8).digest(), "big")
+        b, v = h % num_perm, h // num_perm
+        if sig[b] is None or v < sig[b]:
+            sig[b] = v
+    if all(v is None for v in sig):
+        return None
+    for i in range(num_perm):
+        j = i
+        while sig[j % num_perm] is None:
+            j += 1
+        if j != i:
+            sig[i] = (sig[j % num_perm], j - i)
+    return sig
+
+
+def similarity(a, b, floor=0.0):
+    """
+    Return the similarity of two normalized names in [0, 1].
+
+    The character ratio is only computed when its cheap upper bounds reach floor;
+    below that the word overlap is returned.
+    """
+    if not a or not b:
+        return 0.0
+    if a == b:
+        return 1.0
+    ta, tb = set(a.split()), set(b.split())
+    jaccard = len(ta & tb) / len(ta | tb)
+    sm = difflib.SequenceMatcher(None, a, b)
+    if sm.real_quick_ratio() < floor or sm.quick_ratio() < floor:
+        return jaccard
+    return max(jaccard, sm.ratio())
+
+
+def overlap(a, b):
+    """
+    Return the Jaccard similarity of two shingle sets.
+    """
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def plausible(a, b):
+    """
+    Cheap filter before scoring: do any of the two resources' (program, organization)
+    shingle sets overlap enough for the names to match?
+    """
+    program_a, org_a = a
+    program_b, org_b = b
+    return max(
+        overlap(program_a or org_a, program_b or org_b),
+        overlap(program_a, org_b),
+        overlap(org_a, program_b),
+    ) >= min_overlap
+
+
+class UnionFind:
+    """
+    Disjoint sets over resource indexes; the smallest index is each set's root.
+    """
+
+    def __init__(self, n):
+        self.parent = list(range(n))
+
+    def find(self, i):
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, i, j):
+        ri, rj = self.find(i), self.find(j)
+        if ri != rj:
+            self.parent[max(ri, rj)] = min(ri, rj)
+
+
+class Deduplicator:
+    """
+    Fuzzy duplicate finder for a resource list.
+    """
+
+    def __init__(self, locality=None, threshold=default_threshold):
+        self.aliases = locality_aliases(locality) if locality else {}
+        self.threshold = threshold
+
+    def features(self, resource):
+        """
+        Return the normalized (program, organization, domain, address) of a resource.
+        """
+        program = get_program_value(resource)
+        org = get_organization_value(resource)
+        return (
+            normalize_text(program if isinstance(program, str) else "", self.aliases),
+            normalize_text(org if isinstance(org, str) else "", self.aliases),
+            website_domain(first_value(resource, website_keys)),
+            normalize_address(first_value(resource, address_keys)),
+        )
+
+    def candidate_pairs(self, features):
+        """
+        Return the set of (i, j) index pairs, i < j, that share an LSH bucket, domain or address.
+        """
+        buckets = defaultdict(list)
+        rows = num_perm // bands
+        for i, (program, org, domain, address) in enumerate(features):
+            name = program or org
+            sig = minhash(shingles(name)) if name else None
+            if sig is not None:
+                for b in range(bands):
+                    buckets[("band", b, tuple(sig[b * rows:(b + 1) * rows]))].append(i)
+            if domain:
+                buckets[("domain", domain)].append(i)
+            if address:
+                buckets[("address", address)].append(i)
+
+        pairs = set()
+        for members in buckets.values():
+            if len(members) < 2:
+                continue
+            if len(members) > window + 1:
+                # Sorted neighbourhood: only compare each resource with the next few by name
+                members = sorted(set(members), key=lambda i: features[i][0] or features[i][1])
+            for x in range(len(members)):
+                for y in range(x + 1, min(len(members), x + 1 + window)):
+                    if members[x] != members[y]:
+                        pairs.add((min(members[x], members[y]), max(members[x], members[y])))
+        return pairs
+
+    def score(self, a, b):
+        """
+        Return the match score of two resources' features.
+        """
+        program_a, org_a, domain_a, address_a = a
+        program_b, org_b, domain_b, address_b = b
+        # Bonuses add at most 0.1, so lower name similarities cannot reach the threshold
+        floor = self.threshold - 0.1
+        if program_a and program_b:
+            s = similarity(program_a, program_b, floor)
+        else:
+            # Without both program names, compare the organizations only
+            s = similarity(program_a or org_a, program_b or org_b, floor)
+        # A name given as program in one record and organization in the other
+        s = max(s, similarity(program_a, org_b, floor), similarity(org_a, program_b, floor))
+        # Programs are only duplicates within the same organization; a shared
+        # domain or address is supporting evidence, a different domain counts against
+        if org_a and org_b and similarity(org_a, org_b) < 0.5:
+            s -= 0.15
+        if domain_a and domain_a == domain_b:
+            s += 0.05
+        elif domain_a and domain_b:
+            s -= 0.1
+        if address_a and address_a == address_b:
+            s += 0.05
+        return min(s, 1.0)
+
+    def find_groups(self, resources):
+        """
+        Return lists of indexes of resources that are duplicates of each other, each sorted,
+        ignoring resources already marked "dup".
+        """
+        live = [i for i, r in enumerate(resources) if "dup" not in r]
+        features = [self.features(resources[i]) for i in live]
+        grams = [(shingles(program), shingles(org)) for program, org, _, _ in features]
+        uf = UnionFind(len(live))
+        for i, j in self.candidate_pairs(features):
+            if uf.find(i) == uf.find(j) or not plausible(grams[i], grams[j]):
+                continue
+            if self.score(features[i], features[j]) >= self.threshold:
+                uf.union(i, j)
+        groups = defaultdict(list)
+        for k in range(len(live)):
+            groups[uf.find(k)].append(live[k])
+        return [g for g in groups.values() if len(g) > 1]
+
+    def mark_duplicates(self, resources):
+        """
+        Set "dup" on every resource merged into another, pointing at the group's first resource.
+
+        Returns:
+            int: The number of resources newly marked as duplicates.
+        """
+        marked = 0
+        for group in self.find_groups(resources):
+            canonical = resources[group[0]]["id"]
+            for i in group[1:]:
+                resources[i]["dup"] = canonical
+                marked += 1
+        return marked
@@ -0,0 +1,327 @@
+"""
+geocode.py
+
+Geocoding of resource addresses, with a persistent address -> coordinates cache
+(geocode-cache.db in the project directory), so map exports can place markers without
+client-side geocoding.
+
+Addresses are normalized first with resource_registry.normalize_address (case, punctuation,
+spacing, street-type abbreviations, a trailing country), the same key the registry and dedup
+use, so variants of one address share a cache entry and are looked up once. Every lookup is recorded, misses included, so repeated exports never ask the
+geocoder again; geocode_resources(..., retry_misses=True) retries the misses.
+
+Each cache entry records the precision of its match ("address", "zip" or "city", see
+precisions) and the geocoder that last looked it up. Entries that are not exact (approximate
+matches and misses) are looked up again when a different geocoder is configured, e.g. after
+switching from the gazetteer to Nominatim, and a result less precise than the cached one
+does not replace it.
+
+Geocoders are pluggable: anything with a name and geocode(address) -> (lat, lng, precision)
+or None, given the normalized address, raising GeocodeError when the lookup itself fails
+(those addresses are not cached, so the next run tries them again). Two are provided:
+
+    - GazetteerGeocoder: offline, from a CSV of known places (key, lat, lng), where a key is an
+      address, a 5-digit ZIP code or "city, st". An address is matched exactly, then by its
+      ZIP code, then by its city and state, so with a ZIP/city gazetteer every
+      resource gets at least an approximate location without any network access (and tests
+      need none).
+    - NominatimGeocoder: an OpenStreetMap Nominatim server (or a local stand-in, via base_url
+      or an httpx transport), at most one request per min_interval seconds.
+
+Usage:
+    with GeocodeCache(geocode_cache_filename(path)) as cache:
+        geocode_resources(resource_list, make_geocoder(config, path), cache)
+
+Configuration (config.yaml), via make_geocoder(config, path):
+    - geocoder: (Optional) "gazetteer" (default) or "nominatim".
+    - gazetteer_file: (Optional) Gazetteer CSV, relative to the project directory (default gazetteer.csv).
+    - nominatim_url: (Optional) Nominatim base URL (default https://nominatim.openstreetmap.org).
+"""
+
+import csv
+import os
+import re
+import sqlite3
+import threading
+import time
+
+import httpx
+
+from gosr.lib.resource_registry import normalize_address
+
+CACHE_FILENAME = "geocode-cache.db"
+GAZETTEER_FILENAME = "gazetteer.csv"
+
+default_nominatim_url = "https://nominatim.openstreetmap.org"
+user_agent = "gosr-ai-workflow geocoder"
+
+zip_pattern = re.compile(r"\d{5}")
+state_pattern = re.compile(r"[a-z]{2}")
+
+# Match precisions, least precise first; only "address" is exact
+precisions = ["city", "zip", "address"]
+EXACT = "address"
+
+
+class GeocodeError(Exception):
+    """
+    A lookup failed (as opposed to finding nothing); the address is not cached as a miss.
+    """
+
+
+def zip_code(address):
+    """
+    Return the last 5-digit ZIP code in a normalized address, or None.
+    """
+    found = [w for w in address.split() if zip_pattern.fullmatch(w)]
+    return found[-1] if found else None
+
+
+def city_state_keys(address):
+    """
+    Return the candidate "city st" keys of a normalized address ending in a two-letter state
+    (and maybe a ZIP or ZIP+4 code), longest city first: "12 elm st kansas city mo 64105" gives
+    "st kansas city mo", "kansas city mo" and "city mo".
+    """
+    words = address.split()
+    while words and words[-1].isdigit():
+        words.pop()
+    if len(words) < 2 or not state_pattern.fullmatch(words[-1]):
+        return []
+    return [" ".join(words[-n:]) for n in range(min(len(words) - 1, 4), 1, -1)]
+
+
+class GazetteerGeocoder:
+    """
+    Offline geocoder over a table of known places: normalized addresses, ZIP codes and cities.
+    """
+
+    name = "gazetteer"
+
+    def __init__(self, places):
+        """
+        Args:
+            places (dict): {key: (lat, lng)}; keys are normalized addresses, ZIP codes or cities
+                with their state ("kansas city mo").
+        """
+        self.places = places
+
+    @classmethod
+    def from_csv(cls, filename):
+        """
+        Load a gazetteer CSV with key, lat and lng columns; keys are normalized on loading.
+        """
+        places = {}
+        with open(filename, "r", newline='', encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                key = normalize_address(row["key"])
+                if key:
+                    places[key] = (float(row["lat"]), float(row["lng"]))
+        return cls(places)
+
+    def geocode(self, address):
+        candidates = [(address, EXACT), (zip_code(address), "zip")] + [(key, "city") for key in city_state_keys(address)]
+        for key, precision in candidates:
+            if key is not None and key in self.places:
+                return self.places[key] + (precision,)
+        return None
+
+
+class NominatimGeocoder:
+    """
+    Geocoder using a Nominatim search API, one request at a time, at most one per min_interval
+    seconds (the public server's usage policy).
+    """
+
+    name = "nominatim"
+
+    def __init__(self, base_url=default_nominatim_url, min_interval=1.0, timeout=10.0, transport=None):
+        self.base_url = base_url.rstrip("/")
+        self.min_interval = min_interval
+        self.client = httpx.Client(headers={"User-Agent": user_agent}, timeout=timeout, transport=transport)
+        self.next_request = 0.0
+        self.requests = 0
+
+    def geocode(self, address):
+        now = time.monotonic()
+        if self.next_request > now:
+            time.sleep(self.next_request - now)
+        self.next_request = time.monotonic() + self.min_interval
+        self.requests += 1
+        try:
+            response = self.client.get(f"{self.base_url}/search", params={"q": address, "format": "json", "limit": 1})
+            response.raise_for_status()
+            found = response.json()
+        except (httpx.HTTPError, ValueError) as e:
+            raise GeocodeError(f"geocoding failed for {address!r}: {e}") from e
+        if not found:
+            return None
+        return float(found[0]["lat"]), float(found[0]["lon"]), nominatim_precision(found[0])
+
+
+def nominatim_precision(place):
+    """
+    Return the precision of a Nominatim search result: streets and buildings (place_rank 26
+    and up) are exact, postcodes are "zip" and anything coarser is "city".
+    """
+    if int(place.get("place_rank", 30)) >= 26:
+        return EXACT
+    return "zip" if place.get("type") == "postcode" else "city"
+
+
+def make_geocoder(config, path):
+    """
+    Return the geocoder configured in config.yaml (see the module docstring).
+    """
+    config = config or {}
+    kind = config.get("geocoder", "gazetteer")
+    if kind == "nominatim":
+        return NominatimGeocoder(config.get("nominatim_url", default_nominatim_url))
+    if kind != "gazetteer":
+        raise ValueError(f"Unknown geocoder {kind!r}; expected 'gazetteer' or 'nominatim'")
+    filename = os.path.join(path, config.get("gazetteer_file", GAZETTEER_FILENAME))
+    if not os.path.exists(filename):
+        raise FileNotFoundError(f"Gazetteer {filename} not found; set gazetteer_file or geocoder: nominatim in config.yaml")
+    return GazetteerGeocoder.from_csv(filename)
+
+
+schema = """
+CREATE TABLE IF NOT EXISTS addresses (
+    address TEXT PRIMARY KEY,
+    lat REAL,
+    lng REAL,
+    precision TEXT,
+    geocoder TEXT,
+    geocoded_at REAL NOT NULL
+);
+"""
+
+
+class GeocodeCache:
+    """
+    SQLite-backed normalized address -> (lat, lng) cache, with the precision of each match and
+    the geocoder that last looked it up; misses are stored with NULL coordinates. Safe to
+    share between threads.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.lock = threading.RLock()
+        self.db = sqlite3.connect(filename, check_same_thread=False)
+        self.db.executescript(schema)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        with self.lock:
+            self.db.commit()
+            self.db.close()
+
+    def get(self, address):
+        """
+        Return the address's entry, or None if it was never looked up: {"coordinates": (lat, lng)
+        or None for a recorded miss, "precision": one of precisions or None, "geocoder": name}.
+        """
+        with self.lock:
+            row = self.db.execute(
+                "SELECT lat, lng, precision, geocoder FROM addresses WHERE address = ?", (address,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"coordinates": None if row[0] is None else (row[0], row[1]), "precision": row[2], "geocoder": row[3]}
+
+    def put(self, address, coordinates, precision=None, geocoder=None):
+        lat, lng = coordinates if coordinates is not None else (None, None)
+        with self.lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO addresses (address, lat, lng, precision, geocoder, geocoded_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (address, lat, lng, precision, geocoder, time.time()),
+            )
+
+    def commit(self):
+        with self.lock:
+            self.db.commit()
+
+    def count(self):
+        with self.lock:
+            return self.db.execute("SELECT COUNT(*) FROM addresses").fetchone()[0]
+
+
+def geocode_cache_filename(path):
+    return os.path.join(path, CACHE_FILENAME)
+
+
+def needs_lookup(entry, geocoder_name, retry_misses=False):
+    """
+    Return True if an address with this cache entry should be looked up: it never was, or its
+    entry is not exact and came from another geocoder (or is a miss and retry_misses is set).
+    """
+    if entry is None:
+        return True
+    if entry["precision"] == EXACT:
+        return False
+    return entry["geocoder"] != geocoder_name or (retry_misses and entry["coordinates"] is None)
+
+
+def geocode_resources(resource_list, geocoder, cache, retry_misses=False):
+    """
+    Set "lat" and "lng" on every resource whose address can be geocoded.
+    Each distinct normalized address is looked up once, in the cache first; approximate and
+    missing entries are looked up again by a different geocoder (see needs_lookup).
+
+    Args:
+        resource_list (list): Resources, updated in place.
+        geocoder: Object with a name and geocode(normalized address) -> (lat, lng, precision) or None.
+        cache (GeocodeCache): Address cache, read and updated.
+        retry_misses (bool): Ask the geocoder again for addresses it could not place before.
+
+    Returns:
+        dict: Counts: "addresses" (distinct), "cached", "geocoded" (looked up now), "refined"
+        (approximate entries replaced by a more precise match), "failed" (lookups that raised
+        GeocodeError), "located" (resources given coordinates) and "unlocated" (resources with
+        an address but none).
+    """
+    by_address = {}
+    for r in resource_list:
+        address = normalize_address(r.get("address"))
+        if address:
+            by_address.setdefault(address, []).append(r)
+
+    name = getattr(geocoder, "name", type(geocoder).__name__)
+    stats = {"addresses": len(by_address), "cached": 0, "geocoded": 0, "refined": 0, "failed": 0, "located": 0, "unlocated": 0}
+    for address, resources in by_address.items():
+        entry = cache.get(address)
+        coordinates = entry["coordinates"] if entry is not None else None
+        if not needs_lookup(entry, name, retry_misses):
+            stats["cached"] += 1
+        else:
+            try:
+                found = geocoder.geocode(address)
+            except GeocodeError as e:
+                # Leave these resources as they are; the next run tries again
+                print(e)
+                stats["failed"] += 1
+                stats["unlocated"] += len(resources)
+                continue
+            stats["geocoded"] += 1
+            precision = entry["precision"] if entry is not None else None
+            if found is not None and (precision is None or precisions.index(found[2]) > precisions.index(precision)):
+                if coordinates is not None:
+                    stats["refined"] += 1
+                coordinates, precision = found[:2], found[2]
+            # A match no better than the cached one keeps it; the entry records who looked last
+            cache.put(address, coordinates, precision, name)
+        for r in resources:
+            if coordinates is None:
+                r.pop("lat", None)
+                r.pop("lng", None)
+                stats["unlocated"] += 1
+            else:
+                r["lat"], r["lng"] = coordinates
+                stats["located"] += 1
+    cache.commit()
+    return stats
@@ -0,0 +1,141 @@
+"""
+incremental.py
+
+Dependency-aware incremental regeneration for the o2s and s2r stages.
+
+Each leaf that a stage expands (an obstacle in o2s, a solution in s2r) gets a
+fingerprint computed from everything that determines its generated subtree:
+the node content, the config keys the prompt depends on, and the stage's
+prompt template version. Fingerprints are written to a sidecar file next to
+the stage output (e.g. s.fingerprints.json next to s.json), keyed by a hash of
+the node content alone.
+
+On an incremental run a leaf whose current fingerprint matches the recorded
+one has its children grafted from the previous output file instead of being
+regenerated; every other leaf is regenerated as usual.
+"""
+
+import hashlib
+import json
+import logging
+import os
+
+from gosr.lib.utils import add_children
+
+logger = logging.getLogger(__name__)
+
+
+def content_key(data):
+    """
+    Return a stable hash of a node's content (str or dict).
+    """
+    text = json.dumps(data, sort_keys=True, ensure_ascii=False)
+    return hashlib.md5(text.encode()).hexdigest()
+
+
+def fingerprint(data, config, config_keys, prompt_version):
+    """
+    Return the fingerprint of the subtree generated below a node.
+
+    Args:
+        data: The node content used in the prompt.
+        config (dict): The loaded config.yaml.
+        config_keys (list of str): Config keys the stage's prompt or post-processing depends on.
+        prompt_version (int): The stage's prompt template version.
+    """
+    inputs = {
+        "data": data,
+        "config": {k: config.get(k) for k in config_keys},
+        "prompt_version": prompt_version,
+    }
+    return content_key(inputs)
+
+
+def fingerprints_filename(path, tree_filename):
+    """
+    Return the sidecar filename holding fingerprints for a stage output, e.g. s.json -> s.fingerprints.json.
+    """
+    stem, _ = os.path.splitext(tree_filename)
+    return os.path.join(path, f"{stem}.fingerprints.json")
+
+
+def load_fingerprints(path, tree_filename):
+    """
+    Load the recorded fingerprints for a stage output, or an empty dict if there are none.
+    """
+    filename = fingerprints_filename(path, tree_filename)
+    try:
+        with open(filename, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (IOError, OSError):
+        return {}
+    except json.JSONDecodeError:
+        logger.warning(f"{filename} not parsable, regenerating all subtrees")
+        return {}
+
+
+def save_fingerprints(path, tree_filename, fingerprints):
+    """
+    Write the fingerprints for a stage output to its sidecar file.
+    """
+    with open(fingerprints_filename(path, tree_filename), "w", encoding="utf-8") as f:
+        json.dump(fingerprints, f)
+
+
+def index_subtrees(j, parent_tag, child_tag, index=None):
+    """
+    Walk a saved tree (the treelib to_json format) and map the content key of
+    every parent_tag node to its child_tag children.
+
+    Nodes without any child_tag children are left out, so a leaf that was never
+    expanded (e.g. an interrupted run) is regenerated rather than grafted empty.
+    """
+    if index is None:
+        index = {}
+    for tag, v in j.items():
+        if not isinstance(v, dict):
+            continue
+        children = v.get("children", [])
+        if tag == parent_tag and "data" in v:
+            grafts = [c for c in children if isinstance(c, dict) and child_tag in c]
+            if grafts:
+                index.setdefault(content_key(v["data"]), grafts)
+        for c in children:
+            if isinstance(c, dict):
+                index_subtrees(c, parent_tag, child_tag, index)
+    return index
+
+
+def load_previous(path, tree_filename, parent_tag, child_tag):
+    """
+    Load the previous output of a stage for grafting.
+
+    Returns:
+        tuple: (index, fingerprints) where index maps content keys to the
+        previously generated children and fingerprints maps content keys to the
+        fingerprint recorded when those children were generated.
+    """
+    file_path = os.path.join(path, tree_filename)
+    if not os.path.exists(file_path):
+        return {}, {}
+    with open(file_path, "r", encoding="utf-8") as f:
+        j = json.load(f)
+    return index_subtrees(j, parent_tag, child_tag), load_fingerprints(path, tree_filename)
+
+
+def lookup(node, previous, fp):
+    """
+    Return the previously generated children for node if its fingerprint is unchanged, else None.
+    """
+    index, fingerprints = previous
+    key = content_key(node.data)
+    if key in index and fingerprints.get(key) == fp:
+        return index[key]
+    return None
+
+
+def graft(node, children):
+    """
+    Re-create previously generated children under node.
+    """
+    add_children(node, {"children": children})
@@ -0,0 +1,219 @@
+"""
+program_verification.py
+
+Concurrent, resumable LLM verification of program contact data (website, address, phone)
+with a validity grade (A-F), as used by experimental/dr-ruth.py.
+
+ProgramVerifier sends the verification prompts from a thread pool; the calls themselves go
+through the caller's LLM function, which is expected to wait on the shared rate limiter
+(gosr.lib.utils.wait_for_rate_limit). Every verified program is appended to a JSON-lines
+checkpoint as soon as its answer arrives, keyed by a hash of the program, so an interrupted
+run resumes with only the programs not yet verified, and no file is rewritten per program.
+
+With pack_size > 1, several programs are verified per prompt (a numbered list in, a
+{"programs": [...]} list out, in the same order). A packed answer that does not have one
+dict per program is retried one program at a time, so packing never loses programs.
+
+Usage:
+    verifier = ProgramVerifier(call_gpt4, checkpoint_filename(path), pack_size=10, max_workers=8)
+    results = verifier.verify(programs)  # {program_key(p): verified program}
+    write_results_table(os.path.join(path, RESULTS_FILENAME), rows)
+"""
+
+import csv
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+CHECKPOINT_FILENAME = "verify.checkpoint.jsonl"
+RESULTS_FILENAME = "verify.results.csv"
+
+table_columns = ["solution", "program", "program_name", "organization_name", "validity", "website", "address", "phone"]
+
+
+def program_key(p):
+    """
+    Return a stable key for a program: the hash of its JSON with sorted keys.
+    """
+    return hashlib.md5(json.dumps(p, sort_keys=True).encode()).hexdigest()
+
+
+def single_prompt(p):
+    """
+    Return the prompt verifying one program. The text is unchanged from dr-ruth.py's original
+    validate_program, so its cached answers still apply.
+    """
+    return f"""\
+Verify that this program is real and that the website, address, and phone
+are correct. Set any unverifiable value to JSON null.
+Add a new field "validity" grading from A through F as to confidence
+that this program is real. 
+{p}
+"""
+
+
+def packed_prompt(programs):
+    """
+    Return the prompt verifying several programs at once.
+    """
+    listing = "\n".join(f"{i}. {json.dumps(p)}" for i, p in enumerate(programs, 1))
+    return f"""\
+Verify that each of these {len(programs)} programs is real and that its website, address, and phone
+are correct. Set any unverifiable value to JSON null.
+Add a new field "validity" to each, grading from A through F as to confidence
+that the program is real.
+Return JSON {{"programs": [...]}} with one verified program per input program, in the same order.
+{listing}
+"""
+
+
+def unpack(response, n):
+    """
+    Return the n verified programs of a packed answer, or None if it does not have exactly
+    one dict per program.
+    """
+    if not isinstance(response, dict):
+        return None
+    programs = response.get("programs")
+    if not isinstance(programs, list) or len(programs) != n or not all(isinstance(p, dict) for p in programs):
+        return None
+    return programs
+
+
+def grade(result):
+    """
+    Return the validity grade of a verified program, looking one level down for answers
+    wrapped as {"program": {...}}.
+    """
+    if not isinstance(result, dict):
+        return None
+    if "validity" in result:
+        return result["validity"]
+    if len(result) == 1 and isinstance(next(iter(result.values())), dict):
+        return next(iter(result.values())).get("validity")
+    return None
+
+
+class ProgramVerifier:
+    """
+    Verifies programs concurrently through an LLM call function, checkpointing each result.
+    """
+
+    def __init__(self, call, checkpoint, pack_size=1, max_workers=8):
+        """
+        Args:
+            call (callable): call(prompt) -> parsed JSON answer (a dict, or a str on failure).
+            checkpoint (str): JSON-lines file of verified programs, appended to and resumed from.
+            pack_size (int): Programs per prompt.
+            max_workers (int): Prompts in flight.
+        """
+        self.call = call
+        self.checkpoint = checkpoint
+        self.pack_size = max(1, pack_size)
+        self.max_workers = max_workers
+        self.lock = threading.Lock()
+        self.results = self.load()
+        self.resumed = len(self.results)
+        self.calls = 0
+
+    def load(self):
+        """
+        Return {key: verified program} from the checkpoint, if there is one.
+        """
+        results = {}
+        if os.path.exists(self.checkpoint):
+            with open(self.checkpoint, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # A line cut short by an interrupted run
+                    results[entry["key"]] = entry["result"]
+        return results
+
+    def record(self, key, result):
+        with self.lock:
+            self.results[key] = result
+            with open(self.checkpoint, "a", encoding="utf-8") as f:
+                f.write(json.dumps({"key": key, "result": result}) + "\n")
+
+    def count_call(self):
+        with self.lock:
+            self.calls += 1
+
+    def verify_one(self, key, p):
+        self.count_call()
+        result = self.call(single_prompt(p))
+        if isinstance(result, dict) and result:
+            self.record(key, result)
+
+    def verify_pack(self, pack):
+        if len(pack) == 1:
+            return self.verify_one(*pack[0])
+        self.count_call()
+        programs = unpack(self.call(packed_prompt([p for _, p in pack])), len(pack))
+        if programs is None:
+            for key, p in pack:
+                self.verify_one(key, p)
+            return
+        for (key, _), result in zip(pack, programs):
+            self.record(key, result)
+
+    def verify(self, programs, on_done=None):
+        """
+        Verify the programs not already in the checkpoint.
+
+        Args:
+            programs (iterable): Program dicts; identical programs are verified once.
+            on_done (callable): Optional on_done(done, total), called as each prompt finishes.
+
+        Returns:
+            dict: {program_key(p): verified program} for every program verified so far. A
+            program without a usable answer (failed call, or not JSON) is left out, and
+            retried by the next run.
+        """
+        todo = {}
+        for p in programs:
+            key = program_key(p)
+            if key not in self.results:
+                todo.setdefault(key, p)
+        items = list(todo.items())
+        packs = [items[i:i + self.pack_size] for i in range(0, len(items), self.pack_size)]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [executor.submit(self.verify_pack, pack) for pack in packs]
+            for done, future in enumerate(as_completed(futures), 1):
+                future.result()
+                if on_done is not None:
+                    on_done(done, len(packs))
+        return self.results
+
+
+def checkpoint_filename(path):
+    return os.path.join(path, CHECKPOINT_FILENAME)
+
+
+def write_results_table(filename, rows):
+    """
+    Write one CSV row per program: its solution and position, names, grade and contact data.
+
+    Args:
+        filename (str): CSV file to write.
+        rows (iterable): (solution title, program number, verified program) tuples.
+    """
+    with open(filename, "w", newline='', encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=table_columns)
+        writer.writeheader()
+        for solution, number, p in rows:
+            p = p if isinstance(p, dict) else {}
+            writer.writerow({
+                "solution": solution,
+                "program": number,
+                "program_name": p.get("program_name"),
+                "organization_name": p.get("organization_name", p.get("organization")),
+                "validity": grade(p),
+                "website": p.get("website"),
+                "address": p.get("address"),
+                "phone": p.get("phone"),
+            })
@@ -0,0 +1,123 @@
+"""
+progress.py
+
+Incremental progress reporting for the GOSR stages.
+
+- Progress keeps a single status line up to date (nodes done/total, LLM calls in flight,
+  cache hits, ETA). On a terminal the line is rewritten in place a few times a second;
+  otherwise a line is written at most every `interval` seconds so log files stay small.
+- Stages log just the subtree they inserted (gosr.lib.utils.log_subtree) instead of
+  dumping the whole tree after every insert.
+"""
+
+import sys
+import threading
+import time
+
+from gosr.lib import utils
+
+
+def format_seconds(seconds):
+    """
+    Format a duration as H:MM:SS or M:SS.
+    """
+    seconds = int(seconds)
+    h, rest = divmod(seconds, 3600)
+    m, s = divmod(rest, 60)
+    return f"{h}:{m:02d}:{s:02d}" if h else f"{m}:{s:02d}"
+
+
+class Progress:
+    """
+    Live single-line status for a stage. Thread-safe: workers may call advance() concurrently.
+    """
+
+    def __init__(self, label, total=0, stream=None, interval=10.0):
+        self.label = label
+        self.total = total
+        self.done = 0
+        self.stream = stream if stream is not None else sys.stderr
+        self.tty = hasattr(self.stream, "isatty") and self.stream.isatty()
+        self.interval = interval
+        self.start_time = time.monotonic()
+        self.last_render = None
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.ticker = None
+
+    def start(self):
+        """
+        Start refreshing the status line in the background (terminals only), so the
+        calls-in-flight count stays live while waiting on the LLM.
+        """
+        if self.tty and self.ticker is None:
+            self.ticker = threading.Thread(target=self._tick, daemon=True)
+            self.ticker.start()
+        return self
+
+    def _tick(self):
+        while not self.stopped.wait(0.5):
+            self.render()
+
+    def add_total(self, n):
+        """
+        Add n items of work, e.g. when a new level's frontier becomes known.
+        """
+        with self.lock:
+            self.total += n
+        self.render()
+
+    def advance(self, n=1):
+        """
+        Mark n items of work as done.
+        """
+        with self.lock:
+            self.done += n
+        self.render()
+
+    def status(self):
+        """
+        Return the current status line.
+        """
+        stats = utils.call_stats
+        elapsed = time.monotonic() - self.start_time
+        if self.done and self.total > self.done:
+            eta = format_seconds(elapsed / self.done * (self.total - self.done))
+        else:
+            eta = "-"
+        pct = f"{100 * self.done / self.total:.3g}%" if self.total else "-"
+        return (
+            f"{self.label} {self.done}/{self.total} {pct} | "
+            f"in flight {stats['in_flight']} | "
+            f"cache hits {stats['cache_hits']}/{stats['calls']} | "
+            f"elapsed {format_seconds(elapsed)} | ETA {eta}"
+        )
+
+    def render(self, force=False):
+        """
+        Write the status line, in place on a terminal or rate-limited otherwise.
+        """
+        now = time.monotonic()
+        with self.lock:
+            recent = self.last_render is not None and now - self.last_render < self.interval
+            if not self.tty and not force and recent:
+                return
+            self.last_render = now
+            line = self.status()
+            if self.tty:
+                self.stream.write("\r\x1b[K" + line)
+            else:
+                self.stream.write(line + "\n")
+            self.stream.flush()
+
+    def finish(self):
+        """
+        Stop the background refresh and write the final status line.
+        """
+        self.stopped.set()
+        if self.ticker is not None:
+            self.ticker.join()
+        self.render(force=True)
+        if self.tty:
+            self.stream.write("\n")
+            self.stream.flush()
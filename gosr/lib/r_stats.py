@@ -11,6 +11,8 @@ import logging, logging.handlers
 import os
 import yaml
 
+from gosr.lib.resource_schema import ALIASES, get_field
+
 logger = logging.getLogger("r_stats")
 logger.setLevel(logging.DEBUG)
 
@@ -46,105 +48,175 @@ def write_tree(d, filename):
 
 
 def get_program_value(d):
-    possible_keys = [
-        "name",
-        "Name",
-        "program_name",
-        "program",
-        "event_name",
-        "title",
-        "Effort Name",
-        "Effort",
-        "effort_name",
-        "project_name",
-    ]
-    for key in possible_keys:
-        if key in d:
-            return d[key]
-    logger.error(f"Only keys found were {d.keys()}, no program key found among {possible_keys}")
-    return None
+    value = get_field("program", d)
+    if value is None:
+        logger.error(f"Only keys found were {d.keys()}, no program key found among {ALIASES['program']}")
+    return value
 
 
 def get_organization_value(d):
-    possible_keys = ["organization"]
-    for key in possible_keys:
-        if key in d:
-            if type(d[key]) is dict:
-                return d[key]["name"]
-            else:
-                return d[key]
-    logger.error(f"No organization key found in {d}")
-    return None
+    value = get_field("organization", d)
+    if value is None:
+        logger.error(f"No organization key found in {d}")
+    return value
 
 def r_normalize(r):
     logger.info(f'r_normalize found {type(r)}')
     return r
 
 
-def run_stats(j):
-    # print(j)
-    orgs = {}
-    programs = {}
-    for i in j:
-        program = get_program_value(i)
-        organization = get_organization_value(i)
-        if program in programs:
-            logger.warning(
-                f"Program: {program}\nOriginal:\t{programs[program]}\nDuplicate:\t{i}"
-            )
+class StatsAccumulator:
+    """
+    Running resource statistics, fed only new resources and links.
+
+    Produces the same totals as run_stats and run_urls without rescanning the resource
+    list, plus breakdowns per top-level theme and per solution.
+    """
+
+    def __init__(self):
+        self.total = 0
+        self.programs = {}
+        self.orgs = {}
+        self.duplicate_programs = 0
+        self.duplicate_orgs = 0
+        self.urls = {
+            "total": 0,
+            "no_url_valid": 0,
+            "true_url_valid": 0,
+            "false_url_valid": 0,
+            "base_url_valid": 0,
+        }
+        self.theme_resources = {}
+        self.solution_links = {}  # Solution node id -> resource links
+        self.solution_titles = {}  # Solution node id -> title, for display
+
+    def add(self, resource):
+        """
+        Count one new resource.
+        """
+        self.total += 1
+        program = get_program_value(resource)
+        organization = get_organization_value(resource)
+        if program in self.programs:
+            self.duplicate_programs += 1
+            logger.debug(f"Program: {program}\nOriginal:\t{self.programs[program]}\nDuplicate:\t{resource}")
         else:
-            programs[program] = i
-            if organization in orgs:
-                logger.warning(
-                    f"Organization: {organization}\nOriginal:\t{orgs[organization]}\nDuplicate:\t{i}"
-                )
+            self.programs[program] = resource
+            if organization in self.orgs:
+                self.duplicate_orgs += 1
+                logger.debug(f"Organization: {organization}\nOriginal:\t{self.orgs[organization]}\nDuplicate:\t{resource}")
             else:
-                orgs[organization] = i
+                self.orgs[organization] = resource
+
+        if "dup" in resource:
+            return
+        self.urls["total"] += 1
+        if "url_valid" not in resource:
+            self.urls["no_url_valid"] += 1
+        elif resource["url_valid"] == True:
+            self.urls["true_url_valid"] += 1
+        elif resource["url_valid"] == False:
+            self.urls["false_url_valid"] += 1
+            logger.debug(f'{resource.get("id")}: false_url_valid: {resource.get("website")}')
+        else:
+            self.urls["base_url_valid"] += 1
+
+    def add_all(self, resources):
+        """
+        Count a list of new resources.
+        """
+        for r in resources:
+            self.add(r)
+
+    def link(self, resource_id, solution, theme, title=None):
+        """
+        Count a link from a solution (under a top-level theme) to a resource. Solutions are
+        counted by node id, since solutions under different obstacles often share a title;
+        the title is kept for display.
+        """
+        self.theme_resources.setdefault(theme, set()).add(resource_id)
+        self.solution_links[solution] = self.solution_links.get(solution, 0) + 1
+        if title is not None:
+            self.solution_titles[solution] = title
+
+    def link_tree(self, j, theme=None, solution=None, title=None):
+        """
+        Count every solution→resource link in a saved r.json tree, in one walk. Solutions are
+        identified by their pre-order node numbers in j, as in gosr.lib.resource_index. For
+        the resource children of one solution, pass that solution's id and title.
+        """
+        count = 0
+        stack = [(j, theme, solution, title)]
+        while stack:
+            subtree, theme, solution, title = stack.pop()
+            for tag, v in subtree.items():
+                if not isinstance(v, dict):
+                    continue
+                node = count
+                count += 1
+                data = v.get("data")
+                node_title = data.get("title") if isinstance(data, dict) else data
+                child_theme = node_title if tag == "obstacle" and theme is None else theme
+                child_solution, child_title = (node, node_title) if tag == "solution" else (solution, title)
+                if tag == "resource" and isinstance(data, dict):
+                    self.link(data.get("id"), solution, theme, title)
+                # Reversed so nodes are numbered in document order
+                for c in reversed(v.get("children", [])):
+                    if isinstance(c, dict):
+                        stack.append((c, child_theme, child_solution, child_title))
+
+    def totals(self):
+        """
+        Return the totals as a dict.
+        """
+        return {
+            "total": self.total,
+            "unique_programs": len(self.programs),
+            "unique_orgs": len(self.orgs),
+            "duplicate_programs": self.duplicate_programs,
+            "duplicate_orgs": self.duplicate_orgs,
+            **{f"urls_{k}": v for k, v in self.urls.items()},
+        }
+
+    def summary(self):
+        """
+        Return the run_stats totals line.
+        """
+        return f"Total input: {self.total} Unique programs: {len(self.programs)} Unique orgs: {len(self.orgs)}"
+
+    def url_summary(self):
+        """
+        Return the run_urls totals line.
+        """
+        return " ".join([f"Total resources: {self.urls['total']}"] + [
+            f"{k}: {v}" for k, v in self.urls.items() if k != "total"
+        ])
+
+    def breakdown(self):
+        """
+        Return the per-theme unique resource counts, and the per-solution link counts and
+        titles by solution node id.
+        """
+        return {
+            "per_theme": {t: len(ids) for t, ids in self.theme_resources.items()},
+            "per_solution": dict(self.solution_links),
+            "solution_titles": dict(self.solution_titles),
+        }
+
 
-    for org in orgs.keys():
+def run_stats(j):
+    stats = StatsAccumulator()
+    stats.add_all(j)
+
+    for org in stats.orgs.keys():
         logger.info(f"org: {org}")
 
-    print(
-        "Total input:",
-        len(j),
-        "Unique programs:",
-        len(programs),
-        "Unique orgs:",
-        len(orgs),
-    )
+    print(stats.summary())
 
 def run_urls(j):
-    total = 0
-    no_url_valid = 0
-    true_url_valid = 0
-    false_url_valid = 0
-    base_url_valid = 0
-
-    for r in j:
-        if "dup" in r:
-            continue
-
-        total += 1
-        if "url_valid" not in r:
-            no_url_valid += 1
-            # logger.debug(f'{r["id"]}: no_url_valid: {r["website"]}')
-        elif r["url_valid"] == True:
-            true_url_valid += 1
-            # logger.debug(f'{r["id"]}: true_url_valid: {r["website"]}')
-        elif r["url_valid"] == False:
-            false_url_valid += 1
-            logger.debug(f'{r["id"]}: false_url_valid: {r["website"]}')
-        else:
-            base_url_valid += 1
-            # logger.debug(f'{r["id"]}: base_url_valid: {r["url_valid"]} {r["website"]}')
-
-    print(
-        "Total resources:", total,
-        "no_url_valid:", no_url_valid,
-        "true_url_valid:", true_url_valid,
-        "false_url_valid:", false_url_valid,
-        "base_url_valid:", base_url_valid,
-    )
+    stats = StatsAccumulator()
+    stats.add_all(j)
+    print(stats.url_summary())
 
 counts = {}
 def run_json_counts(j):
@@ -189,12 +261,15 @@ def main():
 
     logger.addHandler(handler)
 
-    input_filename = "resources.json"
+    # Imported here because resource_store imports this module
+    from gosr.lib.resource_store import load_resource_list
 
-    j = open_json(filename=os.path.join(path, input_filename))
+    j = load_resource_list(path)
     logger.info(json.dumps(j, indent=2))
-    run_stats(j)
-    # run_urls(j)
+    stats = StatsAccumulator()
+    stats.add_all(j)
+    print(stats.summary())
+    print(stats.url_summary())
 
     input_filename = "r.json"
     with open(os.path.join(path, input_filename), "r", encoding='utf-8') as f:
@@ -204,5 +279,9 @@ def main():
     for k,v in counts.items():
         print(k,v)
 
+    stats.link_tree(j)
+    for theme, n in stats.breakdown()["per_theme"].items():
+        print(f"theme: {theme}: {n} resources")
+
 if __name__ == "__main__":
     sys.exit(main())
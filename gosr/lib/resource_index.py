@@ -0,0 +1,160 @@
+"""
+resource_index.py
+
+Reverse index of the resource links in r.json (r.index.json in the project directory).
+
+r.json nests resources under solutions under obstacles, so "which solutions reference
+resource X" or "which resources belong to theme Y" means walking the whole tree. The index
+records every solution once, in tree order, with its data, the data of
+the obstacle it solves, its top-level theme and its resource ids:
+
+    {"themes": [theme, ...],
+     "solutions": [{"node", "data", "obstacle_node", "obstacle", "theme", "resources"}, ...]}
+
+node and obstacle_node are the nodes' pre-order numbers in r.json (the root is 0), the same
+numbering as the node_id column written by gosr.convert.json2parquet. The resource id ->
+solutions and theme -> resources directions are derived when the index is loaded.
+
+s2r writes the index when it writes the final r.json. Consumers call load_index(path), which
+rebuilds and saves it if r.json is newer, so a hand-edited r.json is never shadowed.
+"""
+
+import json
+import os
+
+INDEX_FILENAME = "r.index.json"
+
+
+def node_title(data):
+    """
+    Return the title of a node's data, which is a {"title", "description"} dict or a string.
+    """
+    return data.get("title") if isinstance(data, dict) else data
+
+
+class ResourceIndex:
+    """
+    Resource id <-> solution <-> theme lookups for one r.json tree.
+    """
+
+    def __init__(self, themes, solutions):
+        self.themes = themes
+        self.solutions = solutions
+        self.by_node = {s["node"]: s for s in solutions}
+        self.by_resource = {}
+        self.by_theme = {t: [] for t in themes}
+        for s in solutions:
+            for rid in s["resources"]:
+                self.by_resource.setdefault(rid, []).append(s)
+            self.by_theme.setdefault(s["theme"], []).append(s)
+
+    @classmethod
+    def build(cls, j):
+        """
+        Build the index from a saved tree, in one walk.
+        """
+        themes = []
+        solutions = []
+        count = 0
+        # (subtree, node number of the parent, parent's data, theme)
+        stack = [(j, None, None, None)]
+        while stack:
+            subtree, parent, parent_data, theme = stack.pop()
+            for tag, v in subtree.items():
+                if not isinstance(v, dict):
+                    continue
+                node = count
+                count += 1
+                data = v.get("data")
+                children = [c for c in v.get("children", []) if isinstance(c, dict)]
+                if parent == 0:
+                    # Top-level obstacle; r2google-maps prefers an explicit label
+                    child_theme = v.get("label") or node_title(data)
+                    themes.append(child_theme)
+                else:
+                    child_theme = theme
+                if tag == "solution":
+                    solutions.append({
+                        "node": node,
+                        "data": data,
+                        "obstacle_node": parent,
+                        "obstacle": parent_data,
+                        "theme": child_theme,
+                        "resources": [
+                            c["resource"]["data"]["id"] for c in children
+                            if isinstance(c.get("resource"), dict) and isinstance(c["resource"].get("data"), dict)
+                        ],
+                    })
+                # Reversed so nodes are numbered in document order
+                for c in reversed(children):
+                    stack.append((c, node, data, child_theme))
+        return cls(themes, solutions)
+
+    def to_json(self):
+        return {"themes": self.themes, "solutions": self.solutions}
+
+    @classmethod
+    def from_json(cls, d):
+        return cls(d["themes"], d["solutions"])
+
+    def solutions_for(self, resource_id):
+        """
+        Return the solution entries that link to a resource, in tree order.
+        """
+        return self.by_resource.get(resource_id, [])
+
+    def themes_for(self, resource_id):
+        """
+        Return the themes a resource is linked under, without repeats.
+        """
+        return list(dict.fromkeys(s["theme"] for s in self.solutions_for(resource_id)))
+
+    def resources_for_solution(self, node):
+        """
+        Return the resource ids linked to the solution with the given node number.
+        """
+        s = self.by_node.get(node)
+        return s["resources"] if s is not None else []
+
+    def resources_for_theme(self, theme):
+        """
+        Return the ids of the resources linked under a theme, in tree order, without repeats.
+        """
+        return list(dict.fromkeys(rid for s in self.by_theme.get(theme, []) for rid in s["resources"]))
+
+    def links(self, theme=None):
+        """
+        Yield (resource id, solution entry) for every link, in tree order, optionally for one theme.
+        """
+        solutions = self.solutions if theme is None else self.by_theme.get(theme, [])
+        for s in solutions:
+            for rid in s["resources"]:
+                yield rid, s
+
+
+def index_filename(path):
+    return os.path.join(path, INDEX_FILENAME)
+
+
+def write_index(path, j):
+    """
+    Build the index for a saved tree and write it to the project directory.
+    """
+    index = ResourceIndex.build(j)
+    with open(index_filename(path), "w", encoding='utf-8') as f:
+        json.dump(index.to_json(), f)
+    return index
+
+
+def load_index(path, filename="r.json"):
+    """
+    Return the project's resource index, rebuilding it if r.json is newer than r.index.json.
+    """
+    index_file = index_filename(path)
+    tree_file = os.path.join(path, filename)
+    if os.path.exists(index_file) and os.path.getmtime(index_file) >= os.path.getmtime(tree_file):
+        with open(index_file, "r", encoding='utf-8') as f:
+            return ResourceIndex.from_json(json.load(f))
+    with open(tree_file, "r", encoding='utf-8') as f:
+        j = json.load(f)
+    return write_index(path, j)
@@ -0,0 +1,207 @@
+"""
+resource_registry.py
+
+Indexed registry of resources for s2r.
+
+The registry wraps the flat resource list (the one saved as resources-raw.json) and keeps
+hash indexes on the normalized (program, organization) pair, the website domain and the
+address. Resources are deduplicated as they are added: a rediscovered resource gets the id
+of the existing entry instead of a new one, so the tree links to a single resource. Counters
+for the s2r progress output are maintained incrementally rather than by rescanning the list.
+
+A resource is treated as already known when it has
+    - the same normalized program and organization, or
+    - the same normalized program and the same website domain, or
+    - the same normalized program and the same normalized address.
+Domain or address alone is not enough: one city government domain hosts many programs.
+Resources without a program name are never merged.
+"""
+
+import re
+from collections import defaultdict
+from urllib.parse import urlparse
+
+from gosr.lib.r_stats import get_program_value, get_organization_value
+
+website_keys = ["website", "Website", "web_page", "webpage", "WebPage", "Web Page", "url", "URL"]
+address_keys = ["address", "Address", "location"]
+
+# Text LLMs put in place of a value, e.g. an address or website
+placeholder_values = {
+    "", "n/a", "na", "none", "null", "tbd", "varies", "unknown", "online", "virtual", "various locations",
+}
+
+# Street types, units and directions in their short form, so "12 Main Street" and "12 Main St." match
+street_abbreviations = {
+    "street": "st", "avenue": "ave", "av": "ave", "road": "rd", "boulevard": "blvd", "drive": "dr",
+    "lane": "ln", "parkway": "pkwy", "place": "pl", "court": "ct", "highway": "hwy", "suite": "ste",
+    "apartment": "apt", "floor": "fl", "north": "n", "south": "s", "east": "e", "west": "w",
+    "northeast": "ne", "northwest": "nw", "southeast": "se", "southwest": "sw",
+}
+countries = [["united", "states", "of", "america"], ["united", "states"], ["usa"], ["us"]]
+
+
+def normalize_name(s):
+    """
+    Normalize a program or organization name for matching:
+    lower case, '&' as 'and', no punctuation, no leading 'the', single spaces.
+    """
+    if not isinstance(s, str):
+        return ""
+    s = s.lower().replace("&", " and ")
+    s = re.sub(r"[^\w\s]", " ", s)
+    s = re.sub(r"\s+", " ", s).strip()
+    if s.startswith("the "):
+        s = s[4:]
+    return s
+
+
+def is_placeholder(s):
+    """
+    Return True for empty or placeholder values such as "N/A" or "TBD".
+    """
+    return not isinstance(s, str) or s.strip().strip(".").lower() in placeholder_values
+
+
+def website_domain(url):
+    """
+    Return the host of a website URL without 'www.', or "" if there is none.
+    """
+    if is_placeholder(url) or " " in url.strip():
+        return ""
+    url = url.strip()
+    if "://" not in url:
+        url = "http://" + url
+    host = urlparse(url).netloc.lower().split(":")[0]
+    if host.startswith("www."):
+        host = host[4:]
+    return host
+
+
+def normalize_address(address):
+    """
+    Normalize an address for matching, or return "" for placeholders: as normalize_name, with
+    street types and directions abbreviated and a trailing country left out. The registry,
+    dedup and the geocode cache all key addresses this way.
+    """
+    if isinstance(address, dict):
+        address = address.get("location") or address.get("central_location") or ""
+    if is_placeholder(address):
+        return ""
+    words = [street_abbreviations.get(w, w) for w in normalize_name(address).split()]
+    for country in countries:
+        if len(words) > len(country) and words[-len(country):] == country:
+            del words[-len(country):]
+            break
+    return " ".join(words)
+
+
+def first_value(d, keys):
+    """
+    Return the first value in d for the given keys, looking into a nested organization dict too.
+    """
+    for k in keys:
+        if k in d and d[k]:
+            return d[k]
+    org = d.get("organization")
+    if isinstance(org, dict):
+        for k in keys:
+            if k in org and org[k]:
+                return org[k]
+    return None
+
+
+class ResourceRegistry:
+    """
+    Flat resource list plus hash indexes for insertion-time deduplication.
+    """
+
+    def __init__(self, resources=None):
+        self.resources = resources if resources is not None else []
+        self.by_id = {}
+        self.by_key = {}
+        self.by_domain = defaultdict(list)
+        self.by_address = defaultdict(list)
+        self.duplicates = 0
+        self.next_id = 0
+        for r in self.resources:
+            self.index(r)
+
+    def keys(self, resource):
+        """
+        Return the normalized (program, organization, domain, address) of a resource.
+        """
+        return (
+            normalize_name(get_program_value(resource)),
+            normalize_name(get_organization_value(resource)),
+            website_domain(first_value(resource, website_keys)),
+            normalize_address(first_value(resource, address_keys)),
+        )
+
+    def index(self, resource):
+        """
+        Add an already identified resource to the indexes. Resources marked as
+        duplicates ("dup") are only indexed by id.
+        """
+        rid = resource.get("id")
+        if rid is not None:
+            self.by_id[rid] = resource
+            if isinstance(rid, int):
+                self.next_id = max(self.next_id, rid + 1)
+        if "dup" in resource:
+            self.duplicates += 1
+            return
+        program, org, domain, address = self.keys(resource)
+        if not program:
+            return
+        self.by_key.setdefault((program, org), rid)
+        if domain:
+            self.by_domain[domain].append(rid)
+        if address:
+            self.by_address[address].append(rid)
+
+    def find(self, resource):
+        """
+        Return the id of an existing resource matching this one, or None.
+        """
+        program, org, domain, address = self.keys(resource)
+        if not program:
+            return None
+        if (program, org) in self.by_key:
+            return self.by_key[(program, org)]
+        for rid in self.by_domain.get(domain, []) if domain else []:
+            if normalize_name(get_program_value(self.by_id[rid])) == program:
+                return rid
+        for rid in self.by_address.get(address, []) if address else []:
+            if normalize_name(get_program_value(self.by_id[rid])) == program:
+                return rid
+        return None
+
+    def add(self, resource):
+        """
+        Add a resource unless it is already known.
+
+        Returns:
+            tuple: (id, is_new). New resources are given the next free id and appended
+            to the resource list; known ones are left out and the existing id is returned.
+        """
+        rid = self.find(resource)
+        if rid is not None:
+            self.duplicates += 1
+            return rid, False
+        resource["id"] = self.next_id
+        self.resources.append(resource)
+        self.index(resource)
+        return resource["id"], True
+
+    def find_by_domain(self, url):
+        """
+        Return the resources whose website is on the same domain as url.
+        """
+        return [self.by_id[rid] for rid in self.by_domain.get(website_domain(url), [])]
+
+    def find_by_address(self, address):
+        """
+        Return the resources at the given address.
+        """
+        return [self.by_id[rid] for rid in self.by_address.get(normalize_address(address), [])]
@@ -0,0 +1,271 @@
+"""
+resource_schema.py
+
+The one resource normalizer shared by every script.
+
+LLM-produced resources name their fields in many ways ("name", "Effort Name", "ProgramName",
+...) and sometimes nest the organization ({"organization": {"name", "website", ...}}) or list
+several ({"organizations": [...]}). ALIASES maps each standard field to the keys that may
+hold it, in order of preference. It is compiled once into a key -> (field, rank) lookup, and
+for each resource shape (its keys and its organization dict's keys) the source of every field
+is compiled into a plan, so normalizing a resource is a handful of dict lookups rather than a
+scan of every alias list per field.
+
+normalize(resource) returns (record, missing): record has every standard field, and missing
+lists the fields that were not found (filled with "N/A" for email, website and description,
+None otherwise). Nothing exits or prints; callers decide how to report missing fields.
+
+Precedence for each field:
+    1. The highest-ranked alias holding a plain value. A dict under "address" contributes
+       its "location" or "central_location".
+    2. The nested organization(s): "organization" is the organization's name (names joined
+       with ", " for an "organizations" list); other fields, including a program name for
+       resources that only name their organization, come from the organization dict, or the
+       first listed organization that has them.
+    3. Fallback aliases (organization only): the address, for resources that give a place
+       instead of an organization.
+"""
+
+FIELDS = ["id", "program", "description", "organization", "address", "email", "website"]
+
+ALIASES = {
+    "id": ["id"],
+    "program": [
+        "name", "Name", "program_name", "program", "event_name", "title", "Effort Name", "EffortName",
+        "Effort", "effort_name", "project_name", "Project Name", "description", "effort_description",
+        "EffortDescription", "Effort_Name", "ProgramName", "Program Name", "ProjectName", "effort", "Title",
+    ],
+    "description": ["description", "Description", "effort_description", "effort", "EffortDescription"],
+    "organization": ["organization", "Organization", "ImplementingOrganization", "OrganizationName", "org"],
+    "address": ["address", "Address", "location"],
+    "email": ["email", "Email", "email unavailable"],
+    "website": ["website", "Website", "web_page", "webpage", "WebPage", "Web Page", "url", "URL"],
+}
+
+# Used only when neither an alias nor a nested organization gives the field
+FALLBACK_ALIASES = {
+    "organization": ["address", "Address"],
+}
+
+DEFAULTS = {"email": "N/A", "website": "N/A", "description": "N/A"}
+
+address_subkeys = ["location", "central_location"]
+
+FALLBACK_RANK = 1000
+
+
+def compile_aliases(aliases, fallback_aliases):
+    """
+    Return {key: ((field, rank), ...)} for every alias key.
+    """
+    lookup = {}
+    for field, keys in aliases.items():
+        for rank, k in enumerate(keys):
+            lookup.setdefault(k, []).append((field, rank))
+    for field, keys in fallback_aliases.items():
+        for rank, k in enumerate(keys):
+            lookup.setdefault(k, []).append((field, FALLBACK_RANK + rank))
+    return {k: tuple(v) for k, v in lookup.items()}
+
+
+lookup = compile_aliases(ALIASES, FALLBACK_ALIASES)
+
+
+def scan(keys):
+    """
+    Find the keys that may supply each field, given a dict's keys.
+
+    Returns:
+        tuple: ({field: [keys]} from primary aliases, {field: [keys]} from fallback aliases),
+        with each field's keys in order of preference.
+    """
+    candidates = {}
+    for k in keys:
+        for field, rank in lookup.get(k, ()):
+            candidates.setdefault(field, []).append((rank, k))
+    primary, fallback = {}, {}
+    for field, ranked in candidates.items():
+        ranked.sort()
+        primary[field] = [k for rank, k in ranked if rank < FALLBACK_RANK]
+        fallback[field] = [k for rank, k in ranked if rank >= FALLBACK_RANK]
+    return (
+        {f: ks for f, ks in primary.items() if ks},
+        {f: ks for f, ks in fallback.items() if ks},
+    )
+
+
+def usable(field, v):
+    """
+    Return True if v can supply the field: a plain value, or a dict under address.
+    """
+    return not isinstance(v, dict) or field == "address"
+
+
+def location(v):
+    """
+    Return the location of an address dict.
+    """
+    return next((v[a] for a in address_subkeys if a in v), "N/A")
+
+
+def values_from(d, fields):
+    """
+    Return {field: value} from the first usable key of each field in {field: [keys]}.
+    """
+    values = {}
+    for field, keys in fields.items():
+        for k in keys:
+            v = d[k]
+            if usable(field, v):
+                values[field] = location(v) if isinstance(v, dict) else v
+                break
+    return values
+
+
+def resolve(resource):
+    """
+    Return {field: value} for the fields found in a resource, following the precedence above.
+    """
+    primary, fallback = scan(tuple(resource))
+    values = values_from(resource, primary)
+    org = resource.get("organization")
+    if isinstance(org, dict):
+        if "organization" not in values and "name" in org:
+            values["organization"] = org["name"]
+        for field, v in values_from(org, scan(tuple(org))[0]).items():
+            if field not in ("id", "organization"):
+                values.setdefault(field, v)
+    orgs = resource.get("organizations")
+    if isinstance(orgs, list):
+        orgs = [o for o in orgs if isinstance(o, dict)]
+        if "organization" not in values:
+            names = [o["name"] for o in orgs if isinstance(o.get("name"), str)]
+            if names:
+                values["organization"] = ", ".join(names)
+        for o in orgs:
+            for field, v in values_from(o, scan(tuple(o))[0]).items():
+                if field not in ("id", "organization"):
+                    values.setdefault(field, v)
+    for field, v in values_from(resource, fallback).items():
+        values.setdefault(field, v)
+    return values
+
+
+def compile_plan(resource):
+    """
+    Compile the field sources for resources shaped like this one.
+
+    Returns:
+        tuple: (steps, missing, checks) where steps lists (field, key, nested_key) in FIELDS
+        order (key None for a missing field, nested_key set for a value taken from the
+        organization dict), missing lists the missing fields, and checks lists the keys that
+        were skipped because they held dicts; or None for shapes normalize leaves to resolve().
+    """
+    if "organizations" in resource:
+        return None
+    primary, fallback = scan(tuple(resource))
+    sources = {}
+    checks = []
+
+    def pick(field, keys):
+        # The first usable key; skipped keys must still hold dicts for the plan to apply
+        for k in keys:
+            if usable(field, resource[k]):
+                sources[field] = (k, None)
+                return
+            checks.append(k)
+
+    for field, keys in primary.items():
+        pick(field, keys)
+    org = resource.get("organization")
+    if isinstance(org, dict):
+        if "organization" not in sources and "name" in org:
+            sources["organization"] = ("organization", "name")
+        for field, keys in scan(tuple(org))[0].items():
+            if field in ("id", "organization") or field in sources:
+                continue
+            if not all(usable(field, org[k]) for k in keys):
+                return None
+            sources[field] = ("organization", keys[0])
+    for field, keys in fallback.items():
+        if field not in sources:
+            pick(field, keys)
+    steps = [(f,) + sources.get(f, (None, None)) for f in FIELDS]
+    return steps, [f for f in FIELDS if f not in sources], checks
+
+
+# Compiled plans, keyed by the resource's keys and its organization dict's keys.
+# LLM output comes in a handful of shapes, so almost every resource reuses a plan.
+plans = {}
+
+
+def normalize(resource):
+    """
+    Normalize a resource dict to the standard fields.
+
+    Returns:
+        tuple: (record, missing) where record maps each of FIELDS to a value and
+        missing is the list of fields that were not found.
+    """
+    org = resource.get("organization")
+    shape = (tuple(resource), tuple(org) if type(org) is dict else None)
+    try:
+        p = plans[shape]
+    except KeyError:
+        p = plans[shape] = compile_plan(resource)
+    if p is not None:
+        steps, missing, checks = p
+        record = {}
+        for field, k, nested in steps:
+            if k is None:
+                record[field] = DEFAULTS.get(field)
+                continue
+            v = resource[k] if nested is None else resource[k][nested]
+            if type(v) is dict:
+                if field != "address":
+                    break
+                v = location(v)
+            record[field] = v
+        else:
+            if not checks or all(type(resource[k]) is dict for k in checks):
+                return record, list(missing)
+
+    # Shapes the plan does not cover: value types differ from the plan's, or an organizations list
+    values = resolve(resource)
+    record = {}
+    missing = []
+    for field in FIELDS:
+        if field in values:
+            record[field] = values[field]
+        else:
+            record[field] = DEFAULTS.get(field)
+            missing.append(field)
+    return record, missing
+
+
+def normalize_all(resources):
+    """
+    Normalize a resource list, keeping "dup" links.
+
+    Returns:
+        tuple: (records, errors) where errors lists {"index", "id", "missing"} for every
+        resource with fields that were not found.
+    """
+    records = []
+    errors = []
+    for i, r in enumerate(resources):
+        record, missing = normalize(r)
+        if "dup" in r:
+            record["dup"] = r["dup"]
+        if missing:
+            errors.append({"index": i, "id": r.get("id"), "missing": missing})
+        records.append(record)
+    return records, errors
+
+
+def get_field(field, resource):
+    """
+    Return one standard field of a resource, or None if it is not found.
+    """
+    record, missing = normalize(resource)
+    return None if field in missing else record[field]
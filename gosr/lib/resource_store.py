@@ -0,0 +1,274 @@
+"""
+resource_store.py
+
+SQLite store for the flat resource lists (resources.db in the project directory).
+
+The raw list s2r collects (resources-raw.json) and the normalized list raw2resources makes of
+it (resources.json) are kept in separate tables, raw_resources and resources, so a reader
+always gets the stage it asks for. Each resource is one row keyed by its id, with the fields
+scripts filter on (program, organization, website, url_valid, dup and the solution node it
+was first found for) in indexed columns and the full resource dict as JSON. Stages upsert
+just the resources they add or change instead of rewriting the whole list:
+
+    - s2r upserts each new resource into raw_resources as it is found, so the table is its
+      checkpoint, and exports resources-raw.json once at the end of the run.
+    - raw2resources, dedup_resources and recheck_resource_urls upsert the resources they normalize,
+      mark or fix into resources, and export resources.json for compatibility with existing tools.
+    - Consumers call load_resource_list(path) (or load_resource_list(path, "resources-raw.json")),
+      which reads that list's table and falls back to the JSON file while the table is empty,
+      e.g. for projects made before the store. Scripts that write a whole list use
+      save_resource_list, which writes the JSON file and the table together.
+
+Each table records when it was last written. A JSON file written after that, by a script that
+does not use the store or by hand, is newer than its table, and load_resource_list re-imports
+it, as resource_index.load_index rebuilds r.index.json from a newer r.json.
+
+import_json/export_json read and write the existing resources.json / resources-raw.json format.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from gosr.lib.r_stats import get_program_value, get_organization_value
+from gosr.lib.resource_registry import first_value, website_keys
+
+STORE_FILENAME = "resources.db"
+
+# The table holding each stage's list, by the JSON file it is exported to
+tables = {"resources.json": "resources", "resources-raw.json": "raw_resources"}
+
+schema = """
+CREATE TABLE IF NOT EXISTS {table} (
+    id INTEGER PRIMARY KEY,
+    program TEXT,
+    organization TEXT,
+    website TEXT,
+    url_valid TEXT,
+    dup INTEGER,
+    solution_id TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS {table}_program ON {table} (program);
+CREATE INDEX IF NOT EXISTS {table}_organization ON {table} (organization);
+CREATE INDEX IF NOT EXISTS {table}_website ON {table} (website);
+CREATE INDEX IF NOT EXISTS {table}_url_valid ON {table} (url_valid);
+CREATE INDEX IF NOT EXISTS {table}_dup ON {table} (dup);
+CREATE INDEX IF NOT EXISTS {table}_solution_id ON {table} (solution_id);
+CREATE TABLE IF NOT EXISTS written (name TEXT PRIMARY KEY, at REAL NOT NULL);
+"""
+
+# Columns query() can filter on
+columns = ["id", "program", "organization", "website", "url_valid", "dup", "solution_id"]
+
+
+def text_value(v):
+    """
+    Return v if it is a string, else None (nested or missing values are not indexed).
+    """
+    return v if isinstance(v, str) else None
+
+
+class ResourceStore:
+    """
+    SQLite-backed resource list: the normalized list by default, or the raw one with
+    table="raw_resources". Safe to share between threads.
+    """
+
+    def __init__(self, filename, table="resources"):
+        if table not in tables.values():
+            raise ValueError(f"Unknown resource table {table!r}; tables are {list(tables.values())}")
+        self.filename = filename
+        self.table = table
+        self.lock = threading.RLock()
+        self.db = sqlite3.connect(filename, check_same_thread=False)
+        self.db.executescript(schema.format(table=table))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        with self.lock:
+            self.db.commit()
+            self.db.close()
+
+    def row(self, resource, solution_id=None):
+        """
+        Return the column values for a resource.
+        """
+        url_valid = resource.get("url_valid")
+        return (
+            resource["id"],
+            text_value(get_program_value(resource)),
+            text_value(get_organization_value(resource)),
+            text_value(first_value(resource, website_keys)),
+            None if url_valid is None else json.dumps(url_valid),
+            resource.get("dup"),
+            solution_id,
+            json.dumps(resource),
+        )
+
+    def upsert_many(self, resources, solution_id=None):
+        """
+        Insert or update resources by id in one transaction. The solution id is kept
+        from the first insert when an update does not give one.
+        """
+        with self.lock, self.db:
+            self.db.executemany(
+                f"""
+                INSERT INTO {self.table} (id, program, organization, website, url_valid, dup, solution_id, data)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (id) DO UPDATE SET
+                    program = excluded.program,
+                    organization = excluded.organization,
+                    website = excluded.website,
+                    url_valid = excluded.url_valid,
+                    dup = excluded.dup,
+                    solution_id = COALESCE(excluded.solution_id, {self.table}.solution_id),
+                    data = excluded.data
+                """,
+                [self.row(r, solution_id) for r in resources],
+            )
+            self.touch()
+
+    def replace_all(self, resources):
+        """
+        Replace the whole list with the given resources in one transaction, keeping the
+        solution ids of the resources that stay.
+        """
+        with self.lock, self.db:
+            self.db.execute(f"DELETE FROM {self.table} WHERE id NOT IN (SELECT value FROM json_each(?))",
+                            (json.dumps([r["id"] for r in resources]),))
+            self.upsert_many(resources)
+
+    def upsert(self, resource, solution_id=None):
+        """
+        Insert or update one resource by id.
+        """
+        self.upsert_many([resource], solution_id)
+
+    def get(self, id):
+        """
+        Return the resource with the given id, or None.
+        """
+        with self.lock:
+            row = self.db.execute(f"SELECT data FROM {self.table} WHERE id = ?", (id,)).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def resolve(self, id):
+        """
+        Return the resource with the given id, following "dup" links.
+        """
+        r = self.get(id)
+        seen = set()
+        while r is not None and "dup" in r and r["dup"] not in seen:
+            seen.add(r["id"])
+            r = self.get(r["dup"])
+        return r
+
+    def query(self, **where):
+        """
+        Return the resources whose columns equal the given values, in id order,
+        e.g. query(website="https://example.org") or query(url_valid=False, dup=None).
+        """
+        unknown = set(where) - set(columns)
+        if unknown:
+            raise ValueError(f"Cannot query on {', '.join(sorted(unknown))}; columns are {columns}")
+        clauses, params = [], []
+        for k, v in where.items():
+            if k == "url_valid" and v is not None:
+                v = json.dumps(v)
+            if v is None:
+                clauses.append(f"{k} IS NULL")
+            else:
+                clauses.append(f"{k} = ?")
+                params.append(v)
+        sql = f"SELECT data FROM {self.table}"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        with self.lock:
+            rows = self.db.execute(sql + " ORDER BY id", params).fetchall()
+        return [json.loads(r[0]) for r in rows]
+
+    def all(self):
+        """
+        Return every resource, in id order.
+        """
+        return self.query()
+
+    def touch(self, at=None):
+        """
+        Record that the table was written at the given time (default now).
+        """
+        with self.lock, self.db:
+            self.db.execute("INSERT OR REPLACE INTO written (name, at) VALUES (?, ?)",
+                            (self.table, time.time() if at is None else at))
+
+    def written_at(self):
+        """
+        Return when the table was last written, or None if that was not recorded.
+        """
+        with self.lock:
+            row = self.db.execute("SELECT at FROM written WHERE name = ?", (self.table,)).fetchone()
+        return None if row is None else row[0]
+
+    def count(self):
+        with self.lock:
+            return self.db.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+    def import_json(self, filename):
+        """
+        Upsert every resource in a resources.json-style file. Returns the number imported.
+        """
+        with open(filename, "r", encoding='utf-8') as f:
+            resources = json.load(f)
+        self.upsert_many(resources)
+        return len(resources)
+
+    def export_json(self, filename):
+        """
+        Write every resource to a resources.json-style file.
+        """
+        with open(filename, "w", encoding='utf-8') as f:
+            json.dump(self.all(), f)
+        # The export holds what the table does, so it is not newer than it
+        self.touch(os.path.getmtime(filename))
+
+
+def store_filename(path):
+    return os.path.join(path, STORE_FILENAME)
+
+
+def load_resource_list(path, filename="resources.json"):
+    """
+    Return one of the project's resource lists: resources.json's (the default) or
+    resources-raw.json's. It is read from its table in resources.db, or from the JSON file
+    while the table is empty. A JSON file written since the table was is re-imported first.
+    """
+    json_path = os.path.join(path, filename)
+    if os.path.exists(store_filename(path)):
+        with ResourceStore(store_filename(path), tables[filename]) as store:
+            if store.count():
+                if not os.path.exists(json_path) or os.path.getmtime(json_path) <= (store.written_at() or 0):
+                    return store.all()
+                with open(json_path, "r", encoding='utf-8') as f:
+                    resources = json.load(f)
+                store.replace_all(resources)
+                return resources
+    with open(json_path, "r", encoding='utf-8') as f:
+        return json.load(f)
+
+
+def save_resource_list(path, resources, filename="resources.json"):
+    """
+    Write a whole resource list to its JSON file and replace its table in resources.db.
+    """
+    with open(os.path.join(path, filename), "w", encoding='utf-8') as f:
+        json.dump(resources, f)
+    with ResourceStore(store_filename(path), tables[filename]) as store:
+        store.replace_all(resources)
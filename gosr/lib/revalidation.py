@@ -0,0 +1,141 @@
+"""
+revalidation.py
+
+Incremental revalidation of resource websites, most stale first, within a budget.
+
+Rechecking every link before each publish probes thousands of URLs that have not changed.
+Instead, schedule() ranks the resources' websites by how much a recheck is worth and
+revalidate() probes them in that order until a request or time budget is spent, so a daily
+run keeps link health current at a small, bounded cost. The priority of a URL is:
+
+    - its age: days since url-cache.db last checked it (never_checked_days if it never was),
+    - plus failure_bonus days per recent consecutive failure (up to max_failures), so a link
+      that just failed, possibly transiently, is confirmed or cleared soon,
+    - multiplied by dead_weight once it has failed max_failures times in a row, so links that
+      are gone do not crowd out live ones,
+    - multiplied by linked_weight when the resource is linked in r.json.
+
+Being linked in r.json stands in for being published: the Google Maps CSVs (r2google-maps) and
+WP Go Maps markers (wp-go-pro) are both built from the linked resources, but the export
+outputs themselves are not read, so a resource dropped by an exporter (e.g. one without
+coordinates) or a stale export still counts as linked.
+
+Usage:
+    plan = schedule(resource_list, cache, linked_resources(resource_list, index))
+    checked = revalidate(resource_list, plan, URLValidator(cache=cache), max_requests=500, max_seconds=300)
+"""
+
+import time
+
+from gosr.lib.url_cache import DAY
+from gosr.lib.url_canonical import is_placeholder_url
+
+never_checked_days = 365
+failure_bonus = 7
+max_failures = 5
+dead_weight = 0.25
+linked_weight = 3
+
+
+def priority(entry, linked, now=None):
+    """
+    Return the revalidation priority of a URL.
+
+    Args:
+        entry (dict): The URL's url-cache.db entry from URLCache.last_checked, or None.
+        linked (bool): Whether the resource is linked in r.json.
+        now (float): Current time (default time.time()).
+
+    Returns:
+        float: Higher is more urgent.
+    """
+    if entry is None:
+        score = never_checked_days
+    else:
+        score = ((time.time() if now is None else now) - entry["checked_at"]) / DAY
+        score += failure_bonus * min(entry["failures"], max_failures)
+        if entry["failures"] >= max_failures:
+            score *= dead_weight
+    return score * linked_weight if linked else score
+
+
+def linked_resources(resource_list, index):
+    """
+    Return the ids of the resources linked in r.json (via the resource index), with "dup"
+    links followed to the resource that is actually shown.
+    """
+    by_id = {r["id"]: r for r in resource_list if "id" in r}
+    linked = set()
+    for rid in index.by_resource:
+        seen = set()
+        while rid in by_id and "dup" in by_id[rid] and rid not in seen:
+            seen.add(rid)
+            rid = by_id[rid]["dup"]
+        linked.add(rid)
+    return linked
+
+
+def schedule(resource_list, cache, linked, now=None):
+    """
+    Rank the resources' websites for revalidation.
+
+    Args:
+        resource_list (list): Resources, as in resources.json.
+        cache (URLCache): Where the last check of each URL is recorded.
+        linked (set): Ids of the resources linked in r.json (see linked_resources).
+        now (float): Current time (default time.time()).
+
+    Returns:
+        list: (priority, resource index) pairs, most urgent first. Duplicates, resources
+        without a website and placeholder websites are left out.
+    """
+    now = time.time() if now is None else now
+    plan = []
+    for i, r in enumerate(resource_list):
+        url = r.get("website")
+        if "dup" in r or type(url) is not str or not url or is_placeholder_url(url):
+            continue
+        plan.append((priority(cache.last_checked(url), r.get("id") in linked, now), i))
+    plan.sort(key=lambda p: -p[0])
+    return plan
+
+
+def revalidate(resource_list, plan, validator, max_requests=None, max_seconds=None, batch_size=50, on_result=None):
+    """
+    Recheck websites in plan order, a batch at a time, until the plan or the budget runs out.
+    A batch is only started while budget remains, so a run can overshoot by at most one batch.
+    Each checked resource's "url_valid" is set, and its website corrected when the check
+    succeeded at another URL (e.g. the site's root).
+
+    Args:
+        resource_list (list): Resources, updated in place.
+        plan (list): (priority, resource index) pairs from schedule().
+        validator (URLValidator): Runs the checks; its cache should not skip fresh entries.
+        max_requests (int): Requests to send at most (None for no limit).
+        max_seconds (float): Seconds to run at most (None for no limit).
+        batch_size (int): URLs checked concurrently per batch.
+        on_result (callable): Passed on to URLValidator.run.
+
+    Returns:
+        list: Indexes of the resources that were checked, in plan order.
+    """
+    start = time.perf_counter()
+    checked = []
+    pos = 0
+    while pos < len(plan):
+        size = batch_size
+        if max_requests is not None:
+            size = min(size, max_requests - validator.probed)
+        if size <= 0 or (max_seconds is not None and time.perf_counter() - start >= max_seconds):
+            break
+        batch = [i for _, i in plan[pos:pos + size]]
+        pos += size
+        results = validator.run([resource_list[i]["website"] for i in batch], on_result=on_result)
+        for i in batch:
+            r = resource_list[i]
+            ret_url = results[r["website"]]
+            r["url_valid"] = ret_url is not None
+            if ret_url is not None:
+                r["website"] = ret_url
+        checked += batch
+    return checked
@@ -0,0 +1,91 @@
+"""
+solution_clusters.py
+
+Groups equivalent solution nodes so s2r researches each solution once.
+
+o2s generates solutions per obstacle, so the same idea ("Public-Private Partnerships",
+"Community Tech Workshops" / "Local Tech Workshops") appears under many obstacles. The
+resources prompt only depends on the solution itself, so s2r can make one resource call per
+cluster and link the resources it finds to every member.
+
+Solution titles are normalized (see gosr.lib.dedup.normalize_text), generic words such as
+"community" and "local" dropped and simple plurals folded. Candidates are blocked with the
+same MinHash/LSH bands as resource deduplication, and pairs whose title similarity reaches
+the threshold are merged with union-find. Each cluster is represented by its first node in
+tree order, so the representative is always researched before the other members.
+
+Only titles are compared: solutions under different obstacles with one title but different
+descriptions are merged too, so s2r clusters only when cluster_solutions is set.
+"""
+
+from collections import defaultdict
+
+from gosr.lib.dedup import UnionFind, bands, minhash, normalize_text, num_perm, shingles, similarity
+
+default_threshold = 0.9
+
+# Words that do not change which resources implement a solution
+generic_words = {
+    "a", "an", "and", "for", "in", "of", "on", "the", "to", "with",
+    "local", "community", "communities", "neighborhood", "neighbourhood",
+    "program", "programs", "initiative", "initiatives",
+}
+
+
+def solution_text(data):
+    """
+    Return the normalized title of a solution node's data (a {"title", "description"} dict or a string).
+    """
+    title = data.get("title") if isinstance(data, dict) else data
+    kept = []
+    for w in normalize_text(title if isinstance(title, str) else "").split():
+        if w in generic_words:
+            continue
+        if len(w) > 3 and w.endswith("s") and not w.endswith("ss"):
+            w = w[:-1]
+        kept.append(w)
+    return " ".join(kept)
+
+
+def cluster_solutions(nodes, threshold=default_threshold):
+    """
+    Group solution nodes with equivalent titles.
+
+    Args:
+        nodes (list): Solution nodes (treelib Nodes), in tree order.
+        threshold (float): Minimum title similarity for two solutions to be merged.
+
+    Returns:
+        list: Clusters as lists of nodes in the given order; singletons included.
+    """
+    texts = [solution_text(n.data) for n in nodes]
+    buckets = defaultdict(list)
+    rows = num_perm // bands
+    for i, t in enumerate(texts):
+        if not t:
+            continue
+        buckets[("text", t)].append(i)
+        sig = minhash(shingles(t))
+        if sig is not None:
+            for b in range(bands):
+                buckets[("band", b, tuple(sig[b * rows:(b + 1) * rows]))].append(i)
+
+    uf = UnionFind(len(nodes))
+    for members in buckets.values():
+        for x in range(1, len(members)):
+            i, j = members[0], members[x]
+            # Every member is compared with the bucket's first; exact-text buckets always merge
+            if uf.find(i) != uf.find(j) and similarity(texts[i], texts[j], threshold) >= threshold:
+                uf.union(i, j)
+
+    clusters = defaultdict(list)
+    for i, n in enumerate(nodes):
+        clusters[uf.find(i)].append(n)
+    return list(clusters.values())
+
+
+def representatives(clusters):
+    """
+    Return {node identifier: representative node} for every node that is not its cluster's first.
+    """
+    return {n.identifier: c[0] for c in clusters for n in c[1:]}
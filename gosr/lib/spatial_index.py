@@ -0,0 +1,215 @@
+"""
+spatial_index.py
+
+Grid spatial index over geocoded resources, with proximity queries and per-zoom marker
+clustering for the map exports.
+
+SpatialIndex buckets points (id, lat, lng) into grid cells of cell_deg degrees. A query
+visits only the cells its bounding box overlaps and then tests the points in them exactly:
+
+    - within_radius(lat, lng, km): great-circle (haversine) distance,
+    - within_bbox(south, west, north, east),
+    - within_polygon(geometry): a Polygon/MultiPolygon geometry dict (holes respected), e.g.
+      a neighbourhood's WKT parsed by gosr.lib.wkt.parse_wkt (None, an EMPTY geometry,
+      contains nothing),
+    - near_polygon(geometry, km): inside the polygon or within km of its boundary
+      ("resources within 2 km of neighbourhood X").
+
+cluster(zoom) groups the points into map clusters the way client-side marker clusterers do:
+by a grid of cell_px screen pixels at that Web Mercator zoom level. Each cluster has its
+centroid, count and member ids, so a map page can be sent one marker per cluster per zoom
+instead of every resource.
+
+Usage:
+    index = SpatialIndex.from_resources(resource_list)   # resources with "lat"/"lng"
+    ids = index.near_polygon(parse_wkt(wkt_text), km=2)
+    levels = {z: index.cluster(z) for z in range(8, 16)}
+"""
+
+import math
+
+from gosr.lib.wkt import polygons as polygon_list
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    """
+    Return the great-circle distance between two points, in km.
+    """
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lng2 - lng1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def in_ring(x, y, ring):
+    """
+    Return True if (x, y) is inside a closed ring of [x, y] positions (even-odd rule).
+    """
+    inside = False
+    j = len(ring) - 1
+    for i in range(len(ring)):
+        xi, yi = ring[i][0], ring[i][1]
+        xj, yj = ring[j][0], ring[j][1]
+        if (yi > y) != (yj > y) and x < (xj - xi) * (y - yi) / (yj - yi) + xi:
+            inside = not inside
+        j = i
+    return inside
+
+
+def in_polygon(x, y, polygon):
+    """
+    Return True if (x, y) is inside a polygon (outer ring, then holes).
+    """
+    return in_ring(x, y, polygon[0]) and not any(in_ring(x, y, hole) for hole in polygon[1:])
+
+
+def segment_km(lat, lng, a, b):
+    """
+    Return the distance in km from a point to the segment a-b ([lng, lat] positions), on a
+    local equirectangular projection (accurate to well under 1% over a few km).
+    """
+    kx = KM_PER_DEGREE * math.cos(math.radians(lat))
+    ax, ay = (a[0] - lng) * kx, (a[1] - lat) * KM_PER_DEGREE
+    bx, by = (b[0] - lng) * kx, (b[1] - lat) * KM_PER_DEGREE
+    dx, dy = bx - ax, by - ay
+    length2 = dx * dx + dy * dy
+    t = 0.0 if length2 == 0 else max(0.0, min(1.0, -(ax * dx + ay * dy) / length2))
+    return math.hypot(ax + t * dx, ay + t * dy)
+
+
+def bounds(polygons):
+    """
+    Return (south, west, north, east) of a list of polygons.
+    """
+    xs = [p[0] for polygon in polygons for p in polygon[0]]
+    ys = [p[1] for polygon in polygons for p in polygon[0]]
+    return min(ys), min(xs), max(ys), max(xs)
+
+
+def mercator_px(lat, lng, zoom, tile_size=256):
+    """
+    Return the Web Mercator world pixel (x, y) of a point at a zoom level.
+    """
+    scale = tile_size * 2 ** zoom
+    s = min(max(math.sin(math.radians(lat)), -0.9999), 0.9999)
+    return (lng + 180) / 360 * scale, (0.5 - math.log((1 + s) / (1 - s)) / (4 * math.pi)) * scale
+
+
+class SpatialIndex:
+    """
+    Uniform grid of points for radius, bounding box and polygon queries.
+    """
+
+    def __init__(self, cell_deg=0.05):
+        self.cell_deg = cell_deg
+        self.cells = {}
+        self.points = {}
+
+    @classmethod
+    def from_resources(cls, resources, cell_deg=0.05):
+        """
+        Index the resources that have "lat" and "lng", by id; duplicates ("dup") are left out.
+        """
+        index = cls(cell_deg)
+        for r in resources:
+            if "lat" in r and "lng" in r and "dup" not in r:
+                index.add(r["id"], r["lat"], r["lng"])
+        return index
+
+    def cell(self, lat, lng):
+        return math.floor(lat / self.cell_deg), math.floor(lng / self.cell_deg)
+
+    def add(self, id, lat, lng):
+        self.points[id] = (lat, lng)
+        self.cells.setdefault(self.cell(lat, lng), []).append(id)
+
+    def __len__(self):
+        return len(self.points)
+
+    def candidates(self, south, west, north, east):
+        """
+        Yield (id, lat, lng) for the points in the cells overlapping a bounding box.
+        """
+        r0, c0 = self.cell(south, west)
+        r1, c1 = self.cell(north, east)
+        if (r1 - r0 + 1) * (c1 - c0 + 1) > len(self.cells):
+            cells = [ids for (r, c), ids in self.cells.items() if r0 <= r <= r1 and c0 <= c <= c1]
+        else:
+            cells = [self.cells[(r, c)] for r in range(r0, r1 + 1) for c in range(c0, c1 + 1) if (r, c) in self.cells]
+        for ids in cells:
+            for id in ids:
+                lat, lng = self.points[id]
+                yield id, lat, lng
+
+    def within_bbox(self, south, west, north, east):
+        """
+        Return the ids of the points inside a bounding box.
+        """
+        return [id for id, lat, lng in self.candidates(south, west, north, east)
+                if south <= lat <= north and west <= lng <= east]
+
+    def within_radius(self, lat, lng, km):
+        """
+        Return [(id, distance in km)] for the points within km of (lat, lng), nearest first.
+        """
+        dlat = km / KM_PER_DEGREE
+        dlng = km / (KM_PER_DEGREE * max(math.cos(math.radians(lat)), 1e-6))
+        found = []
+        for id, plat, plng in self.candidates(lat - dlat, lng - dlng, lat + dlat, lng + dlng):
+            d = haversine_km(lat, lng, plat, plng)
+            if d <= km:
+                found.append((id, d))
+        found.sort(key=lambda f: f[1])
+        return found
+
+    def within_polygon(self, geometry):
+        """
+        Return the ids of the points inside a Polygon or MultiPolygon geometry dict (or None).
+        """
+        polygons = polygon_list(geometry)
+        if not polygons:
+            return []
+        return [id for id, lat, lng in self.candidates(*bounds(polygons))
+                if any(in_polygon(lng, lat, polygon) for polygon in polygons)]
+
+    def near_polygon(self, geometry, km):
+        """
+        Return the ids of the points inside a Polygon or MultiPolygon geometry dict or within
+        km of its boundary.
+        """
+        polygons = polygon_list(geometry)
+        if not polygons:
+            return []
+        south, west, north, east = bounds(polygons)
+        dlat = km / KM_PER_DEGREE
+        dlng = km / (KM_PER_DEGREE * max(math.cos(math.radians(max(abs(south), abs(north)))), 1e-6))
+        found = []
+        for id, lat, lng in self.candidates(south - dlat, west - dlng, north + dlat, east + dlng):
+            if any(in_polygon(lng, lat, polygon) for polygon in polygons) or any(
+                segment_km(lat, lng, ring[i - 1], ring[i]) <= km
+                for polygon in polygons for ring in polygon for i in range(1, len(ring))
+            ):
+                found.append(id)
+        return found
+
+    def cluster(self, zoom, cell_px=60):
+        """
+        Group the points into markers for one zoom level, by a grid of cell_px screen pixels.
+
+        Returns:
+            list: {"lat", "lng", "count", "ids"} per cluster, the position being the members'
+            centroid; a cluster of one is a single resource's marker.
+        """
+        groups = {}
+        for id, (lat, lng) in self.points.items():
+            x, y = mercator_px(lat, lng, zoom)
+            groups.setdefault((int(x // cell_px), int(y // cell_px)), []).append(id)
+        clusters = []
+        for ids in groups.values():
+            lats = [self.points[id][0] for id in ids]
+            lngs = [self.points[id][1] for id in ids]
+            clusters.append({"lat": sum(lats) / len(ids), "lng": sum(lngs) / len(ids), "count": len(ids), "ids": ids})
+        return clusters
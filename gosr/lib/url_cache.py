@@ -0,0 +1,178 @@
+"""
+url_cache.py
+
+Persistent URL validation cache (url-cache.db in the project directory).
+
+Every URL the validator probes is recorded (keyed by gosr.lib.url_canonical.url_key) with its
+result (the working URL or None), the HTTP status, the final URL after redirects and when it
+was checked. Each origin (scheme://host[:port], the unit url_validator probes) is recorded
+too, with whether it could be reached at all. Entries are fresh for ttl seconds when the URL
+worked and negative_ttl seconds when it did not, so reruns only probe new or stale URLs, and
+URLs on an origin that recently refused connections are not probed again until that expires;
+http://x.org failing says nothing about https://x.org.
+
+Usage:
+    with URLCache(cache_filename(path), ttl=30 * DAY, negative_ttl=DAY) as cache:
+        URLValidator(cache=cache).run(urls)
+
+Configuration (config.yaml), via open_cache(path, config):
+    - url_cache_ttl_days: (Optional) Days a working URL is trusted before it is probed again (default 30).
+    - url_cache_negative_ttl_days: (Optional) Days a failed URL or unreachable origin is skipped (default 1).
+"""
+
+import os
+import sqlite3
+import threading
+import time
+
+from gosr.lib.url_canonical import canonical_url, domain_of, origin, url_key
+
+CACHE_FILENAME = "url-cache.db"
+DAY = 24 * 60 * 60
+
+default_ttl = 30 * DAY
+default_negative_ttl = DAY
+
+schema = """
+CREATE TABLE IF NOT EXISTS urls (
+    url TEXT PRIMARY KEY,
+    domain TEXT,
+    result TEXT,
+    status INTEGER,
+    final_url TEXT,
+    checked_at REAL NOT NULL,
+    failures INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS urls_domain ON urls (domain);
+CREATE TABLE IF NOT EXISTS origins (
+    origin TEXT PRIMARY KEY,
+    reachable INTEGER NOT NULL,
+    checked_at REAL NOT NULL
+);
+"""
+
+
+class URLCache:
+    """
+    SQLite-backed URL and origin validation results with TTLs. Safe to share between threads.
+    """
+
+    def __init__(self, filename, ttl=default_ttl, negative_ttl=default_negative_ttl):
+        self.filename = filename
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.lock = threading.RLock()
+        self.db = sqlite3.connect(filename, check_same_thread=False)
+        self.db.executescript(schema)
+        # Caches written before failures were counted
+        if "failures" not in [row[1] for row in self.db.execute("PRAGMA table_info(urls)")]:
+            self.db.execute("ALTER TABLE urls ADD COLUMN failures INTEGER NOT NULL DEFAULT 0")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        with self.lock:
+            self.db.commit()
+            self.db.close()
+
+    def fresh(self, ok, checked_at, now=None):
+        """
+        Return True if an entry checked at checked_at is still within its TTL.
+        """
+        age = (time.time() if now is None else now) - checked_at
+        return age < (self.ttl if ok else self.negative_ttl)
+
+    def get(self, url, now=None):
+        """
+        Return the fresh entry for a URL as {"result", "status", "final_url", "checked_at"}, or None.
+        """
+        with self.lock:
+            row = self.db.execute(
+                "SELECT result, status, final_url, checked_at FROM urls WHERE url = ?", (url_key(url),)
+            ).fetchone()
+        if row is None or not self.fresh(row[0] is not None, row[3], now):
+            return None
+        return {"result": row[0], "status": row[1], "final_url": row[2], "checked_at": row[3]}
+
+    def put(self, url, result, status=None, final_url=None, now=None):
+        """
+        Record the result of probing a URL (the working URL, or None), counting consecutive failures.
+        """
+        with self.lock:
+            self.db.execute(
+                """
+                INSERT INTO urls (url, domain, result, status, final_url, checked_at, failures)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (url) DO UPDATE SET
+                    domain = excluded.domain,
+                    result = excluded.result,
+                    status = excluded.status,
+                    final_url = excluded.final_url,
+                    checked_at = excluded.checked_at,
+                    failures = CASE WHEN excluded.result IS NULL THEN urls.failures + 1 ELSE 0 END
+                """,
+                (url_key(url), domain_of(url), result, status, final_url, time.time() if now is None else now,
+                 0 if result is not None else 1),
+            )
+
+    def last_checked(self, url):
+        """
+        Return {"result", "checked_at", "failures"} for a URL whether or not it is fresh, or None
+        if it was never checked.
+        """
+        with self.lock:
+            row = self.db.execute(
+                "SELECT result, checked_at, failures FROM urls WHERE url = ?", (url_key(url),)
+            ).fetchone()
+        return None if row is None else {"result": row[0], "checked_at": row[1], "failures": row[2]}
+
+    def origin_unreachable(self, url, now=None):
+        """
+        Return True if the URL's origin recently could not be reached.
+        """
+        with self.lock:
+            row = self.db.execute(
+                "SELECT reachable, checked_at FROM origins WHERE origin = ?", (origin(canonical_url(url)),)
+            ).fetchone()
+        return row is not None and not row[0] and self.fresh(False, row[1], now)
+
+    def put_origin(self, url, reachable, now=None):
+        """
+        Record whether the URL's origin could be reached.
+        """
+        with self.lock:
+            self.db.execute(
+                "INSERT OR REPLACE INTO origins (origin, reachable, checked_at) VALUES (?, ?, ?)",
+                (origin(canonical_url(url)), int(reachable), time.time() if now is None else now),
+            )
+
+    def commit(self):
+        with self.lock:
+            self.db.commit()
+
+    def count(self):
+        with self.lock:
+            return self.db.execute("SELECT COUNT(*) FROM urls").fetchone()[0]
+
+
+def cache_filename(path):
+    return os.path.join(path, CACHE_FILENAME)
+
+
+def open_cache(path, config=None, refresh=False):
+    """
+    Open the project's URL cache with the TTLs from config.yaml. With refresh, no entry is
+    fresh, so every URL is probed again (and the new results recorded).
+    """
+    config = config or {}
+    if refresh:
+        return URLCache(cache_filename(path), ttl=0, negative_ttl=0)
+    return URLCache(
+        cache_filename(path),
+        ttl=config.get("url_cache_ttl_days", default_ttl / DAY) * DAY,
+        negative_ttl=config.get("url_cache_negative_ttl_days", default_negative_ttl / DAY) * DAY,
+    )
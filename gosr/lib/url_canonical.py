@@ -0,0 +1,100 @@
+"""
+url_canonical.py
+
+Canonical forms of resource website URLs.
+
+LLM-produced websites vary in ways that do not change the page: "WWW.Example.org",
+"example.org/programs/", "https://example.org/programs?utm_source=x#top". canonical_url()
+gives the URL to probe: a scheme (http when missing; https is kept, since servers redirect
+http to https and not the other way), lower-case host without a default port, "/" for an
+empty path, no trailing slash on other paths, no tracking parameters and no fragment.
+url_key() also ignores the scheme and "www.", for cache keys and grouping, and origin()
+groups URLs that share a connection (scheme, host and port).
+"""
+
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+tracking_params = {"fbclid", "gclid", "dclid", "msclkid", "mc_cid", "mc_eid", "_ga", "igshid", "ref", "ref_src"}
+default_ports = {"http": "80", "https": "443"}
+
+
+# Text LLMs put in place of a website
+placeholders = [" ", "N/A", "Varies", "n/a", "TBD"]
+
+
+def is_placeholder_url(url):
+    """
+    Return True for obviously invalid or placeholder URLs.
+    """
+    return any(p in url for p in placeholders)
+
+
+def is_tracking(param):
+    return param.lower().startswith("utm_") or param.lower() in tracking_params
+
+
+def canonical_url(url):
+    """
+    Return the canonical form of a URL, as described above.
+    """
+    url = url.strip()
+    if "://" not in url:
+        url = "http://" + url.lstrip("/")
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").rstrip(".")
+    try:
+        port = parts.port
+    except ValueError:  # e.g. "example.org:abc"
+        port = None
+    if port is not None and str(port) == default_ports.get(scheme):
+        port = None
+    netloc = f"{host}:{port}" if port else host
+    path = parts.path or "/"
+    if path != "/":
+        path = path.rstrip("/") or "/"
+    query = urlencode([(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if not is_tracking(k)])
+    return urlunsplit((scheme, netloc, path, query, ""))
+
+
+def host_key(host):
+    """
+    Return a lower-case host without "www.".
+    """
+    host = host.lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+def domain_of(url):
+    """
+    Return the domain of a URL: its lower-case host without "www.".
+    """
+    return host_key(urlsplit(canonical_url(url)).hostname or "")
+
+
+def url_key(url):
+    """
+    Return the key of a URL for caching and deduplication: its canonical form without
+    scheme and "www.", so http/https and www variants of one page share a key.
+    """
+    parts = urlsplit(canonical_url(url))
+    netloc = host_key(parts.netloc)
+    return urlunsplit(("", netloc, parts.path, parts.query, ""))
+
+
+def origin(url):
+    """
+    Return the scheme://host[:port] a canonical URL is fetched from.
+    """
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def group_by_origin(urls):
+    """
+    Return {origin: [canonical URLs]} for the distinct canonical forms of urls.
+    """
+    groups = {}
+    for url in dict.fromkeys(canonical_url(u) for u in urls):
+        groups.setdefault(origin(url), []).append(url)
+    return groups
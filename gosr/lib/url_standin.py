@@ -0,0 +1,170 @@
+"""
+url_standin.py
+
+Local stand-in for the web, for testing and benchmarking URL validation offline.
+
+StandInServer starts one HTTP server per simulated site on 127.0.0.1, each on its own port,
+so every site is a separate origin as far as the validator is concerned. Pages simulate what
+resource websites do, by path (GETs get a short body, or its first byte with a 206 when
+they ask for "Range: bytes=0-0"):
+
+    /                   200
+    /ok, /<anything>    200
+    /slow/<ms>          200 after <ms> milliseconds
+    /redirect/<n>       a chain of n 302 redirects ending in 200
+    /no-head            405 to HEAD, 200 to GET
+    /head-forbidden     403 to HEAD, 200 to GET
+    /hang               no answer for hang_seconds (a timeout)
+    /missing            404
+
+A site created with rate_limit answers 429 once it has had that many requests in the last
+second. dead_url() gives a URL on a port nobody listens on (connection refused), and
+tls_url() an https URL on a plain HTTP port (the TLS handshake fails).
+
+Usage:
+    with StandInServer(sites=[Site(), Site(rate_limit=20)]) as server:
+        url = server.url(0, "/slow/100")
+"""
+
+import socket
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+
+class Site:
+    """
+    One simulated website's behaviour and request count.
+    """
+
+    def __init__(self, rate_limit=None, hang_seconds=30.0):
+        self.rate_limit = rate_limit
+        self.hang_seconds = hang_seconds
+        self.requests = 0
+        self.recent = deque()
+        self.lock = threading.Lock()
+
+    def admit(self):
+        """
+        Count a request; return False if it is over the rate limit.
+        """
+        now = time.monotonic()
+        with self.lock:
+            self.requests += 1
+            if self.rate_limit is None:
+                return True
+            while self.recent and now - self.recent[0] > 1.0:
+                self.recent.popleft()
+            if len(self.recent) >= self.rate_limit:
+                return False
+            self.recent.append(now)
+            return True
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive, as real servers do
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_HEAD(self):
+        self.respond(head=True)
+
+    def do_GET(self):
+        self.respond(head=False)
+
+    def send(self, status, location=None, head=True):
+        body = b""
+        if status == 200 and not head:
+            body = b"stand-in page"
+            if self.headers.get("Range") == "bytes=0-0":
+                status, body = 206, body[:1]
+        self.send_response(status)
+        if location is not None:
+            self.send_header("Location", location)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+
+    def respond(self, head):
+        site = self.server.site
+        if not site.admit():
+            return self.send(429)
+        parts = urlsplit(self.path).path.strip("/").split("/")
+        kind, arg = parts[0], parts[1] if len(parts) > 1 else None
+        if kind == "slow":
+            time.sleep(int(arg or 100) / 1000)
+        elif kind == "hang":
+            time.sleep(site.hang_seconds)
+        elif kind == "redirect" and int(arg or 0) > 0:
+            return self.send(302, f"/redirect/{int(arg) - 1}")
+        elif kind == "no-head" and head:
+            return self.send(405)
+        elif kind == "head-forbidden" and head:
+            return self.send(403)
+        elif kind == "missing":
+            return self.send(404)
+        self.send(200, head=head)
+
+
+class StandInServer:
+    """
+    A set of local simulated sites, each served on its own port by a background thread.
+    """
+
+    def __init__(self, sites=None):
+        self.sites = sites if sites is not None else [Site()]
+        self.servers = []
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def start(self):
+        for site in self.sites:
+            server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+            server.daemon_threads = True
+            server.block_on_close = False
+            server.site = site
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            self.servers.append(server)
+
+    def close(self):
+        for server in self.servers:
+            server.shutdown()
+            server.server_close()
+        self.servers = []
+
+    def url(self, site, path="/"):
+        """
+        Return the http URL of a path on the given site (its index in sites).
+        """
+        return f"http://127.0.0.1:{self.servers[site].server_address[1]}{path}"
+
+    def tls_url(self, site, path="/"):
+        """
+        Return an https URL on a site's plain HTTP port, so the TLS handshake fails.
+        """
+        return f"https://127.0.0.1:{self.servers[site].server_address[1]}{path}"
+
+    @staticmethod
+    def dead_url(path="/"):
+        """
+        Return a URL on a local port nobody is listening on.
+        """
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            port = s.getsockname()[1]
+        return f"http://127.0.0.1:{port}{path}"
+
+    def requests(self):
+        """
+        Return the total number of requests the sites have received.
+        """
+        return sum(site.requests for site in self.sites)
@@ -0,0 +1,222 @@
+"""
+url_validator.py
+
+Concurrent website checks for resource lists.
+
+Each URL is checked as recheck_resource_urls always has: it is valid if a HEAD request
+(following redirects) succeeds, and otherwise its site's root is used if that succeeds. Many
+servers refuse HEAD (405, 403, ...), so a refused HEAD is retried as a GET for the first
+byte only (Range: bytes=0-0) on the same pooled connection; any 2xx at the end of the
+redirects counts as success, and the URL at the end of the redirects is the working URL
+returned (and recorded). URLs are first canonicalized (gosr.lib.url_canonical) and grouped by origin; each
+origin's root is probed once, then its specific pages, over the same kept-alive
+connection, so DNS lookups and TLS handshakes are shared. When the root cannot be reached
+at all, none of that origin's pages are tried.
+
+The checks run on asyncio with one pooled httpx.AsyncClient, bounded by:
+
+    - concurrency: requests in flight overall (also the connection pool size),
+    - per_host: requests in flight to any one host, so large runs do not hammer one server,
+    - timeout: the total time for each request, redirects included (time spent waiting for a
+      free slot does not count), and connect_timeout for each connection.
+
+With a cache (gosr.lib.url_cache.URLCache), URLs with a fresh cached result are not probed,
+nor are URLs on an origin that recently could not be reached, and every probe is recorded
+with its status and final URL.
+
+Usage:
+    results = URLValidator(concurrency=64, per_host=4).run(urls)  # {url: final working url or None}
+"""
+
+import asyncio
+import time
+from urllib.parse import urlsplit
+
+import httpx
+
+from gosr.lib.url_canonical import canonical_url, group_by_origin
+
+# HEAD answers that usually mean "HEAD not supported" rather than "no such page"
+head_refused = {400, 403, 405, 406, 501}
+
+default_headers = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/102.0.0.0 Safari/537.36'
+}
+
+
+def is_success(status):
+    """
+    Return True for a 2xx status (redirects have already been followed).
+    """
+    return status is not None and 200 <= status < 300
+
+
+class URLValidator:
+    """
+    Checks many URLs concurrently with global and per-host limits.
+    """
+
+    def __init__(self, concurrency=64, per_host=4, timeout=10.0, connect_timeout=3.0, headers=None, transport=None, cache=None):
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.headers = headers or default_headers
+        self.transport = transport  # e.g. httpx.MockTransport in tests
+        self.cache = cache
+        self.probed = 0
+        self.cached = 0
+        self.latencies = []  # Seconds per request, slot waits excluded
+        self.final_urls = {}  # URL -> URL after redirects, for every URL probed
+
+    def client(self):
+        return httpx.AsyncClient(
+            headers=self.headers,
+            follow_redirects=True,
+            timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout),
+            limits=httpx.Limits(max_connections=self.concurrency, max_keepalive_connections=self.concurrency),
+            transport=self.transport,
+        )
+
+    async def head(self, client, url, host_limit):
+        """
+        Send a HEAD request within the limits and return the response.
+        """
+        async with self.global_limit, host_limit:
+            # The total timeout starts once the request is allowed to run, not while it waits its turn
+            start = time.perf_counter()
+            try:
+                return await asyncio.wait_for(client.head(url), self.timeout)
+            finally:
+                self.latencies.append(time.perf_counter() - start)
+
+    async def ranged_get(self, client, url, host_limit):
+        """
+        Send a GET for the first byte within the limits and return the response.
+        The byte is read so the connection can go back to the pool.
+        """
+        async def first_byte():
+            async with client.stream("GET", url, headers={"Range": "bytes=0-0"}) as response:
+                async for _ in response.aiter_raw():
+                    break
+                return response
+
+        async with self.global_limit, host_limit:
+            start = time.perf_counter()
+            try:
+                return await asyncio.wait_for(first_byte(), self.timeout)
+            finally:
+                self.latencies.append(time.perf_counter() - start)
+
+    async def fetch(self, client, url, host_limit):
+        """
+        Probe one URL. Returns (status, final_url, reachable): status and final_url are None
+        when no response arrived, and reachable is False when no connection could be made.
+        """
+        self.probed += 1
+        try:
+            response = await self.head(client, url, host_limit)
+            if response.status_code in head_refused:
+                self.probed += 1
+                response = await self.ranged_get(client, url, host_limit)
+            self.final_urls[url] = str(response.url)
+            return response.status_code, str(response.url), True
+        except (httpx.ConnectError, httpx.ConnectTimeout):
+            return None, None, False
+        except (httpx.HTTPError, httpx.InvalidURL, asyncio.TimeoutError, ValueError):
+            return None, None, True
+
+    def record(self, url, result, status=None, final_url=None):
+        if self.cache is not None:
+            self.cache.put(url, result, status, final_url)
+
+    async def check_origin(self, client, origin, urls, report):
+        """
+        Probe an origin's root once, then each of its URLs; report(url, result) for each.
+        """
+        root = origin + "/"
+        host = urlsplit(origin).hostname
+        host_limit = self.host_limits.setdefault(host, asyncio.Semaphore(self.per_host))
+        entry = self.cache.get(root) if self.cache is not None else None
+        if entry is not None:
+            root_ok, reachable = entry["result"] is not None, True
+        else:
+            status, final_url, reachable = await self.fetch(client, root, host_limit)
+            root_ok = is_success(status)
+            self.record(root, final_url if root_ok else None, status, final_url)
+            if self.cache is not None:
+                self.cache.put_origin(root, reachable)
+        if entry is not None:
+            fallback = entry["result"]
+        else:
+            fallback = final_url if root_ok else None
+
+        async def page(url):
+            if url == root:
+                result = fallback
+            elif not reachable:
+                result = None
+                self.record(url, None)
+            else:
+                status, final_url, _ = await self.fetch(client, url, host_limit)
+                result = final_url if is_success(status) else fallback
+                self.record(url, result, status, final_url)
+            report(url, result)
+
+        await asyncio.gather(*(page(url) for url in urls))
+
+    async def check_all(self, urls, on_result=None):
+        """
+        Check each distinct URL once, by its canonical form.
+
+        Args:
+            urls (iterable): URLs to check.
+            on_result (callable): Optional on_result(url, result, done, total), called as each
+                canonical URL's check finishes.
+
+        Returns:
+            dict: {url: working url or None} for every URL given; the working url is where
+            the canonical URL (or, failing that, its site's root) ends up after redirects.
+        """
+        canonical = {}
+        for url in urls:
+            try:
+                canonical[url] = canonical_url(url)
+            except ValueError:
+                canonical[url] = None
+        self.global_limit = asyncio.Semaphore(self.concurrency)
+        self.host_limits = {}
+        checked = {}
+        total = len(set(c for c in canonical.values() if c is not None))
+
+        def report(url, result):
+            checked[url] = result
+            if on_result is not None:
+                on_result(url, result, len(checked), total)
+
+        to_probe = []
+        for url in dict.fromkeys(c for c in canonical.values() if c is not None):
+            if self.cache is not None:
+                entry = self.cache.get(url)
+                if entry is not None or self.cache.origin_unreachable(url):
+                    self.cached += 1
+                    report(url, entry["result"] if entry is not None else None)
+                    continue
+            to_probe.append(url)
+
+        async with self.client() as client:
+            await asyncio.gather(*(
+                self.check_origin(client, o, group, report) for o, group in group_by_origin(to_probe).items()
+            ))
+        if self.cache is not None:
+            self.cache.commit()
+        return {url: checked.get(c) for url, c in canonical.items()}
+
+    def run(self, urls, on_result=None):
+        """
+        Check URLs from synchronous code; see check_all.
+        """
+        start = time.perf_counter()
+        results = asyncio.run(self.check_all(urls, on_result))
+        self.elapsed = time.perf_counter() - start
+        return results
@@ -11,6 +11,9 @@ import time
 import requests
 import re
 import hashlib
+import threading
+import functools
+from collections import Counter
 
 def setup_openai():
     """
@@ -62,6 +65,42 @@ cache4 = {}
 # Initialize a tree structure to store hierarchical data
 tree = Tree()
 
+# Guards the shared tree (and any resource list built alongside it) when stages run in worker threads
+tree_lock = threading.RLock()
+
+# Shared rate limiter for OpenAI API calls: at most one call starts every min_call_interval seconds,
+# across all threads of all stages running in this process
+min_call_interval = 1.0
+rate_lock = threading.Lock()
+next_call_time = 0.0
+cache_lock = threading.Lock()
+
+# Counters read by gosr.lib.progress for the live status line
+call_stats = {"calls": 0, "in_flight": 0, "cache_hits": 0}
+stats_lock = threading.Lock()
+
+def wait_for_rate_limit():
+    """
+    Block until the shared rate limiter allows the next API call to start.
+    """
+    global next_call_time
+    with rate_lock:
+        now = time.monotonic()
+        if next_call_time > now:
+            time.sleep(next_call_time - now)
+            now = next_call_time
+        next_call_time = now + min_call_interval
+
+def save_cache4(path):
+    """
+    Write the LLM response cache to cache4.json in the given directory.
+    Safe to call from several threads while other threads keep adding entries.
+    """
+    with cache_lock:
+        snapshot = dict(cache4)
+        with open(os.path.join(path, "cache4.json"), "w", encoding="utf-8") as f:
+            json.dump(snapshot, f)
+
 def next_number(curr_parent_name):
     """
     Generate the next available child number for a given parent node in the tree.
@@ -96,18 +135,19 @@ contributing_factors = [
     "obstacle", "contributing_factors", "Contributing Factors", "Contributing_Factors"
 ]
 
-def get_title_and_description_keys(d):
+@functools.lru_cache(maxsize=None)
+def node_data_keys(signature):
     """
-    Given a dictionary, attempt to identify which keys correspond to the title and description.
-    Returns a tuple (title_key, description_key).
-    Logs warnings or errors if keys are missing.
+    Identify the title, description and id keys for a tuple of dict keys.
+    Memoized: LLM payloads come in a handful of key signatures.
+    Returns a tuple (title_key, description_key, id_key), with None for keys not found.
     """
     description_reconciliation_keys = {"detail", "details"}
     id_keys = {"solution_id", "id"}
     title_key = None
     description_key = None
     id_key = None
-    for k in d:
+    for k in signature:
         k_stripped = k.strip()
         if k_stripped in title_keys:
             if title_key is None:
@@ -123,47 +163,78 @@ def get_title_and_description_keys(d):
                     title_key = k
         elif k in id_keys:
             id_key = k
+    return title_key, description_key, id_key
+
+def get_title_and_description_keys(d):
+    """
+    Given a dictionary, attempt to identify which keys correspond to the title and description.
+    Returns a tuple (title_key, description_key).
+    Logs warnings or errors if keys are missing.
+    """
+    title_key, description_key, id_key = node_data_keys(tuple(d))
     if title_key is None and id_key is None:
         logger.warning(f"No title_key or id_key in {list(d.keys())}")
     if description_key is None:
         logger.error(f"No description_key in {list(d.keys())}")
     return title_key, description_key
 
-def normalize_dict(data):
+@functools.lru_cache(maxsize=None)
+def title_description_keys(signature):
     """
-    Normalize a dictionary to a standard format with 'title' and 'description' keys.
-    Handles various possible key names and structures.
-    Returns a single normalized dict or a list of such dicts.
+    Return the (title_key, description_key) normalize_dict uses for a tuple of dict keys:
+    the last key containing "title" and the last containing "description", or None.
     """
-    # Unwrap if data is like {'solution': {...}}
-    if isinstance(data, dict) and len(data) == 1:
-        only_value = next(iter(data.values()))
-        if isinstance(only_value, dict):
-            data = only_value
-
-    # Now proceed as before, looking for title/description
     title_key = None
     description_key = None
-    for k in data:
+    for k in signature:
         if "title" in k.lower():
             title_key = k
         if "description" in k.lower():
             description_key = k
+    return title_key, description_key
 
-    if title_key is None or description_key is None:
-        raise ValueError("Missing title or description key in data: {}".format(data))
-
-    title_value = data[title_key]
-    description_value = data[description_key]
+def project(d, title_key, description_key):
+    """
+    Return the normalized {"title", "description"} dict for d, given its keys.
+    """
+    title_value = d[title_key]
     if isinstance(title_value, str):
         title_value = title_value.replace('_', ' ')
     else:
         title_value = str(title_value)
     return {
         "title": title_value,
-        "description": description_value
+        "description": d[description_key]
     }
 
+def unwrap_element(d):
+    """
+    Unwrap a dict like {'solution': {...}} to its only value.
+    """
+    if len(d) == 1:
+        only_value = next(iter(d.values()))
+        if isinstance(only_value, dict):
+            return only_value
+    return d
+
+def normalize_dict(data):
+    """
+    Normalize a dictionary to a standard format with 'title' and 'description' keys.
+    Handles various possible key names and structures.
+    Returns a single normalized dict or a list of such dicts.
+    """
+    # Unwrap if data is like {'solution': {...}}
+    if isinstance(data, dict):
+        data = unwrap_element(data)
+
+    # Now proceed as before, looking for title/description
+    title_key, description_key = title_description_keys(tuple(data))
+
+    if title_key is None or description_key is None:
+        raise ValueError("Missing title or description key in data: {}".format(data))
+
+    return project(data, title_key, description_key)
+
 def normalize_list(data):
     """
     Normalize a list of dictionaries, applying normalize_dict to each element.
@@ -185,6 +256,80 @@ def normalize_data(data):
         return normalize_dict(data)
     return data
 
+def normalize_batch(payloads):
+    """
+    Normalize many LLM payloads at once, e.g. the responses for a whole g2o level or a
+    replayed cache.
+
+    Gives the same result as normalize_data for each payload, but the title/description keys
+    are resolved once per key signature (tuple of an element's keys) and every element with
+    that signature is projected with the same mapping, by the same unwrap_element and
+    project normalize_dict uses. Problems are logged once per signature
+    with a count, instead of once per element.
+
+    Args:
+        payloads (list): Parsed LLM responses.
+
+    Returns:
+        tuple: (results, diagnostics). results[i] is normalize_data(payloads[i]), or None where
+        normalize_data would raise. diagnostics has counts of payloads, elements, signatures and
+        failed payloads, the indexes of the failed payloads ("failed_payloads") and
+        "missing_keys": {signature: number of elements}.
+    """
+    mappings = {}  # signature -> (title_key, description_key)
+    missing_keys = Counter()
+    results = []
+    elements = 0
+    failed = []
+    for i, p in enumerate(payloads):
+        while isinstance(p, dict) and len(p) == 1:
+            p = next(iter(p.values()))
+        if isinstance(p, list):
+            batch = p
+        elif isinstance(p, dict):
+            batch = (p,)
+        else:
+            results.append(p)
+            continue
+        out = []
+        for d in batch:
+            if not isinstance(d, dict):
+                continue
+            if len(d) == 1:
+                d = unwrap_element(d)
+            signature = tuple(d)
+            keys = mappings.get(signature)
+            if keys is None:
+                keys = mappings[signature] = title_description_keys(signature)
+            elements += 1
+            title_key, description_key = keys
+            if title_key is None or description_key is None:
+                missing_keys[signature] += 1
+                out = None
+            elif out is not None:
+                out.append(project(d, title_key, description_key))
+        if out is None:
+            failed.append(i)
+            results.append(None)
+        else:
+            results.append(out if batch is p else out[0])
+
+    for signature, n in missing_keys.items():
+        logger.warning(f"Missing title or description key in {n} elements with keys {list(signature)}")
+    diagnostics = {
+        "payloads": len(payloads),
+        "elements": elements,
+        "signatures": len(mappings),
+        "failed": len(failed),
+        "failed_payloads": failed,
+        "missing_keys": dict(missing_keys),
+    }
+    logger.info(
+        f"normalize_batch: {diagnostics['payloads']} payloads, {diagnostics['elements']} elements, "
+        f"{diagnostics['signatures']} key signatures, {diagnostics['failed']} failed"
+    )
+    return results, diagnostics
+
 def get_obstacle_list(data):
     """
     Extract a list of obstacles from data, handling various possible structures.
@@ -208,13 +353,16 @@ def insert_nodes(parent_name, data, tag):
     """
     Insert nodes into the tree under the given parent node, using the provided data.
     Each obstacle is added as a child node with the specified tag.
+    Returns the list of created nodes.
     """
     parent_node = tree.get_node(parent_name)
     obstacle_list = get_obstacle_list(data)
-    logger.info(f"obstacle_list: {obstacle_list}")
+    logger.debug(f"obstacle_list: {obstacle_list}")
 
+    created = []
+    untitled = Counter()
     if obstacle_list is None:
-        return
+        return created
     for o in obstacle_list:
         if isinstance(o, dict):
             if len(o) == 1:
@@ -225,34 +373,54 @@ def insert_nodes(parent_name, data, tag):
                 # Expect both obstacle and description
                 d = o
 
-            title_key, description_key = get_title_and_description_keys(d)
+            title_key, description_key, id_key = node_data_keys(tuple(d))
 
             if description_key is None:
+                logger.error(f"No description_key in {list(d.keys())}")
                 raise ValueError("Missing description key in node data: {}".format(d))
+            if title_key is None and id_key is None:
+                untitled[tuple(d)] += 1
 
             if title_key is None:
                 node_data = d[description_key]
             else:
                 node_data = {"title": d[title_key], "description": d[description_key]}
 
-            logger.info(f"new node data: {node_data}")
-            tree.create_node(
-                data=node_data,
-                parent=parent_node,
-                tag=tag,
-            )
-
-def print_tree(identifier, indent=0):
+            logger.debug(f"new node data: {node_data}")
+            with tree_lock:
+                created.append(tree.create_node(
+                    data=node_data,
+                    parent=parent_node,
+                    tag=tag,
+                ))
+    for signature, n in untitled.items():
+        logger.warning(f"No title_key or id_key in {n} items with keys {list(signature)}")
+    return created
+
+def log_subtree(tree, identifier, logger, with_tag=False):
     """
-    Recursively print the tree structure starting from the given node identifier.
+    Log the node with the given identifier and its descendants, one line per node,
+    indented by depth below that node. Returns False if the node does not exist.
     """
     node = tree.get_node(identifier)
     if node is None:
+        return False
+    base = tree.depth(node)
+    for nid in tree.expand_tree(identifier, sorting=False):
+        n = tree.get_node(nid)
+        indent = "  " * (tree.depth(n) - base)
+        if with_tag:
+            logger.info("> %s%s. %s %s", indent, n.identifier, n.tag, n.data)
+        else:
+            logger.info("> %s%s. %s", indent, n.identifier, n.data)
+    return True
+
+def print_tree(identifier):
+    """
+    Log the tree structure starting from the given node identifier.
+    """
+    if not log_subtree(tree, identifier, logger):
         logger.warning(f"Node with identifier '{identifier}' not found.")
-        return
-    logger.info(f"> {'  ' * indent}{node.identifier}. {node.data}")
-    for c in tree.children(identifier):
-        print_tree(c.identifier, indent + 2)
 
 cache_dirty = False
 
@@ -270,11 +438,30 @@ def call_gpt4(msg_text, use_cache=True):
     # Hash the message text to use as a cache key
     key = hashlib.md5(msg_text.encode()).hexdigest()
 
+    with stats_lock:
+        call_stats["calls"] += 1
+
     # Return cached response if available
     if use_cache and key in cache4:
-        print("* ", end="")
+        with stats_lock:
+            call_stats["cache_hits"] += 1
         return cache4[key]
 
+    with stats_lock:
+        call_stats["in_flight"] += 1
+    try:
+        return request_gpt4(msg_text, key)
+    finally:
+        with stats_lock:
+            call_stats["in_flight"] -= 1
+
+def request_gpt4(msg_text, key):
+    """
+    Send msg_text to the OpenAI API, retrying on rate limits and connection errors.
+    Stores the parsed JSON response in the cache under key and returns it.
+    """
+    global cache_dirty
+
     messages: list[ChatCompletionMessageParam] = [
         {"role": "user", "content": msg_text}
     ]
@@ -282,8 +469,8 @@ def call_gpt4(msg_text, use_cache=True):
 
     for attempts in range(5):
         try:
-            logger.debug(f'After one second sending: {messages[0].get("content", "")}')
-            time.sleep(1)
+            wait_for_rate_limit()
+            logger.debug(f'Sending: {messages[0].get("content", "")}')
             response = client.chat.completions.create(
                 model=model,
                 messages=messages,
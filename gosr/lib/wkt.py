@@ -0,0 +1,196 @@
+"""
+wkt.py
+
+Well-known text (WKT) geometries as GeoJSON geometry dicts, without shapely.
+
+parse_wkt("POLYGON ((-94.6 39.1, -94.5 39.1, -94.5 39.2, -94.6 39.1))") returns
+{"type": "Polygon", "coordinates": [[[-94.6, 39.1], ...]]}. POINT, LINESTRING, POLYGON and
+their MULTI forms are supported, with Z/M values dropped, as are EMPTY geometries (None).
+Coordinates stay in WKT order, x (longitude) then y (latitude), which is also GeoJSON order.
+simplify() applies Douglas-Peucker line simplification to a parsed geometry.
+
+Converters use shapely 2's vectorized functions (a requirement); this module is the fallback
+for when shapely cannot be imported, and parses each geometry with a strict tokenizer.
+"""
+
+import re
+
+token_pattern = re.compile(r"\s*(\(|\)|,|[^\s(),]+)")
+
+geojson_types = {
+    "POINT": "Point",
+    "LINESTRING": "LineString",
+    "POLYGON": "Polygon",
+    "MULTIPOINT": "MultiPoint",
+    "MULTILINESTRING": "MultiLineString",
+    "MULTIPOLYGON": "MultiPolygon",
+}
+
+# Nesting depth of each type's coordinates: 0 is one position
+depths = {"POINT": 0, "LINESTRING": 1, "POLYGON": 2, "MULTIPOINT": 1, "MULTILINESTRING": 2, "MULTIPOLYGON": 3}
+# Numbers per position, by dimension tag
+dimensions = {None: (2, 3), "Z": (3,), "M": (3,), "ZM": (4,)}
+
+
+def tokens(text):
+    pos = 0
+    text = text.strip()
+    while pos < len(text):
+        m = token_pattern.match(text, pos)
+        if m is None:
+            raise ValueError(f"Bad WKT near {text[pos:pos + 20]!r}")
+        yield m.group(1)
+        pos = m.end()
+
+
+def geometry(kind, coordinates):
+    """
+    Return the geometry dict for parsed WKT coordinates, one list level per parenthesis.
+    """
+    if depths[kind] == 0:
+        coordinates = coordinates[0]
+    elif kind == "MULTIPOINT":
+        # Both MULTIPOINT (1 2, 3 4) and MULTIPOINT ((1 2), (3 4))
+        coordinates = [c[0] if isinstance(c[0], list) else c for c in coordinates]
+    return {"type": geojson_types[kind], "coordinates": coordinates}
+
+
+def parse_wkt(text):
+    """
+    Return the GeoJSON geometry dict of a WKT string, or None for an EMPTY geometry.
+    Raises ValueError for unsupported or malformed WKT.
+    """
+    toks = list(tokens(text))
+    if not toks:
+        raise ValueError("Empty WKT")
+    kind = toks[0].upper()
+    if kind not in geojson_types:
+        raise ValueError(f"Unsupported WKT geometry {toks[0]!r}")
+    pos = 1
+    tag = None
+    if pos < len(toks) and toks[pos].upper() in dimensions:
+        tag = toks[pos].upper()
+        pos += 1
+    if pos < len(toks) and toks[pos].upper() == "EMPTY":
+        return None
+
+    def group(pos):
+        # A parenthesized list of groups or positions; returns (list, next pos)
+        if toks[pos] != "(":
+            raise ValueError(f"Expected '(' in WKT, found {toks[pos]!r}")
+        pos += 1
+        items = []
+        while True:
+            if toks[pos] == "(":
+                item, pos = group(pos)
+            else:
+                numbers = []
+                while toks[pos] not in (",", ")"):
+                    numbers.append(float(toks[pos]))
+                    pos += 1
+                if len(numbers) < 2:
+                    raise ValueError("WKT position needs at least x and y")
+                if len(numbers) not in dimensions[tag]:
+                    raise ValueError(f"WKT position has {len(numbers)} numbers; expected {' or '.join(map(str, dimensions[tag]))}")
+                item = numbers[:2]
+            items.append(item)
+            if toks[pos] == ",":
+                pos += 1
+            elif toks[pos] == ")":
+                return items, pos + 1
+            else:
+                raise ValueError(f"Unexpected {toks[pos]!r} in WKT")
+
+    try:
+        coordinates, pos = group(pos)
+    except IndexError:
+        raise ValueError("Truncated WKT") from None
+    if pos != len(toks):
+        raise ValueError("Trailing text after WKT geometry")
+    if kind == "MULTIPOINT" and not nested(coordinates, 1):
+        # MULTIPOINT ((1 2), (3 4)): one position per group
+        if not nested(coordinates, 2) or any(len(c) != 1 for c in coordinates):
+            raise ValueError("Badly nested WKT MULTIPOINT")
+    elif kind != "MULTIPOINT" and not nested(coordinates, max(depths[kind], 1)):
+        raise ValueError(f"Badly nested WKT {kind}")
+    if depths[kind] == 0 and len(coordinates) != 1:
+        raise ValueError("WKT POINT has more than one position")
+    return geometry(kind, coordinates)
+
+
+def nested(items, level):
+    """
+    Return True if items, as parsed by parse_wkt, are groups nested level deep whose
+    innermost groups hold only positions (lists of numbers).
+    """
+    if level == 1:
+        return all(isinstance(item[0], float) for item in items)
+    return all(not isinstance(item[0], float) and nested(item, level - 1) for item in items)
+
+
+def polygons(geometry):
+    """
+    Return the polygons (lists of rings of [x, y]) of a Polygon or MultiPolygon geometry dict.
+    """
+    if geometry is None:
+        return []
+    if geometry["type"] == "Polygon":
+        return [geometry["coordinates"]]
+    if geometry["type"] == "MultiPolygon":
+        return geometry["coordinates"]
+    raise ValueError(f"Expected a Polygon or MultiPolygon, got {geometry['type']}")
+
+
+def simplify_line(points, tolerance):
+    """
+    Return the Douglas-Peucker simplification of a list of [x, y] positions: the positions
+    whose removal would move the line by more than tolerance are kept, with both ends.
+    """
+    if len(points) < 3:
+        return points
+    keep = [False] * len(points)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        first, last = stack.pop()
+        (x1, y1), (x2, y2) = points[first][:2], points[last][:2]
+        dx, dy = x2 - x1, y2 - y1
+        length = (dx * dx + dy * dy) ** 0.5
+        farthest, distance = None, tolerance
+        for i in range(first + 1, last):
+            px, py = points[i][0] - x1, points[i][1] - y1
+            d = abs(dx * py - dy * px) / length if length else (px * px + py * py) ** 0.5
+            if d > distance:
+                farthest, distance = i, d
+        if farthest is not None:
+            keep[farthest] = True
+            stack += [(first, farthest), (farthest, last)]
+    return [p for p, k in zip(points, keep) if k]
+
+
+def simplify_ring(ring, tolerance):
+    """
+    Simplify a closed ring, keeping it closed and at least a triangle; a ring that would
+    collapse is returned unchanged.
+    """
+    simplified = simplify_line(ring, tolerance)
+    return simplified if len(simplified) >= 4 else ring
+
+
+def simplify(geometry, tolerance):
+    """
+    Return a geometry dict with its lines and rings simplified to within tolerance
+    (in coordinate units, i.e. degrees for longitude/latitude).
+    """
+    if geometry is None or tolerance <= 0:
+        return geometry
+    kind, c = geometry["type"], geometry["coordinates"]
+    if kind == "LineString":
+        c = simplify_line(c, tolerance)
+    elif kind == "MultiLineString":
+        c = [simplify_line(line, tolerance) for line in c]
+    elif kind == "Polygon":
+        c = [simplify_ring(ring, tolerance) for ring in c]
+    elif kind == "MultiPolygon":
+        c = [[simplify_ring(ring, tolerance) for ring in polygon] for polygon in c]
+    return {"type": kind, "coordinates": c}
@@ -7,7 +7,10 @@ This script takes a single, user-defined Goal and generates a structured list of
 that may prevent achieving that goal. It is the first step in the GOSR (Goal-Obstacles-Solutions-Resources) pipeline.
 
 Typical usage:
-    python g2o.py <config-directory>
+    python g2o.py <config-directory> [--full-tree]
+
+Progress is shown as a single live status line, and only newly inserted obstacles are logged.
+Pass --full-tree to also log the whole tree after each level.
 
 Inputs:
     - A directory containing a config.yaml file with the required parameters.
@@ -49,6 +52,21 @@ The following parameter is optional:
     Known obstacles from the local community, included in the prompt for context if present.
     If provided, these are shared with the language model to inform or refine its generated list of obstacles.
 
+- max_depth (int):
+    Number of decomposition levels below the main-theme obstacles (default: 1).
+    Levels are expanded one frontier at a time, with the nodes of each level expanded concurrently.
+
+- max_items_per_level (list of int):
+    Fan-out limit for each decomposition level, e.g. [8, 4, 2]. Levels beyond the end of the list
+    use its last value. Falls back to max_items_per_llm_call when absent.
+
+- max_nodes (int):
+    Stop expanding once the tree holds this many nodes.
+
+- max_workers (int):
+    Maximum number of concurrent LLM calls while expanding a level (default: 8).
+    Calls are also paced by the shared rate limiter in gosr.lib.utils.
+
 Example config.yaml:
 --------------------
 future_picture: "Increase community access to healthy food"
@@ -80,10 +98,12 @@ import time
 import requests
 import yaml
 import re
+from concurrent.futures import ThreadPoolExecutor
 from gosr.lib.utils import (
     tree, call_gpt4, insert_nodes, setup_openai, setup_logging,
-    normalize_data, cache4
+    normalize_data, normalize_batch, cache4, save_cache4, log_subtree
 )
+from gosr.lib.progress import Progress
 
 # Use the shared OpenAI setup function
 setup_openai()
@@ -93,21 +113,15 @@ logger = logging.getLogger(__name__)
 config = None
 path = None
 
-def print_tree(identifier, indent=0):
+def print_tree(identifier):
     """
-    Output to stdout the tree starting at node with given identifier.
+    Log the full tree starting at node with given identifier.
 
     Args:
         identifier (str): The node identifier to start printing from.
-        indent (int): The indentation level for pretty-printing.
     """
-    node = tree.get_node(identifier)
-    if node is None:
+    if not log_subtree(tree, identifier, logger, with_tag=True):
         logger.warning(f"Node with identifier '{identifier}' not found in tree.")
-        return
-    logger.info("> %s%s. %s %s", indent*'  ', node.identifier, node.tag, node.data)
-    for c in tree.children(identifier):
-        print_tree(c.identifier, indent + 2)
 
 
 # def create_nodes():
@@ -127,13 +141,18 @@ def print_tree(identifier, indent=0):
 #     parse_to_nodes("root", text, tag="obstacle")
 
 
-def insert_causative4(node, future_picture):
+def fetch_causative4(node, future_picture, normalize=True):
     """
-    For a given node and future picture, find and insert contributing factors as sub-nodes.
+    Ask the LLM for the contributing factors of a node, without modifying the tree.
+    Safe to call from several threads at once.
 
     Args:
         node: The tree node to expand.
         future_picture (str): The main goal or vision statement.
+        normalize (bool): Normalize the response (False returns it as parsed, for normalize_batch).
+
+    Returns:
+        The normalized list of sub-obstacle dicts.
     """
     # Determine the obstacle description for the prompt
     if isinstance(node.data, str):
@@ -141,8 +160,7 @@ def insert_causative4(node, future_picture):
     elif isinstance(node.data, dict) and len(node.data) == 2:
         obstacle = f'{node.data["title"]}: {node.data["description"]}'
     else:
-        print(f"Node should be dict, instead it is: {node.data}")
-        sys.exit(1)
+        raise ValueError(f"Node should be dict, instead it is: {node.data}")
 
     # Compose the prompt for the LLM to get contributing factors
     msg_text = (
@@ -156,17 +174,98 @@ def insert_causative4(node, future_picture):
 
     # Save the cache after each call to persist results
     assert isinstance(path, str) and path, "path must be a non-empty string"
-    with open(os.path.join(path, "cache4.json"), "w", encoding="utf-8") as f:
-        json.dump(cache4, f)
+    save_cache4(path)
 
     logger.info(text)
-    # Normalize the returned data and insert as sub-nodes
-    normalized_data = normalize_data(text)
+    return normalize_data(text) if normalize else text
+
+
+def max_items_for_level(level):
+    """
+    Return the fan-out limit for a decomposition level (1 = children of the main-theme obstacles).
+    """
     assert config is not None, "Config must be loaded before using it."
-    max_items = config.get("max_items_per_llm_call", None)
+    per_level = config.get("max_items_per_level")
+    if per_level:
+        return per_level[min(level, len(per_level)) - 1]
+    return config.get("max_items_per_llm_call", None)
+
+
+def insert_causative4(node, future_picture, max_items=None):
+    """
+    For a given node and future picture, find and insert contributing factors as sub-nodes.
+
+    Args:
+        node: The tree node to expand.
+        future_picture (str): The main goal or vision statement.
+        max_items (int): Fan-out limit (default: max_items_per_llm_call from config).
+
+    Returns:
+        list: The inserted sub-obstacle nodes.
+    """
+    normalized_data = fetch_causative4(node, future_picture)
+    assert config is not None, "Config must be loaded before using it."
+    if max_items is None:
+        max_items = config.get("max_items_per_llm_call", None)
     if max_items is not None and isinstance(normalized_data, list):
         normalized_data = normalized_data[:max_items]
-    insert_nodes(node.identifier, normalized_data, tag="obstacle")
+    return insert_nodes(node.identifier, normalized_data, tag="obstacle")
+
+
+def expand_frontier(frontier, future_picture, level, progress=None):
+    """
+    Expand every node of one level concurrently and return the next level's nodes.
+
+    LLM calls run in a thread pool; the responses are normalized together (normalize_batch)
+    and inserted in frontier order so the tree comes out the same as with sequential
+    expansion. Insertion stops once the tree reaches max_nodes.
+
+    Args:
+        frontier (list): The nodes to expand.
+        future_picture (str): The main goal or vision statement.
+        level (int): The decomposition level being created (1 = children of the main-theme obstacles).
+        progress (Progress): Optional status line, advanced as each node's call completes.
+
+    Returns:
+        list: The inserted nodes, in order.
+    """
+    assert config is not None, "Config must be loaded before using it."
+    max_items = max_items_for_level(level)
+    max_nodes = config.get("max_nodes", None)
+
+    def fetch(node):
+        data = fetch_causative4(node, future_picture, normalize=False)
+        if progress is not None:
+            progress.advance()
+        return data
+
+    with ThreadPoolExecutor(max_workers=config.get("max_workers", 8)) as executor:
+        responses = list(executor.map(fetch, frontier))
+    results, diagnostics = normalize_batch(responses)
+    if diagnostics["failed"]:
+        failed = ", ".join(str(frontier[i].identifier) for i in diagnostics["failed_payloads"])
+        message = f"Responses without title and description keys for nodes {failed}"
+        logger.error(message)
+        raise ValueError(message)
+
+    next_frontier = []
+    for node, normalized_data in zip(frontier, results):
+        if max_items is not None and isinstance(normalized_data, list):
+            normalized_data = normalized_data[:max_items]
+        if max_nodes is not None:
+            room = max_nodes - tree.size()
+            if room <= 0:
+                logger.info(f"Reached max_nodes={max_nodes}, stopping at level {level}")
+                break
+            if isinstance(normalized_data, list):
+                normalized_data = normalized_data[:room]
+        inserted = insert_nodes(node.identifier, normalized_data, tag="obstacle")
+        # Log only what was just inserted below this node
+        logger.info("> %s. %s %s", node.identifier, node.tag, node.data)
+        for n in inserted:
+            log_subtree(tree, n.identifier, logger, with_tag=True)
+        next_frontier.extend(inserted)
+    return next_frontier
 
 
 def save_tree(filename="o.json"):
@@ -233,12 +332,14 @@ def main():
     global path
 
     # Ensure the script is called with the correct number of arguments
-    if len(sys.argv) != 2:
-        print(f"Usage: {sys.argv[0]} path")
+    args = [a for a in sys.argv[1:] if a != "--full-tree"]
+    full_tree = len(args) != len(sys.argv) - 1
+    if len(args) != 1:
+        print(f"Usage: {sys.argv[0]} path [--full-tree]")
         return 1
 
     # Set the working path from the command-line argument
-    path = sys.argv[1]
+    path = args[0]
     # Load configuration from config.yaml
     with open(os.path.join(path, "config.yaml"), "r", encoding="utf-8") as file:
         config = yaml.safe_load(file)
@@ -284,17 +385,26 @@ def main():
     with open(os.path.join(path, "cache4.json"), "w", encoding="utf-8") as f:
         json.dump(cache4, f)
 
-    # Print the tree structure after initial obstacle insertion
+    # Log the main-theme obstacles
     print_tree("root")
 
-    # For each leaf node (obstacle), generate and insert contributing factors
-    leaf_list = tree.leaves()
-    for n in leaf_list:
-        insert_causative4(node=n, future_picture=future_picture)
-        print_tree("root")
-        # Uncomment the next line for debugging or to pause between insertions
-        # print("Sleep 2")
-        # break
+    # Expand one level at a time: each level's nodes are expanded concurrently,
+    # until max_depth is reached, a level yields no new nodes, or max_nodes is reached
+    frontier = tree.leaves()
+    progress = Progress("g2o").start()
+    for level in range(1, config.get("max_depth", 1) + 1):
+        if not frontier:
+            break
+        if config.get("max_nodes") is not None and tree.size() >= config["max_nodes"]:
+            break
+        progress.label = f"g2o level {level}"
+        progress.add_total(len(frontier))
+        frontier = expand_frontier(frontier, future_picture, level, progress)
+        logger.info(f"Level {level}: {len(frontier)} obstacles, {tree.size()} nodes")
+        if full_tree:
+            print_tree("root")
+        save_tree()
+    progress.finish()
 
     # Save the final tree structure to disk
     save_tree()
@@ -0,0 +1,247 @@
+"""
+o2r.py - Obstacles to Resources, pipelined
+
+Runs the o2s and s2r stages as one pipeline. o2s generates solutions for each leaf obstacle
+as usual, and every solution node inserted by add_solutions4 is put on a queue right away.
+A pool of s2r worker threads takes solution nodes off the queue and researches their
+resources while o2s keeps going, so end-to-end time is roughly the longer of the two stages
+instead of their sum. Both stages share the rate limiter and cache4 in gosr.lib.utils.
+
+Workers only hold the tree lock to add nodes. r.json, its fingerprints and cache4.json are
+snapshotted and written outside the lock every pipeline_save_every solutions and at the end.
+With incremental set, a solution whose fingerprint matches the previous r.json has its
+resources grafted as s2r does. cluster_solutions is not supported: clusters are computed over
+all solutions, which do not exist yet when the first ones are researched.
+
+Usage:
+    python -m gosr.main.o2r <project_directory>
+
+Inputs:
+    - config.yaml: Everything o2s.py and s2r.py read, plus the optional keys below.
+    - o.json: The obstacle tree produced by g2o.py.
+    - resources.db / resources-raw.json: (Optional) Raw resources of a previous run, as for s2r.py.
+
+Outputs:
+    - s.json: The solution tree (as o2s.py writes it), saved once all solutions are generated.
+    - r.json: As s2r.py writes it, saved every pipeline_save_every solutions and at the end.
+    - r.fingerprints.json: Fingerprints of the researched solutions, as s2r.py writes them.
+    - r.index.json: Resource index of the final r.json, as s2r.py writes it.
+    - resources.db, resources-raw.json: As s2r.py writes them (resources-raw.json once, at the end).
+    - cache4.json: Cache of LLM responses.
+    - o2r.log: Log file.
+
+Configuration (config.yaml):
+    - pipeline_workers: (Optional) Number of s2r worker threads (default 4).
+    - pipeline_save_every: (Optional) Save r.json and cache4.json after this many researched solutions (default 10).
+    - incremental: (Optional) As for s2r.py.
+    - cluster_solutions: Not supported; use o2s.py and s2r.py to cluster solutions.
+"""
+
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+from datetime import datetime
+
+import yaml
+
+import gosr.lib.utils as utils
+from gosr.lib import incremental
+from gosr.lib.utils import load_tree, tree, save_cache4, tree_lock
+from gosr.lib.resource_index import write_index
+from gosr.main import o2s, s2r
+
+logger = logging.getLogger(__name__)
+
+config = None
+path = None
+
+# Queue sentinel telling a worker there are no more solutions
+DONE = None
+
+researched = 0
+queued = 0
+reused = 0
+progress_lock = threading.Lock()
+
+# Fingerprints of the researched solutions, by content key (guarded by progress_lock)
+fingerprints = {}
+# Serializes checkpoint writes; the tree lock is only held to snapshot the tree
+save_lock = threading.Lock()
+
+
+def strip_resources(j):
+    """
+    Return a copy of a saved tree without its resource nodes, i.e. the s.json view of r.json.
+    """
+    out = {}
+    for tag, v in j.items():
+        v = dict(v)
+        if "children" in v:
+            children = [
+                strip_resources(c) if isinstance(c, dict) else c
+                for c in v["children"]
+                if not (isinstance(c, dict) and "resource" in c)
+            ]
+            if children:
+                v["children"] = children
+            else:
+                del v["children"]
+        out[tag] = v
+    return out
+
+
+def save_solutions_tree(filename="s.json"):
+    """
+    Save the solution tree, leaving out any resources the workers have already added.
+    """
+    with tree_lock:
+        j = json.loads(tree.to_json(with_data=True))
+    with open(os.path.join(path, filename), "w", encoding="utf-8") as f:
+        json.dump(strip_resources(j), f)
+
+
+def checkpoint(filename="r.json"):
+    """
+    Save r.json, its fingerprints and cache4.json. Only the snapshot of the tree is taken
+    under the tree lock, so workers keep adding resources while the files are written.
+    Returns the saved tree.
+    """
+    with tree_lock:
+        j = json.loads(tree.to_json(with_data=True))
+    with progress_lock:
+        fps = dict(fingerprints)
+    with save_lock:
+        with open(os.path.join(path, filename), "w", encoding="utf-8") as f:
+            json.dump(j, f)
+        incremental.save_fingerprints(path, filename, fps)
+        save_cache4(path)
+    return j
+
+
+def research_worker(work, previous, save_every):
+    """
+    Take solution nodes off the queue and add their resources until the DONE sentinel arrives.
+    Solutions unchanged since the previous r.json (see s2r incremental) have their resources grafted.
+    """
+    global researched, reused
+    while True:
+        node = work.get()
+        if node is DONE:
+            break
+        fp = incremental.fingerprint(node.data, config, s2r.FINGERPRINT_CONFIG_KEYS, s2r.PROMPT_VERSION)
+        children = incremental.lookup(node, previous, fp)
+        try:
+            if children is not None:
+                s2r.graft_resources(node, children)
+            else:
+                s2r.add_resources(node)
+        except Exception as e:
+            logger.error(f"Resource discovery failed for {node.data}: {e}")
+        with progress_lock:
+            fingerprints[incremental.content_key(node.data)] = fp
+            researched += 1
+            reused += children is not None
+            due = researched % save_every == 0
+            print(f"{datetime.now().isoformat()} s2r {researched}/{queued}", node.data)
+        if due:
+            checkpoint()
+
+
+def main():
+    """
+    Main entry point for the pipelined Obstacles→Resources workflow.
+
+    Returns:
+        int: Exit code (0 for success, 1 for usage error).
+    """
+    global config, path, queued, researched, reused
+
+    if len(sys.argv) != 2:
+        print(f"Usage: {sys.argv[0]} path")
+        return 1
+
+    path = sys.argv[1]
+    with open(os.path.join(path, "config.yaml"), "r", encoding="utf-8") as file:
+        config = yaml.safe_load(file)
+
+    log_filename = os.path.join(path, "o2r.log")
+    logger.setLevel(logging.INFO)
+    handler = logging.handlers.RotatingFileHandler(
+        filename=log_filename, maxBytes=0, backupCount=5, encoding="utf-8"
+    )
+    if os.path.exists(log_filename) and os.path.getsize(log_filename) > 0:
+        handler.doRollover()
+    logger.addHandler(handler)
+
+    if config.get("cluster_solutions", False):
+        print("cluster_solutions is not supported by o2r, which researches solutions before they can all be clustered; "
+              "run o2s.py and s2r.py instead")
+        return 1
+
+    try:
+        with open(os.path.join(path, "cache4.json"), "r", encoding="utf-8") as f:
+            utils.cache4.update(json.load(f))
+    except (IOError, OSError):
+        print("No cache4.json file")
+    except json.JSONDecodeError:
+        print("cache4.json file not parsable")
+
+    load_tree(os.path.join(path, "o.json"))
+
+    # Both stages read their settings from module globals
+    o2s.config = config
+    o2s.path = path
+    s2r.config = config
+    s2r.path = path
+    s2r.locality = config["locality"]
+    s2r.country = config["country"]
+    s2r.max_resource_loops = config.get("max_resource_loops", s2r.max_resource_loops)
+    s2r.min_new_resources = config.get("min_new_resources", s2r.min_new_resources)
+    s2r.max_omit_tokens = config.get("max_omit_tokens", s2r.max_omit_tokens)
+    s2r.load_resources()
+
+    # In incremental mode, index the previous r.json before the checkpoints overwrite it
+    use_incremental = config.get("incremental", False)
+    previous = incremental.load_previous(path, "r.json", "solution", "resource") if use_incremental else ({}, {})
+    fingerprints.clear()
+    queued = researched = reused = 0
+
+    work = queue.Queue()
+    save_every = config.get("pipeline_save_every", 10)
+    workers = [
+        threading.Thread(target=research_worker, args=(work, previous, save_every), daemon=True)
+        for _ in range(config.get("pipeline_workers", 4))
+    ]
+    for w in workers:
+        w.start()
+
+    leaf_list = tree.leaves()
+    try:
+        for count, l in enumerate(leaf_list, 1):
+            solutions = o2s.add_solutions4(l)
+            with progress_lock:
+                queued += len(solutions)
+            for n in solutions:
+                work.put(n)
+            print(f"{datetime.now().isoformat()} o2s {count}/{len(leaf_list)} {100*count/len(leaf_list):.3g}%", l.data)
+        save_solutions_tree()
+    finally:
+        for _ in workers:
+            work.put(DONE)
+        for w in workers:
+            w.join()
+        # The raw_resources table is the checkpoint; the JSON list is exported once
+        s2r.save_resources()
+
+    write_index(path, checkpoint())
+    if use_incremental:
+        print(f"Reused {reused}/{researched} unchanged subtrees")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -13,6 +13,10 @@ Main Steps:
 3. Insert solutions into the tree and save progress.
 4. Maintain a cache and log progress for reproducibility.
 
+With `incremental: true` in config.yaml, obstacles whose fingerprint (content,
+locality/country/max_items_per_llm_call, prompt version) is unchanged since the
+previous run have their solutions grafted from the previous s.json.
+
 Usage:
     python o2s.py <working_directory_path>
 """
@@ -33,7 +37,9 @@ from gosr.lib.utils import (
     setup_openai,
     cache4,
     normalize_data,
+    call_stats,
 )
+from gosr.lib import incremental
 
 # Initialize OpenAI API credentials
 setup_openai()
@@ -42,6 +48,11 @@ logger = logging.getLogger(__name__)
 config = None  # Will hold the loaded YAML configuration
 path = None    # Will hold the working directory path
 
+# Bump when the solutions prompt changes so incremental runs regenerate everything
+PROMPT_VERSION = 1
+# Config keys the solutions prompt and post-processing depend on
+FINGERPRINT_CONFIG_KEYS = ["locality", "country", "max_items_per_llm_call"]
+
 def add_solutions4(node):
     """
     Generate and insert solutions for a given obstacle node using GPT-4.
@@ -53,6 +64,9 @@ def add_solutions4(node):
         - Calls GPT-4 to generate solutions.
         - Inserts solutions as child nodes under the given node.
         - May limit the number of solutions based on config.
+
+    Returns:
+        list: The inserted solution nodes.
     """
     global config
     if config is None:
@@ -70,7 +84,7 @@ def add_solutions4(node):
     max_items = config.get("max_items_per_llm_call", None)
     if max_items is not None and isinstance(normalized_data, list):
         normalized_data = normalized_data[:max_items]
-    insert_nodes(node.identifier, normalized_data, tag="solution")
+    return insert_nodes(node.identifier, normalized_data, tag="solution")
 
 def save_tree(filename="s.json"):
     """
@@ -146,18 +160,34 @@ def main():
     with open(os.path.join(path, "cache4.json"), "w", encoding='utf-8') as f:
         json.dump(cache4, f)
 
+    # In incremental mode, index the previous s.json so unchanged obstacles can be grafted
+    use_incremental = config.get("incremental", False)
+    previous = incremental.load_previous(path, "s.json", "obstacle", "solution") if use_incremental else ({}, {})
+    fingerprints = {}
+    reused = 0
+
     count = 0
     # For each leaf node (obstacle), generate and insert solutions
     for l in leaf_list:
-        add_solutions4(l)  # Generate and insert solutions for this obstacle
+        fp = incremental.fingerprint(l.data, config, FINGERPRINT_CONFIG_KEYS, PROMPT_VERSION)
+        children = incremental.lookup(l, previous, fp)
+        if children is not None:
+            incremental.graft(l, children)  # Reuse the unchanged subtree from the previous run
+            reused += 1
+        else:
+            add_solutions4(l)  # Generate and insert solutions for this obstacle
+        fingerprints[incremental.content_key(l.data)] = fp
         save_tree()        # Save the updated tree after each insertion
+        incremental.save_fingerprints(path, "s.json", fingerprints)
         count += 1
         # Print progress with timestamp, count, and percentage complete
-        print(f"{datetime.now().isoformat()} {count}/{len(leaf_list)} {100*count/len(leaf_list):.3g}%", l.data)
+        print(f"{datetime.now().isoformat()} {count}/{len(leaf_list)} {100*count/len(leaf_list):.3g}% cache hits {call_stats['cache_hits']}", l.data)
         # Save the cache after each node is processed
         with open(os.path.join(path, "cache4.json"), "w", encoding='utf-8') as f:
             json.dump(cache4, f)
 
+    if use_incremental:
+        print(f"Reused {reused}/{len(leaf_list)} unchanged subtrees")
     sys.exit(0)
 
 if __name__ == "__main__":
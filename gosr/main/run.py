@@ -0,0 +1,322 @@
+"""
+run.py - GOSR pipeline orchestrator
+
+Runs the GOSR stages (g2o → o2s → s2r → raw2resources → recheck_resource_urls → exports)
+as a make-style DAG. Each stage declares the project files it reads, the config.yaml keys
+it depends on, and the files it writes. A stage is skipped when its outputs exist and the
+content hashes of its inputs and relevant config values match those recorded after its last
+successful run (in run-state.json), so editing config.yaml or an upstream file only reruns
+the stages downstream of the change. Stages in the same wave of the DAG (the exports) run in
+parallel, each as its own process, with their output written to run.<stage>.log.
+
+Usage:
+    python -m gosr run <project_dir> [--force] [--stages g2o,o2s,...] [--jobs N] [--dry-run]
+
+Outputs:
+    - run-state.json: input/config hashes recorded after each successful stage.
+    - run.<stage>.log: console output of stages that ran in parallel.
+    - A per-stage timing report on stdout.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import yaml
+
+STATE_FILENAME = "run-state.json"
+
+# Stages in dependency order. A stage depends on every earlier stage that writes one of its inputs.
+# Outputs may be callables taking the loaded config, for names derived from it.
+STAGES = [
+    {
+        "name": "g2o",
+        "module": "gosr.main.g2o",
+        "args": [],
+        "inputs": [],
+        "config_keys": [
+            "future_picture", "root_node_name", "root_question", "locality", "country",
+            "major_theme_obstacles", "max_items_per_llm_call", "max_depth", "max_items_per_level", "max_nodes",
+        ],
+        "outputs": ["o.json"],
+    },
+    {
+        "name": "o2s",
+        "module": "gosr.main.o2s",
+        "args": [],
+        "inputs": ["o.json"],
+        "config_keys": ["locality", "country", "max_items_per_llm_call", "incremental"],
+        "outputs": ["s.json"],
+    },
+    {
+        "name": "s2r",
+        "module": "gosr.main.s2r",
+        "args": [],
+        "inputs": ["s.json"],
+        "config_keys": [
+            "locality", "country", "max_items_per_llm_call", "max_resource_loops", "min_new_resources",
+            "max_omit_tokens", "incremental", "cluster_solutions", "solution_cluster_threshold",
+        ],
+        "outputs": ["r.json", "resources-raw.json"],
+    },
+    {
+        "name": "raw2resources",
+        "module": "gosr.experimental.raw2resources",
+        "args": [],
+        "inputs": ["resources-raw.json"],
+        "config_keys": ["locality", "fuzzy_dedup", "dedup_threshold", "url_cache_ttl_days", "url_cache_negative_ttl_days"],
+        "outputs": ["resources.json"],
+    },
+    {
+        "name": "recheck_resource_urls",
+        "module": "gosr.utils.recheck_resource_urls",
+        "args": [],
+        "inputs": ["resources.json"],
+        "config_keys": ["url_cache_ttl_days", "url_cache_negative_ttl_days"],
+        "outputs": ["resources.json"],
+    },
+    {
+        "name": "json2doc",
+        "module": "gosr.convert.json2doc",
+        "args": ["--stage", "r"],
+        "inputs": ["r.json", "resources.json"],
+        "config_keys": ["word_doc_title", "root_node_name"],
+        "outputs": [lambda config: f"{config.get('word_doc_title', config['root_node_name'])}.docx"],
+    },
+    {
+        "name": "json2mm",
+        "module": "gosr.convert.json2mm",
+        "args": ["--stage", "r"],
+        "inputs": ["r.json"],
+        "config_keys": [],
+        "outputs": ["r.mm"],
+    },
+    {
+        "name": "r2google-maps",
+        "module": "gosr.convert.r2google-maps",
+        "args": [],
+        "inputs": ["r.json", "resources.json"],
+        "config_keys": [],
+        "outputs": ["mailing_list.csv", "Google Maps"],
+    },
+]
+
+
+def file_hash(filename):
+    """
+    Return the sha256 of a file's content, or None if it does not exist.
+    """
+    if not os.path.isfile(filename):
+        return None
+    h = hashlib.sha256()
+    with open(filename, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def config_hash(config, keys):
+    """
+    Return a hash of the values of the given config keys.
+    """
+    text = json.dumps({k: config.get(k) for k in keys}, sort_keys=True, default=str)
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def stage_outputs(stage, config):
+    """
+    Return the output filenames of a stage, resolving config-derived names.
+    """
+    return [o(config) if callable(o) else o for o in stage["outputs"]]
+
+
+def plan_waves(stages, config):
+    """
+    Group stages into waves: each stage runs in the wave after the last stage it depends on.
+
+    Returns:
+        tuple: (waves, deps) where waves is a list of lists of stage names and deps maps each
+        stage name to the names of the stages it depends on.
+    """
+    deps = {}
+    level = {}
+    for i, stage in enumerate(stages):
+        deps[stage["name"]] = [
+            s["name"] for s in stages[:i]
+            if set(stage["inputs"]) & set(stage_outputs(s, config))
+        ]
+        level[stage["name"]] = 1 + max((level[d] for d in deps[stage["name"]]), default=-1)
+    waves = [[] for _ in range(1 + max(level.values(), default=-1))]
+    for stage in stages:
+        waves[level[stage["name"]]].append(stage["name"])
+    return waves, deps
+
+
+def stage_fingerprint(stage, path, config):
+    """
+    Return the current input and config hashes of a stage.
+    """
+    return {
+        "inputs": {i: file_hash(os.path.join(path, i)) for i in stage["inputs"]},
+        "config": config_hash(config, stage["config_keys"]),
+    }
+
+
+def is_stale(stage, path, config, state):
+    """
+    Return the reason a stage needs to run, or None if it is up to date.
+    """
+    for o in stage_outputs(stage, config):
+        if not os.path.exists(os.path.join(path, o)):
+            return f"missing {o}"
+    recorded = state.get(stage["name"])
+    if recorded is None:
+        return "no previous run"
+    current = stage_fingerprint(stage, path, config)
+    if current["config"] != recorded.get("config"):
+        return "config changed"
+    for i, h in current["inputs"].items():
+        if h != recorded.get("inputs", {}).get(i):
+            return f"{i} changed"
+    return None
+
+
+def run_stage(stage, path, log_filename=None):
+    """
+    Run one stage as a subprocess and return its exit code.
+    Output goes to the console, or to log_filename when given.
+    """
+    repo_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(p for p in [repo_root, env.get("PYTHONPATH")] if p)
+    cmd = [sys.executable, "-m", stage["module"], path] + stage["args"]
+    if log_filename is None:
+        return subprocess.run(cmd, env=env).returncode
+    with open(log_filename, "w", encoding="utf-8") as log:
+        return subprocess.run(cmd, env=env, stdout=log, stderr=subprocess.STDOUT).returncode
+
+
+def load_state(path):
+    """
+    Load run-state.json from the project directory, or an empty dict.
+    """
+    try:
+        with open(os.path.join(path, STATE_FILENAME), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (IOError, OSError, json.JSONDecodeError):
+        return {}
+
+
+def save_state(path, state):
+    """
+    Write run-state.json to the project directory.
+    """
+    with open(os.path.join(path, STATE_FILENAME), "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+
+
+def run_pipeline(path, config, selected=None, force=False, jobs=4, dry_run=False):
+    """
+    Run the stale stages of the pipeline in dependency order.
+
+    Args:
+        path (str): The project directory.
+        config (dict): The loaded config.yaml.
+        selected (list of str): Stage names to consider (default: all).
+        force (bool): Run the selected stages even if they are up to date.
+        jobs (int): Maximum number of stages run in parallel within a wave.
+        dry_run (bool): Only report what would run.
+
+    Returns:
+        list of dict: One report per selected stage with keys name, status, reason and seconds.
+    """
+    stages = {s["name"]: s for s in STAGES}
+    waves, deps = plan_waves(STAGES, config)
+    state = load_state(path)
+    reports = {}
+
+    for wave in waves:
+        to_run = []
+        for name in wave:
+            if selected is not None and name not in selected:
+                continue
+            failed = [d for d in deps[name] if reports.get(d, {}).get("status") in ("failed", "blocked")]
+            if failed:
+                reports[name] = {"name": name, "status": "blocked", "reason": f"{failed[0]} failed", "seconds": 0.0}
+                continue
+            reason = "forced" if force else is_stale(stages[name], path, config, state)
+            if reason is None:
+                reports[name] = {"name": name, "status": "skipped", "reason": "up to date", "seconds": 0.0}
+            elif dry_run:
+                reports[name] = {"name": name, "status": "would run", "reason": reason, "seconds": 0.0}
+            else:
+                to_run.append((name, reason))
+
+        def timed_run(item):
+            name, reason = item
+            log_filename = os.path.join(path, f"run.{name}.log") if len(to_run) > 1 else None
+            print(f"Running {name} ({reason})")
+            start = time.monotonic()
+            returncode = run_stage(stages[name], path, log_filename)
+            return name, reason, returncode, time.monotonic() - start
+
+        with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+            for name, reason, returncode, seconds in executor.map(timed_run, to_run):
+                status = "ran" if returncode == 0 else "failed"
+                reports[name] = {"name": name, "status": status, "reason": reason, "seconds": seconds}
+                if returncode == 0:
+                    # Hash after the run, so stages that rewrite their input in place are not rerun
+                    state[name] = stage_fingerprint(stages[name], path, config)
+                    save_state(path, state)
+
+    return [reports[s["name"]] for s in STAGES if s["name"] in reports]
+
+
+def print_report(reports):
+    """
+    Print the per-stage status and timing table.
+    """
+    width = max([len(r["name"]) for r in reports] + [5])
+    print(f"{'stage':<{width}}  {'status':<9}  {'seconds':>8}  reason")
+    for r in reports:
+        print(f"{r['name']:<{width}}  {r['status']:<9}  {r['seconds']:>8.1f}  {r['reason']}")
+    print(f"{'total':<{width}}  {'':<9}  {sum(r['seconds'] for r in reports):>8.1f}")
+
+
+def main(argv=None):
+    """
+    Main entry point for the pipeline orchestrator.
+
+    Returns:
+        int: 0 if every selected stage ran or was up to date, 1 otherwise.
+    """
+    parser = argparse.ArgumentParser(prog="gosr run", description="Run the stale stages of the GOSR pipeline.")
+    parser.add_argument("path", help="Project directory containing config.yaml")
+    parser.add_argument("--stages", help=f"Comma-separated stages to consider (default: all of {', '.join(s['name'] for s in STAGES)})")
+    parser.add_argument("--force", action="store_true", help="Run the selected stages even if they are up to date")
+    parser.add_argument("--jobs", type=int, default=4, help="Maximum number of stages run in parallel (default: 4)")
+    parser.add_argument("--dry-run", action="store_true", help="Only report which stages would run")
+    args = parser.parse_args(argv)
+
+    selected = None
+    if args.stages:
+        selected = [s.strip() for s in args.stages.split(",") if s.strip()]
+        unknown = set(selected) - {s["name"] for s in STAGES}
+        if unknown:
+            parser.error(f"unknown stages: {', '.join(sorted(unknown))}")
+
+    with open(os.path.join(args.path, "config.yaml"), "r", encoding="utf-8") as file:
+        config = yaml.safe_load(file)
+
+    reports = run_pipeline(args.path, config, selected, args.force, args.jobs, args.dry_run)
+    print_report(reports)
+    return 1 if any(r["status"] in ("failed", "blocked") for r in reports) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
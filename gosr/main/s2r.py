@@ -12,9 +12,12 @@ Workflow:
     1. Loads configuration from a YAML file in the specified project subdirectory (containing locality, country, etc.).
     2. Loads an existing solution tree (s.json) and any cached LLM results.
     3. For each solution node (leaf), queries GPT-4 for real-world efforts implementing that solution in the given locality/country.
-    4. Normalizes, deduplicates, and stores the resources in both the tree and a flat resource list.
-    5. Saves updated resources and tree structure to disk after each node is processed.
-    6. Optionally runs statistics and analysis on the collected resources.
+    4. Normalizes and stores the resources in both the tree and a flat resource list, linking rediscovered
+       resources to their existing id (see gosr.lib.resource_registry).
+    5. Saves the tree after each node is processed. New resources are upserted into the raw_resources
+       table of resources.db (see gosr.lib.resource_store) as they are found, and the table is exported
+       to resources-raw.json once, when the run ends or is interrupted.
+    6. Prints running totals of resources, unique programs and organizations.
 
 Usage:
     python s2r.py <project_subdirectory>
@@ -22,15 +25,28 @@ Usage:
 
 Outputs:
     - s2r.log: Log file with progress and errors, written to the project subdirectory.
-    - resources-raw.json: Flat list of all collected resources.
+    - resources-raw.json: Flat list of all collected resources, exported from resources.db at the end of the run.
+    - resources.db: SQLite resource store; its raw_resources table is updated as each resource is found.
     - r.json: Updated tree structure with resource nodes.
+    - r.index.json: Resource id <-> solution <-> theme index of r.json (see gosr.lib.resource_index).
     - cache4.json: Cache of LLM responses to avoid redundant API calls.
 
 Configuration (config.yaml):
     - locality: Name of the city or region for context.
     - country: Name of the country for context.
     - max_items_per_llm_call: (Optional) Limit on number of resources per LLM call.
-    - max_resource_loops: (Optional) Number of LLM attempts per solution node.
+    - max_resource_loops: (Optional) Maximum number of LLM attempts per solution node.
+    - min_new_resources: (Optional) Stop asking for more resources for a solution once a call returns
+      fewer than this many resources not already known (default 1).
+    - max_omit_tokens: (Optional) Token budget for the list of already known resources sent with
+      follow-up calls; the names most relevant to the solution are kept (default 400).
+    - cluster_solutions: (Optional) If true, equivalent solutions under different obstacles
+      (e.g. "Community Tech Workshops" and "Local Tech Workshops") are researched once and the
+      resources found are linked to every one of them (see gosr.lib.solution_clusters). Off by
+      default: solutions are matched on their titles only, so their descriptions may differ.
+    - solution_cluster_threshold: (Optional) Title similarity needed to cluster two solutions (default 0.9).
+    - incremental: (Optional) If true, solutions whose fingerprint (content, the keys above, prompt version)
+      is unchanged since the previous run have their resources grafted from the previous r.json.
 
 Dependencies:
     - Python 3.x
@@ -49,9 +65,15 @@ import logging.handlers
 import sys
 import yaml
 import os
-from gosr.lib.utils import call_gpt4, load_tree, tree, setup_openai
-from gosr.lib.r_stats import run_stats, r_normalize, get_program_value, get_organization_value
+import re
+from gosr.lib.utils import call_gpt4, load_tree, tree, setup_openai, log_subtree
+from gosr.lib.r_stats import r_normalize, get_program_value, get_organization_value, StatsAccumulator
 import gosr.lib.utils as utils
+from gosr.lib import incremental
+from gosr.lib.resource_registry import ResourceRegistry
+from gosr.lib.resource_store import ResourceStore, store_filename, load_resource_list
+from gosr.lib.resource_index import write_index
+from gosr.lib.solution_clusters import cluster_solutions, representatives
 from datetime import datetime
 
 # Set up the logger for this script
@@ -61,7 +83,19 @@ logger = logging.getLogger(__name__)
 config = None
 path = None
 global_resources_list = []
-max_resource_loops = 1  # Default number of LLM attempts per solution node
+registry = ResourceRegistry(global_resources_list)  # Indexes global_resources_list for deduplication
+stats = StatsAccumulator()  # Running totals and per-theme/per-solution breakdowns
+store = None  # ResourceStore opened by load_resources
+max_resource_loops = 1  # Default maximum number of LLM attempts per solution node
+min_new_resources = 1  # Stop looping once a call finds fewer new resources than this
+max_omit_tokens = 400  # Token budget for the "Please omit" list
+
+# Bump when the resources prompt changes so incremental runs regenerate everything
+PROMPT_VERSION = 1
+# Config keys the resources prompt and post-processing depend on
+FINGERPRINT_CONFIG_KEYS = [
+    "locality", "country", "max_items_per_llm_call", "max_resource_loops", "min_new_resources", "max_omit_tokens",
+]
 
 def next_number(curr_parent):
     """
@@ -85,27 +119,41 @@ def outline(children, indent=0):
                 print(f"{indent*'  '}{k}")
                 outline(v["children"], indent + 2)
 
-def print_tree(identifier, indent=0):
+def print_tree(identifier):
     """
-    Recursively print the tree starting from the given node identifier.
+    Log the tree starting from the given node identifier, one line per node.
     """
-    node = tree.get_node(identifier)
-    if node is not None:
-        logger.info(f"> {indent*'  '}> {node.data}")
-        for c in tree.children(identifier):
-            print_tree(c.identifier, indent + 2)
-    else:
+    if not log_subtree(tree, identifier, logger):
         logger.warning(f"Node with identifier '{identifier}' not found.")
 
 def save_tree(filename="r.json"):
     """
     Save the current tree structure to a JSON file in the project directory.
+    Returns the saved JSON.
     """
     j = json.loads(tree.to_json(with_data=True))
     if path is None:
         raise ValueError("The variable 'path' must be set to a valid directory string before calling save_tree.")
     with open(os.path.join(path, filename), "w", encoding='utf-8') as f:
         json.dump(j, f)
+    return j
+
+def node_title(node):
+    """
+    Return the title of a node whose data is a {"title", "description"} dict or a string.
+    """
+    return node.data.get("title") if isinstance(node.data, dict) else node.data
+
+def theme_of(node):
+    """
+    Return the title of the top-level obstacle (theme) a node belongs to.
+    """
+    theme = node
+    parent = tree.parent(node.identifier)
+    while parent is not None and tree.parent(parent.identifier) is not None:
+        theme = parent
+        parent = tree.parent(parent.identifier)
+    return node_title(theme)
 
 def add_resources(node):
     """
@@ -117,24 +165,111 @@ def add_resources(node):
     max_items = config.get("max_items_per_llm_call", None) if config is not None else None
     if max_items is not None and isinstance(resources_list, list):
         resources_list = resources_list[:max_items]
-    index = len(global_resources_list)
-    # Normalize and assign unique IDs to each resource, then add to global list
-    for r in resources_list:
-        rr = r_normalize(r)
-        rr["id"] = index
-        index += 1
-        global_resources_list.append(rr)
-    # Mark the node as a solution node
-    node.tag = "solution"
-    # Add each resource as a child node in the tree
-    for r in resources_list:
-        r_node = {"id": r["id"]}
-        tree.create_node(data=r_node, parent=node, tag="resource")
+    # The lock keeps ids unique when several workers add resources at once (see o2r.py)
+    with utils.tree_lock:
+        # Mark the node as a solution node
+        node.tag = "solution"
+        solution, theme = node_title(node), theme_of(node)
+        linked = set()
+        for r in resources_list:
+            # New resources get the next id; rediscovered ones link to the existing id
+            rr = r_normalize(r)
+            rid, is_new = registry.add(rr)
+            if is_new:
+                stats.add(rr)
+                if store is not None:
+                    store.upsert(rr, node.identifier)
+            if rid in linked:
+                continue
+            linked.add(rid)
+            stats.link(rid, node.identifier, theme, solution)
+            tree.create_node(data={"id": rid}, parent=node, tag="resource")
+
+def link_cluster(node, representative):
+    """
+    Link a solution node to the resources already found for an equivalent solution,
+    instead of querying the LLM again.
+    """
+    with utils.tree_lock:
+        node.tag = "solution"
+        solution, theme = node_title(node), theme_of(node)
+        for c in tree.children(representative.identifier):
+            if c.tag == "resource":
+                stats.link(c.data["id"], node.identifier, theme, solution)
+                tree.create_node(data={"id": c.data["id"]}, parent=node, tag="resource")
+
+def graft_resources(node, children):
+    """
+    Re-create the resource children a solution node had in the previous r.json, and count
+    their links as add_resources does.
+    """
+    with utils.tree_lock:
+        node.tag = "solution"
+        incremental.graft(node, children)
+        theme = theme_of(node)
+        for c in children:
+            stats.link_tree(c, theme, node.identifier, node_title(node))
+
+def estimate_tokens(text):
+    """
+    Rough token count: about four characters per token for English text.
+    """
+    return (len(text) + 3) // 4
+
+def words(text):
+    """
+    Return the set of lower-case words in a text.
+    """
+    return set(re.findall(r"[a-z0-9]+", str(text).lower()))
+
+def omit_text_for(found, solution):
+    """
+    Build the "Please omit" text for follow-up calls from the resources found so far.
+    Names sharing the most words with the solution (then the most recent) are kept,
+    up to max_omit_tokens, since those are the ones the LLM is most likely to repeat.
+    """
+    prefix = "Please omit the following, since we already know about them: "
+    names = []
+    for r in found:
+        name = get_program_value(r) if isinstance(r, dict) else None
+        if isinstance(name, str) and name not in names:
+            names.append(name)
+    solution_words = words(solution)
+    ranked = sorted(enumerate(names), key=lambda x: (-len(words(x[1]) & solution_words), -x[0]))
+    kept = []
+    used = estimate_tokens(prefix)
+    for _, name in ranked:
+        cost = estimate_tokens(name + ", ")
+        if used + cost > max_omit_tokens:
+            break
+        kept.append(name)
+        used += cost
+    return prefix + ", ".join(kept) if kept else ""
+
+def count_new(batch, seen):
+    """
+    Count the resources in a batch that are neither already in the registry nor in
+    an earlier batch for this solution (tracked in seen).
+    """
+    new = 0
+    for r in batch:
+        if not isinstance(r, dict):
+            continue
+        key = registry.keys(r)[:2]
+        if key in seen:
+            continue
+        seen.add(key)
+        if registry.find(r) is None:
+            new += 1
+    return new
 
 def get_resources(node):
     """
     Query the LLM for real-world efforts that implement the given solution node.
     Handles normalization and deduplication of results.
+
+    Follow-up calls (up to max_resource_loops) stop as soon as a call yields fewer than
+    min_new_resources resources that are not already known.
     """
     global locality, country
     # Compose the prompt for the LLM, asking for real-world efforts for this solution
@@ -144,7 +279,7 @@ Can you list and describe each real effort and then mention the organization imp
 """
 
     total_data = []  # Will accumulate all found resources
-    omit_list = []   # Track already found resources to avoid duplicates
+    seen = set()     # (program, organization) keys found for this solution so far
     omit_text = ""   # Text to tell the LLM what to omit
 
     # Try up to max_resource_loops times to get new resources from the LLM
@@ -174,48 +309,59 @@ Can you list and describe each real effort and then mention the organization imp
                 logger.warning(f"unknown data value returned: {data}")
                 break
             # Otherwise, process each key/value in the dict
+            batch = []
             for k, v in data.items():
                 if isinstance(v, list):
-                    # If value is a list, add all items to total_data
-                    total_data.extend(v)
+                    # If value is a list, add all items to the batch
+                    batch.extend(v)
                 elif isinstance(v, dict):
                     # If value is a dict, check if it's a valid resource and add
                     if get_program_value(v) is not None and get_organization_value(v) is not None:
-                        total_data.append(v)
+                        batch.append(v)
                     else:
                         logger.warning(f"dict value for key '{k}' does not have expected structure: {v}")
                 else:
                     logger.info(f"ignoring non-list, non-dict value for key '{k}': {v}")
+            total_data.extend(batch)
+            # Stop when this call added too few resources we did not already have
+            new = count_new(batch, seen)
+            logger.info(f"loop {i + 1}: {new} new of {len(batch)} resources")
+            if new < min_new_resources:
+                break
             # Prepare omit_text to avoid duplicates in subsequent LLM calls
-            omit_list = [d["name"] for d in total_data if "name" in d.keys()]
-            omit_text = (
-                "Please omit the following, since we already know about them: "
-                + ", ".join(omit_list)
-            )
+            omit_text = omit_text_for(total_data, node.data)
 
     return total_data
 
 def save_resources():
     """
-    Save the flat list of all collected resources to resources-raw.json.
+    Export the flat list of all collected resources from the raw_resources table to resources-raw.json.
     """
-    if path is None:
-        raise ValueError("The variable 'path' must be set to a valid directory string before calling save_resources.")
-    with open(os.path.join(path, "resources-raw.json"), "w", encoding='utf-8') as f:
-        json.dump(global_resources_list, f)
+    if path is None or store is None:
+        raise ValueError("load_resources must be called with 'path' set before calling save_resources.")
+    store.export_json(os.path.join(path, "resources-raw.json"))
 
 def load_resources():
     """
-    Load existing resources from resources.json if present.
+    Load the raw resources of a previous run, from the raw_resources table of resources.db
+    or, for projects made before the store, from resources-raw.json.
     Allows incremental runs without losing previous results.
     """
-    global global_resources_list
+    global global_resources_list, registry, stats, store
     if path is None:
         raise ValueError("The variable 'path' must be set to a valid directory string before calling load_resources.")
-    file_path = os.path.join(path, "resources.json")
-    if os.path.exists(file_path) and os.access(file_path, os.R_OK):
-        with open(file_path, "r", encoding='utf-8') as f:
-            global_resources_list = json.load(f)
+    try:
+        global_resources_list = load_resource_list(path, "resources-raw.json")
+    except FileNotFoundError:
+        global_resources_list = []
+    if store is not None:
+        store.close()
+    store = ResourceStore(store_filename(path), "raw_resources")
+    if global_resources_list and not store.count():
+        store.upsert_many(global_resources_list)
+    registry = ResourceRegistry(global_resources_list)
+    stats = StatsAccumulator()
+    stats.add_all(global_resources_list)
 
 def main():
     """
@@ -224,7 +370,7 @@ def main():
     processes each solution node, and saves results.
     """
     global config, path
-    global locality, country, max_resource_loops
+    global locality, country, max_resource_loops, min_new_resources, max_omit_tokens
 
     # Check for correct usage
     if len(sys.argv) != 2:
@@ -261,6 +407,8 @@ def main():
     locality = config["locality"]
     country = config["country"]
     max_resource_loops = config.get("max_resource_loops", max_resource_loops)
+    min_new_resources = config.get("min_new_resources", min_new_resources)
+    max_omit_tokens = config.get("max_omit_tokens", max_omit_tokens)
 
     # Load LLM cache if present
     try:
@@ -276,24 +424,56 @@ def main():
     logger.info("loading existing resources")
     load_resources()
 
+    # In incremental mode, index the previous r.json so unchanged solutions can be grafted.
+    # Grafted resource nodes keep their ids, which refer to the resources loaded above.
+    use_incremental = config.get("incremental", False)
+    previous = incremental.load_previous(path, "r.json", "solution", "resource") if use_incremental else ({}, {})
+    fingerprints = {}
+    reused = 0
+
     # Get all leaf nodes (solutions) in the tree
     leaf_list = tree.leaves()
+    # Equivalent solutions are researched once, by the first in tree order
+    clustered = {}
+    if config.get("cluster_solutions", False):
+        clusters = cluster_solutions(leaf_list, config.get("solution_cluster_threshold", 0.9))
+        clustered = representatives(clusters)
+        print(f"Clustered {len(leaf_list)} solutions into {len(clusters)} clusters")
     count = 0
-    # For each solution node, query for resources, update tree and resource list, and save progress
-    for l in leaf_list:
-        count = count + 1
-        print(f"{datetime.now().isoformat()} {count}/{len(leaf_list)} {100*count/len(leaf_list):.3g}%", l.data)
-        add_resources(l)
+    try:
+        # For each solution node, query for resources, update tree and resource list, and save progress
+        for l in leaf_list:
+            count = count + 1
+            print(f"{datetime.now().isoformat()} {count}/{len(leaf_list)} {100*count/len(leaf_list):.3g}% cache hits {utils.call_stats['cache_hits']}", l.data)
+            fp = incremental.fingerprint(l.data, config, FINGERPRINT_CONFIG_KEYS, PROMPT_VERSION)
+            children = incremental.lookup(l, previous, fp)
+            if children is not None:
+                graft_resources(l, children)
+                reused += 1
+            elif l.identifier in clustered:
+                link_cluster(l, clustered[l.identifier])
+            else:
+                add_resources(l)
+            fingerprints[incremental.content_key(l.data)] = fp
+            save_tree()
+            incremental.save_fingerprints(path, "r.json", fingerprints)
+            # Save the LLM cache after each node
+            with open(os.path.join(path, "cache4.json"), "w", encoding='utf-8') as f:
+                json.dump(utils.cache4, f)
+            # Print the running totals, maintained incrementally as resources are added
+            print(f"{stats.summary()} Duplicates linked: {registry.duplicates}")
+    finally:
+        # The raw_resources table is the per-node checkpoint; the JSON list is exported once
         save_resources()
-        save_tree()
-        # Save the LLM cache after each node
-        with open(os.path.join(path, "cache4.json"), "w", encoding='utf-8') as f:
-            json.dump(utils.cache4, f)
-        # Optionally run statistics on the collected resources
-        run_stats(global_resources_list)
-
-    # Save the final tree structure
-    save_tree()
+
+    # Save the final tree structure with its resource index
+    write_index(path, save_tree())
+    if use_incremental:
+        print(f"Reused {reused}/{len(leaf_list)} unchanged subtrees")
+    if clustered:
+        print(f"Linked {len(clustered)} solutions to an equivalent solution's resources instead of researching them")
+    for theme, n in stats.breakdown()["per_theme"].items():
+        print(f"theme: {theme}: {n} resources")
 
 if __name__ == "__main__":
     # Start the script
@@ -0,0 +1,130 @@
+"""
+Script: bench_url_validator.py
+
+Purpose:
+    Benchmarks gosr.lib.url_validator offline, against the local stand-in sites of
+    gosr.lib.url_standin instead of the internet, so changes to the validator can be measured
+    and compared. Synthetic resource URLs are spread over the sites with a realistic mix of
+    working, slow, redirected, HEAD-refusing (405/403), hanging, missing, dead, TLS-failing and
+    rate-limited pages.
+
+Usage:
+    python -m gosr.utils.bench_url_validator [--urls N] [--sites N] [--concurrency N] [--per-host N]
+                                             [--timeout SECONDS] [--seed N]
+
+Outputs:
+    - Throughput (URLs per second and requests per second), p50/p99 request latency and the
+      number of URLs found valid, printed to stdout.
+"""
+
+import argparse
+import random
+import sys
+
+from gosr.lib.url_standin import Site, StandInServer
+from gosr.lib.url_validator import URLValidator
+
+# (weight, kind) of the synthetic pages
+page_mix = [
+    (60, "ok"),
+    (10, "slow"),
+    (8, "redirect"),
+    (3, "no-head"),
+    (2, "head-forbidden"),
+    (5, "missing"),
+    (2, "hang"),
+    (4, "dead"),
+    (2, "tls"),
+    (4, "limited"),
+]
+
+
+def percentile(values, p):
+    """
+    Return the p-th percentile (0-100) of values, by nearest rank.
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(p / 100 * len(ordered)) - 1))]
+
+
+def synthetic_urls(server, n, rng, limited_site, dead_sites):
+    """
+    Return n URLs over the server's sites following page_mix.
+    """
+    kinds = [k for w, k in page_mix for _ in range(w)]
+    ordinary = [i for i in range(len(server.sites)) if i != limited_site]
+    urls = []
+    for i in range(n):
+        kind = rng.choice(kinds)
+        site = rng.choice(ordinary)
+        if kind == "ok":
+            urls.append(server.url(site, f"/page/{i}"))
+        elif kind == "slow":
+            urls.append(server.url(site, f"/slow/{rng.randint(20, 300)}?i={i}"))
+        elif kind == "redirect":
+            urls.append(server.url(site, f"/redirect/{rng.randint(1, 3)}?i={i}"))
+        elif kind in ("no-head", "head-forbidden"):
+            urls.append(server.url(site, f"/{kind}?i={i}"))
+        elif kind == "missing":
+            urls.append(server.url(site, f"/missing?i={i}"))
+        elif kind == "hang":
+            urls.append(server.url(site, f"/hang?i={i}"))
+        elif kind == "dead":
+            urls.append(rng.choice(dead_sites) + f"page/{i}")
+        elif kind == "tls":
+            urls.append(server.tls_url(site, f"/page/{i}"))
+        else:
+            urls.append(server.url(limited_site, f"/page/{i}"))
+    return urls
+
+
+def run_benchmark(n_urls=2000, n_sites=50, concurrency=64, per_host=4, timeout=2.0, seed=0):
+    """
+    Run the validator over synthetic URLs and return the measurements as a dict.
+    """
+    rng = random.Random(seed)
+    sites = [Site(hang_seconds=timeout * 2) for _ in range(n_sites)] + [Site(rate_limit=20)]
+    with StandInServer(sites) as server:
+        dead_sites = [server.dead_url() for _ in range(max(1, n_sites // 10))]
+        urls = synthetic_urls(server, n_urls, rng, len(sites) - 1, dead_sites)
+        validator = URLValidator(concurrency=concurrency, per_host=per_host, timeout=timeout, connect_timeout=timeout)
+        results = validator.run(urls)
+        requests = server.requests()
+    return {
+        "urls": len(urls),
+        "valid": sum(1 for r in results.values() if r is not None),
+        "requests": validator.probed,
+        "served": requests,
+        "seconds": validator.elapsed,
+        "urls_per_second": len(urls) / validator.elapsed,
+        "requests_per_second": validator.probed / validator.elapsed,
+        "p50": percentile(validator.latencies, 50),
+        "p99": percentile(validator.latencies, 99),
+    }
+
+
+def main():
+    """
+    Main entry point for the script.
+    Runs the benchmark and prints its measurements.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the URL validator against local stand-in sites.")
+    parser.add_argument("--urls", type=int, default=2000, help="Number of synthetic URLs (default 2000)")
+    parser.add_argument("--sites", type=int, default=50, help="Number of simulated sites (default 50)")
+    parser.add_argument("--concurrency", type=int, default=64, help="Requests in flight overall (default 64)")
+    parser.add_argument("--per-host", type=int, default=4, help="Requests in flight per host (default 4)")
+    parser.add_argument("--timeout", type=float, default=2.0, help="Seconds allowed per request (default 2)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the URL mix (default 0)")
+    args = parser.parse_args()
+
+    m = run_benchmark(args.urls, args.sites, args.concurrency, args.per_host, args.timeout, args.seed)
+    print(f"{m['urls']} URLs, {m['valid']} valid, {m['requests']} requests in {m['seconds']:.2f}s")
+    print(f"throughput: {m['urls_per_second']:.1f} URLs/s, {m['requests_per_second']:.1f} requests/s")
+    print(f"latency: p50 {1000 * m['p50']:.1f} ms, p99 {1000 * m['p99']:.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,69 @@
+"""
+Script: dedup_resources.py
+
+Purpose:
+    Marks fuzzy duplicates in resources.json (e.g. "KC Food Bank" and "Kansas City Food Bank, Inc.")
+    using gosr.lib.dedup. Each duplicate gets "dup": <id of the resource it duplicates>, the link
+    the converters already follow, so maps and mailing lists show the resource once.
+
+Usage:
+    python -m gosr.utils.dedup_resources <project_subdirectory> [--dry-run]
+    - <project_subdirectory> should contain config.yaml and resources.json.
+    - --dry-run prints the duplicate groups without saving.
+
+Configuration (config.yaml):
+    - locality: Used to expand its initialism (e.g. "KC" for Kansas City) before matching.
+    - dedup_threshold: (Optional) Match score needed to merge two resources (default 0.85).
+
+Outputs:
+    - resources.json, resources.db: Updated with "dup" links.
+"""
+
+import json
+import os
+import sys
+
+import yaml
+
+from gosr.lib.dedup import Deduplicator, default_threshold
+from gosr.lib.r_stats import get_program_value, get_organization_value
+from gosr.lib.resource_store import ResourceStore, load_resource_list, store_filename
+
+
+def main():
+    """
+    Main entry point for the script.
+    Loads config and resource list, marks fuzzy duplicates, and saves results.
+    """
+    args = [a for a in sys.argv[1:] if a != "--dry-run"]
+    dry_run = len(args) != len(sys.argv) - 1
+    if len(args) != 1:
+        print(f"Usage: {sys.argv[0]} path [--dry-run]")
+        return 1
+
+    path = args[0]
+    with open(os.path.join(path, "config.yaml"), "r", encoding='utf-8') as file:
+        config = yaml.safe_load(file)
+
+    resource_list = load_resource_list(path)
+
+    dedup = Deduplicator(config.get("locality"), config.get("dedup_threshold", default_threshold))
+    groups = dedup.find_groups(resource_list)
+    for group in groups:
+        print(" == ".join(
+            f'{resource_list[i]["id"]}: {get_program_value(resource_list[i])} ({get_organization_value(resource_list[i])})'
+            for i in group
+        ))
+    print(f"{sum(len(g) - 1 for g in groups)} duplicates in {len(groups)} groups of {len(resource_list)} resources")
+
+    if not dry_run:
+        dedup.mark_duplicates(resource_list)
+        with open(os.path.join(path, "resources.json"), "w", encoding='utf-8') as f:
+            json.dump(resource_list, f)
+        with ResourceStore(store_filename(path)) as store:
+            store.upsert_many(resource_list)
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+"""
+Script: geocode_resources.py
+
+Purpose:
+    Adds "lat" and "lng" to the resources in resources.json from their addresses, so map exports
+    (wp-go-pro, r2google-maps) can place markers without geocoding in the browser. Addresses are
+    normalized and deduplicated, looked up in geocode-cache.db first, and only new addresses
+    are sent to the configured geocoder (an offline gazetteer by default; see gosr.lib.geocode),
+    plus those another geocoder placed only by ZIP code or city, or not at all.
+
+Usage:
+    python -m gosr.utils.geocode_resources <project_subdirectory> [--retry-misses]
+    - <project_subdirectory> should contain config.yaml, resources.json and, for the default
+      geocoder, gazetteer.csv (key, lat, lng rows for addresses, ZIP codes or "city, st").
+
+Configuration (config.yaml):
+    - geocoder, gazetteer_file, nominatim_url: see gosr.lib.geocode.
+
+Outputs:
+    - resources.json and resources.db: "lat"/"lng" on every resource that could be placed.
+    - geocode-cache.db: Coordinates (or a recorded miss), match precision and geocoder for every
+      normalized address looked up.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+import yaml
+
+from gosr.lib.geocode import GeocodeCache, geocode_cache_filename, geocode_resources, make_geocoder
+from gosr.lib.resource_store import ResourceStore, load_resource_list, store_filename
+
+
+def main():
+    """
+    Main entry point for the script.
+    Geocodes the resource addresses and saves the coordinates.
+    """
+    parser = argparse.ArgumentParser(description="Add coordinates to the resources in resources.json.")
+    parser.add_argument("path", help="Project directory containing config.yaml and resources.json")
+    parser.add_argument("--retry-misses", action="store_true", help="Look up addresses the geocoder could not place before")
+    args = parser.parse_args()
+
+    path = args.path
+    with open(os.path.join(path, "config.yaml"), "r", encoding='utf-8') as file:
+        config = yaml.safe_load(file) or {}
+
+    try:
+        geocoder = make_geocoder(config, path)
+    except (FileNotFoundError, ValueError) as e:
+        print(e)
+        return 1
+
+    resource_list = load_resource_list(path)
+    with GeocodeCache(geocode_cache_filename(path)) as cache:
+        stats = geocode_resources(resource_list, geocoder, cache, retry_misses=args.retry_misses)
+    print(f"{stats['addresses']} addresses: {stats['cached']} cached, {stats['geocoded']} geocoded ({stats['refined']} refined), {stats['failed']} failed")
+    print(f"{stats['located']} resources located, {stats['unlocated']} not located")
+
+    with open(os.path.join(path, "resources.json"), "w", encoding='utf-8') as f:
+        json.dump(resource_list, f)
+    with ResourceStore(store_filename(path)) as store:
+        store.upsert_many(resource_list)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
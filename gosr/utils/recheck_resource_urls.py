@@ -4,19 +4,25 @@ Script: recheck_resource_urls.py
 Purpose:
     This script loads a list of resources from resources.json, checks the validity of each resource's website URL,
     and updates the resource list with the results. It attempts to verify each URL by making HTTP HEAD requests,
-    and if the specific URL fails, it tries the root domain. The script is useful for cleaning and validating
+    and if the specific URL fails, it tries the root domain. URLs are canonicalized and grouped by
+    site, each site's root is probed once, and the checks run concurrently (see gosr.lib.url_validator)
+    with pooled connections and global and per-host limits. The script is useful for cleaning and validating
     resource data before further analysis or reporting.
 
 Usage:
-    python recheck_resource_urls.py <project_subdirectory>
+    python recheck_resource_urls.py <project_subdirectory> [--timeout SECONDS] [--connect-timeout SECONDS]
+                                    [--concurrency N] [--per-host N] [--refresh]
     - <project_subdirectory> should contain config.yaml and resources.json.
 
 Outputs:
     - resources.json: Updated with "url_valid" flags and possibly corrected website URLs.
+    - resources.db: Each rechecked resource is upserted as soon as it changes.
+    - url-cache.db: Result of every URL probed, so reruns skip URLs checked within their TTL
+      (url_cache_ttl_days / url_cache_negative_ttl_days in config.yaml; see gosr.lib.url_cache).
 
 Dependencies:
     - Python 3.x
-    - requests
+    - httpx
     - python-docx
     - treelib
     - openai
@@ -24,190 +30,70 @@ Dependencies:
 
 """
 
+import argparse
 import json
-from urllib.parse import urlparse
 import sys
 import os
 import yaml
-import requests
 from datetime import datetime
 
+from gosr.lib.resource_store import ResourceStore, load_resource_list, store_filename
+from gosr.lib.url_cache import open_cache
+from gosr.lib.url_canonical import is_placeholder_url
+from gosr.lib.url_validator import URLValidator
+
 config = None
 path = None
 
 stage_name = "r"
+store = None
 
-# Aliases for mapping various possible keys in resource dicts to standard keys
-aliases = {
-    "program": [
-        "name", "Name", "program_name", "program", "event_name", "title", "Effort Name", "EffortName", "Effort",
-        "effort_name", "project_name", "Project Name", "description", "effort_description", "EffortDescription",
-        "Effort_Name", "ProgramName", "ProjectName", "effort"
-    ],
-    "description": [
-        "description", "Description", "effort_description", "effort", "EffortDescription"
-    ],
-    "organization": [
-        "organization", "Organization", "address", "Organization", "ImplementingOrganization", "OrganizationName", "Address"
-    ],
-    "address": ["address", "Address"],
-    "email": ["email", "Email", "email unavailable"],
-    "website": ["website", "Website", "web_page", "webpage", "WebPage", "Web Page"],
-    "id": ["id"],
-}
-
-def get_value(key, d):
-    """
-    Retrieve the value for a given key from a resource dict, using aliases and handling nested structures.
-    """
-    for k in aliases[key]:
-        if k in d:
-            if type(d[k]) is not dict:
-                return d[k]
-            else:
-                if key == 'address':
-                    for address_key in ['location', 'central_location']:
-                        if address_key in d[k]:
-                            return d[k][address_key]
-                    else:
-                        print(f"No key '{key}' found in {d}")
-                        return "N/A"
-
-    if key == 'email':
-        return 'N/A'
-    
-    # Handle organizations as a list
-    if "organizations" in d:
-        if key == 'organization':
-            key = 'name'
-        return ', '.join(o[key] for o in d["organizations"])
-
-    # Handle nested organization dicts
-    org = None
-    if "organization" in d:
-        org = d["organization"]
-    else:
-        try:
-            org = get_value("organization", d)
-        except RecursionError as e:
-            print(e)
-
-    if type(org) is dict:
-        if key == "organization":
-            val = org["name"]
-        else:
-            val = get_value(key, org)
-            if val is None:
-                print(f"No key '{key}' found in {d}")
-                sys.exit(1)
-        return val
-    else:
-        if key == "website" or key == "description":
-            return "N/A"
-        print(f"No key '{key}' found in {d}")
-        return None
-
-    return 'N/A'
-
-def normalize_resource_list():
-    """
-    Normalize the resource list to standard keys and mark duplicates.
-    """
-    global resource_list
-    dups = {}
-    keys = [
-        "id", "program", "description", "organization", "address", "email", "website"
-    ]
-    for i in range(len(resource_list)):
-        elem = {}
-        for k in keys:
-            elem[k] = get_value(k, resource_list[i])
-        dup_key = "|".join([elem["program"], elem["organization"]])
-        if dup_key in dups:
-            elem["dup"] = dups[dup_key]
-        else:
-            dups[dup_key] = elem["id"]
-        resource_list[i] = elem
-
-good_urls = {}
-
-def check_website(url):
+def progress(url, ret_url, done, total):
     """
-    Check if a website URL is valid by making a HEAD request.
-    If the specific URL fails, try the root domain.
-    Returns the working URL or None if not valid.
+    Print one line as each URL check finishes.
     """
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/102.0.0.0 Safari/537.36'
-    }
-
-    try:
-        # First, try checking the specific URL
-        response = requests.head(url, headers=headers, allow_redirects=True, timeout=2)
-        if response.status_code == 200:
-            return url
-        else:
-            # If the specific page is not found, check the root URL
-            root_url = "{uri.scheme}://{uri.netloc}/".format(uri=urlparse(url))
-            response = requests.head(root_url, headers=headers, allow_redirects=True, timeout=2)
-            if response.status_code == 200:
-                print('200 base', root_url, url)
-                return root_url
-            else:
-                print('failed retry', url)
-                return None
-    except requests.RequestException as e:
-        # Any request exception means the URL is not valid
-        return None
-
-def re_check_urls():
+    status = f"200 {ret_url}" if ret_url is not None else f"bad {url}"
+    print(f'{datetime.now().isoformat()} {done}/{total} {100*done/total:0.3g}% {status}')
+
+def re_check_urls(validator):
     """
-    Iterate through the resource list and re-check each website URL.
+    Re-check the website of every resource marked url_valid False, concurrently.
     Updates the "url_valid" field and corrects the website if needed.
+
+    Args:
+        validator (URLValidator): Runs the checks with its concurrency limits and timeouts.
     """
     global resource_list
 
-    bad_urls = {}
-    total_count = len(resource_list)
-    count = 0
-    for i in range(total_count):
-        count += 1
-        elem = resource_list[i]
-        url = elem["website"]
-        # Skip if url_valid is not present (never checked)
-        if "url_valid" not in elem:
+    to_check = {}  # resource index -> URL to check
+    for i, elem in enumerate(resource_list):
+        # Only resources checked before and marked invalid are rechecked
+        if "url_valid" not in elem or elem["url_valid"] != False:
+            continue
+        url = elem.get("website")
+        if type(url) is not str:
+            print('Need to fix non-str url', url)
             continue
-        else:
-            # Skip if already marked valid or not a simple False
-            if elem["url_valid"] == True:
-                continue
-            elif elem["url_valid"] != False:
-                continue
         # Skip obviously invalid or placeholder URLs
-        if " " in url or "N/A" in url or "Varies" in url or "n/a" in url or "TBD" in url:
+        if is_placeholder_url(url):
             print('del:', url)
             del elem["url_valid"]
+            store.upsert(elem)
             continue
-        
-        if type(url) is not str:
-            print('Need to fix non-str url', url)
-            continue
+        # The validator canonicalizes URLs and groups them by site
+        to_check[i] = url
+
+    print(f"checking {len(to_check)} resources")
+    results = validator.run(to_check.values(), on_result=progress)
+    print(f"checked in {validator.elapsed:.1f}s: {validator.probed} probed, {validator.cached} from url-cache.db")
 
-        # Use http instead of https for checking (sometimes more lenient)
-        url = url.replace('https','http')
-        if url in bad_urls:
-            print(f'{datetime.now().isoformat()} {count}/{total_count} {100*count/total_count:0.3g}% skipping bad {url}')
-        else:
-            print(f'{datetime.now().isoformat()} {count}/{total_count} {100*count/total_count:0.3g}% retrying {url}')
-        ret_url = check_website(url)
-        if ret_url is None:
-            bad_urls[url] = 'bad'
-        else:
-            print(f'{datetime.now().isoformat()} {count}/{total_count} {100*count/total_count:0.3g}% 200 {ret_url}')
+    for i, url in to_check.items():
+        ret_url = results[url]
+        if ret_url is not None:
+            elem = resource_list[i]
             elem["url_valid"] = True
             elem["website"] = ret_url
-
-        resource_list[i] = elem
+            store.upsert(elem)
 
 rcount = 0
 resource_keys = {}
@@ -219,27 +105,40 @@ def main():
     Main entry point for the script.
     Loads config and resource list, checks URLs, and saves results.
     """
-    global resource_list
-
-    if len(sys.argv) != 2:
-        print(f"Usage: {sys.argv[0]} path")
-        return 1
-
-    path = sys.argv[1]
-    # Load configuration (not used in this script, but may be for future extensions)
+    global resource_list, store
+
+    parser = argparse.ArgumentParser(description="Re-check resource websites marked invalid in resources.json.")
+    parser.add_argument("path", help="Project directory containing config.yaml and resources.json")
+    parser.add_argument("--timeout", type=float, default=10.0, help="Total seconds allowed per request (default 10)")
+    parser.add_argument("--connect-timeout", type=float, default=3.0, help="Seconds allowed to connect (default 3)")
+    parser.add_argument("--concurrency", type=int, default=64, help="Requests in flight overall (default 64)")
+    parser.add_argument("--per-host", type=int, default=4, help="Requests in flight per host (default 4)")
+    parser.add_argument("--refresh", action="store_true", help="Ignore cached results in url-cache.db and probe every URL")
+    args = parser.parse_args()
+
+    path = args.path
+    # Load configuration (URL cache TTLs)
     with open(os.path.join(path, "config.yaml"), "r", encoding='utf-8') as file:
         config = yaml.safe_load(file)
 
-    # Load the resource list from resources.json
-    with open(os.path.join(path, "resources.json"), "r", encoding='utf-8') as f:
-        resource_list = json.load(f)
+    # Load the resource list from resources.db (or resources.json if the table is empty)
+    resource_list = load_resource_list(path)
+    store = ResourceStore(store_filename(path))
 
     print("re_check_urls")
-    re_check_urls()
+    with open_cache(path, config, refresh=args.refresh) as cache:
+        re_check_urls(URLValidator(
+            concurrency=args.concurrency,
+            per_host=args.per_host,
+            timeout=args.timeout,
+            connect_timeout=args.connect_timeout,
+            cache=cache,
+        ))
 
     # Save the updated resource list back to resources.json
     with open(os.path.join(path, "resources.json"), "w", encoding='utf-8') as f:
         json.dump(resource_list, f)
+    store.close()
 
     return 0
 
@@ -0,0 +1,94 @@
+"""
+Script: revalidate_resource_urls.py
+
+Purpose:
+    Rechecks resource websites incrementally, for a scheduled (e.g. daily) job, instead of
+    rechecking every link before each publish. Websites are ranked by how long ago
+    url-cache.db last checked them, how often they failed in a row and whether the resource is
+    linked in r.json, i.e. shown on the exported maps (see gosr.lib.revalidation), and the most urgent are probed until a
+    request or time budget is spent. Each run costs a small, bounded amount and the oldest
+    results are always refreshed first.
+
+Usage:
+    python -m gosr.utils.revalidate_resource_urls <project_subdirectory> [--max-requests N] [--max-seconds S]
+                                                  [--timeout SECONDS] [--concurrency N] [--per-host N] [--dry-run]
+    - <project_subdirectory> should contain config.yaml and resources.json (r.json, when present,
+      tells which resources are linked).
+
+Configuration (config.yaml):
+    - revalidate_max_requests: (Optional) Request budget per run when --max-requests is not given (default 500).
+    - revalidate_max_seconds: (Optional) Time budget per run when --max-seconds is not given (default 300).
+
+Outputs:
+    - resources.json and resources.db: "url_valid" and corrected websites of the rechecked resources.
+    - url-cache.db: The result, time and consecutive failure count of every URL probed.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+import yaml
+
+from gosr.lib.resource_index import load_index
+from gosr.lib.resource_store import ResourceStore, load_resource_list, store_filename
+from gosr.lib.revalidation import linked_resources, revalidate, schedule
+from gosr.lib.url_cache import open_cache
+from gosr.lib.url_validator import URLValidator
+from gosr.utils.recheck_resource_urls import progress
+
+default_max_requests = 500
+default_max_seconds = 300
+
+
+def main():
+    """
+    Main entry point for the script.
+    Ranks the resource websites, rechecks the most urgent within the budget and saves the results.
+    """
+    parser = argparse.ArgumentParser(description="Recheck the most stale resource websites within a budget.")
+    parser.add_argument("path", help="Project directory containing config.yaml and resources.json")
+    parser.add_argument("--max-requests", type=int, default=None, help=f"Requests to send at most (default {default_max_requests})")
+    parser.add_argument("--max-seconds", type=float, default=None, help=f"Seconds to run at most (default {default_max_seconds})")
+    parser.add_argument("--timeout", type=float, default=10.0, help="Total seconds allowed per request (default 10)")
+    parser.add_argument("--concurrency", type=int, default=64, help="Requests in flight overall (default 64)")
+    parser.add_argument("--per-host", type=int, default=4, help="Requests in flight per host (default 4)")
+    parser.add_argument("--dry-run", action="store_true", help="Print the most urgent websites without checking them")
+    args = parser.parse_args()
+
+    path = args.path
+    with open(os.path.join(path, "config.yaml"), "r", encoding='utf-8') as file:
+        config = yaml.safe_load(file) or {}
+    max_requests = args.max_requests if args.max_requests is not None else config.get("revalidate_max_requests", default_max_requests)
+    max_seconds = args.max_seconds if args.max_seconds is not None else config.get("revalidate_max_seconds", default_max_seconds)
+
+    resource_list = load_resource_list(path)
+    linked = set()
+    if os.path.exists(os.path.join(path, "r.json")):
+        linked = linked_resources(resource_list, load_index(path))
+
+    # Scheduled URLs are probed even when their cached result is still within its TTL
+    with open_cache(path, config, refresh=True) as cache:
+        plan = schedule(resource_list, cache, linked)
+        print(f"{len(plan)} websites, {len(linked)} linked resources; budget {max_requests} requests, {max_seconds}s")
+        if args.dry_run:
+            for p, i in plan[:max_requests]:
+                print(f"{p:8.1f} {resource_list[i]['id']} {resource_list[i]['website']}")
+            return 0
+
+        validator = URLValidator(concurrency=args.concurrency, per_host=args.per_host, timeout=args.timeout, cache=cache)
+        checked = revalidate(resource_list, plan, validator, max_requests, max_seconds, on_result=progress)
+
+    valid = sum(1 for i in checked if resource_list[i]["url_valid"])
+    print(f"rechecked {len(checked)} of {len(plan)} websites with {validator.probed} requests: {valid} valid")
+
+    with open(os.path.join(path, "resources.json"), "w", encoding='utf-8') as f:
+        json.dump(resource_list, f)
+    with ResourceStore(store_filename(path)) as store:
+        store.upsert_many([resource_list[i] for i in checked])
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+"""
+Script: spatial_query.py
+
+Purpose:
+    Answers proximity questions over the geocoded resources (see gosr.utils.geocode_resources)
+    and writes server-side marker clusters for the map exports, using the grid spatial index
+    of gosr.lib.spatial_index. Neighbourhoods come from the same CSV csv2geojsonnl.py converts
+    (a "name" column and a "WKT" polygon column).
+
+Usage:
+    python -m gosr.utils.spatial_query <project_subdirectory> --near NAME [--km 2] [--neighbourhoods FILE]
+    python -m gosr.utils.spatial_query <project_subdirectory> --radius LAT LNG KM
+    python -m gosr.utils.spatial_query <project_subdirectory> --bbox SOUTH WEST NORTH EAST
+    python -m gosr.utils.spatial_query <project_subdirectory> --clusters [--zooms 8-15]
+
+Outputs:
+    - The matching resources (id, program, organization and, for --radius, distance), printed to stdout.
+    - map-clusters.json (--clusters): {zoom: [{"lat", "lng", "count", "ids"}]}, one marker per
+      cluster per zoom level, so map pages need not load every resource. No export reads it
+      yet: wp-go-pro writes a WP Go Maps import of fixed markers, which has no per-zoom
+      clusters, so it still sends every marker.
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+
+from gosr.lib.resource_store import load_resource_list
+from gosr.lib.spatial_index import SpatialIndex
+from gosr.lib.wkt import parse_wkt
+
+NEIGHBOURHOODS_FILENAME = "Neighborhoods KC.csv"
+CLUSTERS_FILENAME = "map-clusters.json"
+
+# WKT columns can be larger than the csv module's default field limit
+csv.field_size_limit(2 ** 31 - 1)
+
+
+def load_neighbourhoods(filename):
+    """
+    Return {name: geometry dict} for the rows of a neighbourhood CSV with "name" and "WKT" columns.
+    """
+    neighbourhoods = {}
+    with open(filename, "r", newline='', encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            if row.get("name") and row.get("WKT"):
+                neighbourhoods[row["name"]] = parse_wkt(row["WKT"])
+    return neighbourhoods
+
+
+def zoom_range(text):
+    """
+    Parse "8-15" (or "12") into a range of zoom levels.
+    """
+    low, _, high = text.partition("-")
+    return range(int(low), int(high or low) + 1)
+
+
+def print_resources(resources, ids, distances=None):
+    for id in ids:
+        r = resources[id]
+        distance = f"{distances[id]:6.2f} km  " if distances else ""
+        print(f"{distance}{id}  {r.get('program')} ({r.get('organization')})")
+    print(f"{len(ids)} resources")
+
+
+def main():
+    """
+    Main entry point for the script.
+    Builds the spatial index over the geocoded resources and runs the requested query.
+    """
+    parser = argparse.ArgumentParser(description="Proximity queries and marker clusters over geocoded resources.")
+    parser.add_argument("path", help="Project directory containing resources.json with lat/lng")
+    query = parser.add_mutually_exclusive_group(required=True)
+    query.add_argument("--near", metavar="NAME", help="Resources in or near a neighbourhood")
+    query.add_argument("--radius", nargs=3, type=float, metavar=("LAT", "LNG", "KM"), help="Resources within KM of a point")
+    query.add_argument("--bbox", nargs=4, type=float, metavar=("SOUTH", "WEST", "NORTH", "EAST"), help="Resources in a bounding box")
+    query.add_argument("--clusters", action="store_true", help=f"Write {CLUSTERS_FILENAME} with marker clusters per zoom level")
+    parser.add_argument("--km", type=float, default=2.0, help="Distance from the neighbourhood boundary for --near (default 2)")
+    parser.add_argument("--neighbourhoods", default=NEIGHBOURHOODS_FILENAME, help=f"Neighbourhood CSV in the project directory (default {NEIGHBOURHOODS_FILENAME!r})")
+    parser.add_argument("--zooms", type=zoom_range, default=zoom_range("8-15"), help="Zoom levels for --clusters (default 8-15)")
+    args = parser.parse_args()
+
+    path = args.path
+    resource_list = load_resource_list(path)
+    resources = {r["id"]: r for r in resource_list}
+    index = SpatialIndex.from_resources(resource_list)
+    print(f"{len(index)} of {len(resource_list)} resources have coordinates")
+
+    if args.near is not None:
+        neighbourhoods = load_neighbourhoods(os.path.join(path, args.neighbourhoods))
+        if args.near not in neighbourhoods:
+            print(f"No neighbourhood {args.near!r} in {args.neighbourhoods}")
+            return 1
+        print_resources(resources, index.near_polygon(neighbourhoods[args.near], args.km))
+    elif args.radius is not None:
+        found = index.within_radius(*args.radius)
+        print_resources(resources, [id for id, _ in found], dict(found))
+    elif args.bbox is not None:
+        print_resources(resources, index.within_bbox(*args.bbox))
+    else:
+        levels = {z: index.cluster(z) for z in args.zooms}
+        with open(os.path.join(path, CLUSTERS_FILENAME), "w", encoding='utf-8') as f:
+            json.dump(levels, f)
+        for z, clusters in levels.items():
+            print(f"zoom {z}: {len(clusters)} markers")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
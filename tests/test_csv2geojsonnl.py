@@ -0,0 +1,119 @@
+import csv
+import io
+import json
+
+import pytest
+
+from gosr.convert.csv2geojsonnl import convert, value
+from gosr.lib.wkt import parse_wkt, simplify
+
+wkts = [
+    "POINT (-94.58 39.1)",
+    "POINT Z (1 2 3)",
+    "MULTIPOINT ((1 2), (3 4))",
+    "MULTIPOINT (1 2, 3 4)",
+    "LINESTRING (1e5 2, 3 4E-2)",
+    "POLYGON((0. 0,.5 0,1 1,0 0))",
+    "POLYGON ( ( -1.5  2 ,3 4 , 5 6, -1.5 2) , (5 6, 7 8, 9 10, 5 6) )",
+    "MULTIPOLYGON (((0 0, 1 0, 1 1, 0 0)), ((5 5, 6 5, 6 6, 5 5)))",
+    "MULTILINESTRING ((1 2, 3 4), (5 6, 7 8))",
+    "LINESTRING EMPTY",
+]
+
+def csv_text(rows):
+    f = io.StringIO()
+    writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+    writer.writeheader()
+    writer.writerows(rows)
+    f.seek(0)
+    return f
+
+def test_parse_wkt():
+    assert parse_wkt(wkts[1]) == {"type": "Point", "coordinates": [1, 2]}
+    assert parse_wkt(wkts[2]) == parse_wkt(wkts[3]) == {"type": "MultiPoint", "coordinates": [[1, 2], [3, 4]]}
+    assert parse_wkt(wkts[4]) == {"type": "LineString", "coordinates": [[1e5, 2], [3, 0.04]]}
+    assert parse_wkt(wkts[5]) == {"type": "Polygon", "coordinates": [[[0, 0], [0.5, 0], [1, 1], [0, 0]]]}
+    assert parse_wkt(wkts[6])["coordinates"][1] == [[5, 6], [7, 8], [9, 10], [5, 6]]
+    assert [len(p[0]) for p in parse_wkt(wkts[7])["coordinates"]] == [4, 4]
+    assert parse_wkt(wkts[9]) is None
+
+malformed = [
+    "POLYGON ((1 2, 3))",
+    "POLYGON ((1 2, 3 4)) junk",
+    "POLYGON (())",
+    "LINESTRING (1 2, x 4)",
+    # A bare position where a ring belongs
+    "POLYGON ((1 2, 3 4, 5 6, 1 2), 7 8)",
+    "POLYGON (7 8, (1 2, 3 4, 5 6, 7 8))",
+    # Too many numbers, or nested one level too deep
+    "POINT (1 2 3 4)",
+    "POINT Z (1 2)",
+    "LINESTRING ((1 2, 3 4))",
+    "POINT ((1 2))",
+    "POINT (1 2, 3 4)",
+    "MULTIPOINT ((1 2, 3 4), (5 6))",
+]
+
+def test_malformed_wkt_is_rejected():
+    for text in malformed:
+        with pytest.raises(ValueError):
+            parse_wkt(text)
+    rows = [{"name": str(i), "WKT": text} for i, text in enumerate(malformed)]
+    assert convert(csv_text(rows), io.StringIO(), vectorized=False)["invalid"] == len(malformed)
+
+def test_simplify_keeps_rings_closed():
+    # A square with many points along each edge
+    edge = [i / 10 for i in range(10)]
+    ring = [[x, 0] for x in edge] + [[1, y] for y in edge] + [[1 - x, 1] for x in edge] + [[0, 1 - y] for y in edge] + [[0, 0]]
+    square = simplify({"type": "Polygon", "coordinates": [ring]}, 0.01)
+    assert square["coordinates"] == [[[0, 0], [1, 0], [1, 1], [0, 1], [0, 0]]]
+    triangle = [[0, 0], [1, 0.001], [2, 0], [0, 0]]
+    assert simplify({"type": "Polygon", "coordinates": [triangle]}, 0.1)["coordinates"] == [triangle]
+
+def test_convert_streams_features():
+    rows = [
+        {"name": "Downtown", "description": "", "population": "1200", "WKT": wkts[6]},
+        {"name": "", "description": "", "population": "", "WKT": "POLYGON ((0 0, 1"},
+        {"name": "Library", "description": "Main branch", "population": "2.5", "WKT": wkts[0]},
+    ]
+    out, points = io.StringIO(), io.StringIO()
+    stats = convert(csv_text(rows), out, chunk_size=2, points=points, vectorized=False)
+    assert stats == {"features": 3, "invalid": 1}
+
+    features = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [f["type"] for f in features] == ["Feature"] * 3
+    assert features[0]["geometry"] == parse_wkt(wkts[6])
+    assert features[0]["properties"] == {"name": "Downtown", "description": "Downtown", "population": 1200}
+    assert features[1]["geometry"] is None
+    assert features[1]["properties"] == {"name": "", "description": "", "population": None}
+    assert features[2]["properties"]["population"] == 2.5
+
+    point_rows = list(csv.DictReader(io.StringIO(points.getvalue())))
+    assert point_rows == [{"latitude": "39.1", "longitude": "-94.58", "name": "Library", "description": "Main branch", "population": "2.5"}]
+
+def test_convert_simplifies_and_checks_column():
+    ring = ", ".join(f"{i / 100} {0.00001 * (i % 2)}" for i in range(101)) + ", 1 1, 0 0"
+    rows = [{"name": "Strip", "WKT": f"POLYGON (({ring}))"}]
+    out = io.StringIO()
+    convert(csv_text(rows), out, tolerance=0.001, vectorized=False)
+    assert json.loads(out.getvalue())["geometry"]["coordinates"] == [[[0, 0], [1, 0], [1, 1], [0, 0]]]
+    with pytest.raises(ValueError):
+        convert(csv_text(rows), io.StringIO(), wkt_column="geometry", vectorized=False)
+
+def test_values_stay_valid_json():
+    assert [value(v) for v in ["12", "-0.5", "2E3", "", "00123", "NaN", "inf", "1e999", "1_000"]] == [
+        12, -0.5, 2000.0, None, "00123", "NaN", "inf", "1e999", "1_000"]
+    out = io.StringIO()
+    convert(csv_text([{"name": "Nan", "zip": "00123", "WKT": "POINT (1 2)"}]), out, vectorized=False)
+    assert json.loads(out.getvalue(), parse_constant=pytest.fail)["properties"] == {"name": "Nan", "zip": "00123"}
+
+def test_vectorized_matches_python():
+    pytest.importorskip("shapely", minversion="2")
+    rows = [{"name": str(i), "WKT": text} for i, text in enumerate(wkts + ["", "garbage"])]
+    for tolerance in (0, 0.5):
+        outputs = []
+        for vectorized in (True, False):
+            out = io.StringIO()
+            stats = convert(csv_text(rows), out, tolerance=tolerance, vectorized=vectorized)
+            outputs.append((stats, [json.loads(line) for line in out.getvalue().splitlines()]))
+        assert outputs[0] == outputs[1]
@@ -0,0 +1,52 @@
+from gosr.lib import dedup
+from gosr.lib.dedup import Deduplicator, minhash, normalize_text, shingles
+
+
+def test_normalize_text_expands_locality_initialism_and_drops_suffixes():
+    aliases = dedup.locality_aliases("Kansas City")
+    assert aliases == {"kc": "kansas city"}
+    assert normalize_text("KC Food Bank", aliases) == normalize_text("Kansas City Food Bank, Inc.", aliases)
+
+def test_similar_names_share_most_minhash_bins():
+    a = minhash(shingles("kansas city community food pantry"))
+    b = minhash(shingles("kansas city community food pantries"))
+    c = minhash(shingles("youth soccer league"))
+    assert sum(x == y for x, y in zip(a, b)) > sum(x == y for x, y in zip(a, c))
+
+def test_mark_duplicates():
+    resources = [
+        {"id": 0, "program": "KC Food Bank", "organization": "Harvesters", "website": "https://www.harvesters.org/give"},
+        {"id": 1, "program": "Kansas City Food Bank, Inc.", "organization": "Harvesters", "website": "http://harvesters.org"},
+        {"id": 2, "program": "Youth Soccer", "organization": "KC Parks", "website": "https://kcparks.org"},
+        {"id": 3, "program": "Adult Soccer", "organization": "KC Parks", "website": "https://kcparks.org"},
+        {"id": 4, "program": "Food Bank", "organization": "Harvesters", "dup": 0},
+    ]
+    marked = Deduplicator("Kansas City").mark_duplicates(resources)
+    assert marked == 1
+    assert resources[1]["dup"] == 0
+    assert "dup" not in resources[2] and "dup" not in resources[3]
+    assert resources[4]["dup"] == 0
+
+def test_shared_domain_alone_does_not_merge():
+    resources = [
+        {"id": i, "program": f"{name} Program", "organization": "City of Springfield", "website": "https://springfield.gov"}
+        for i, name in enumerate(["Housing Assistance", "Senior Meals", "Tree Planting"])
+    ]
+    assert Deduplicator("Springfield").find_groups(resources) == []
+
+def test_candidate_pairs_grow_linearly():
+    # Every resource shares one domain bucket, as on a city government site; sorted
+    # neighbourhood blocking compares each with a few neighbours instead of all of them
+    def features(n):
+        d = Deduplicator()
+        return d, [d.features({"id": i, "program": f"Program {i}", "organization": "City of Springfield",
+                               "website": "https://springfield.gov"}) for i in range(n)]
+    counts = []
+    for n in (1000, 4000):
+        d, f = features(n)
+        pairs = d.candidate_pairs(f)
+        # At most `window` neighbours per resource in each of its buckets
+        assert len(pairs) <= n * dedup.window * (dedup.bands + 2)
+        counts.append(len(pairs))
+    # All pairs would grow 16 times
+    assert counts[1] <= 5 * counts[0]
@@ -44,4 +44,51 @@ def test_print_tree_logs_warning(monkeypatch, caplog):
     g2o.print_tree("notfound")
     # Check for the exact warning message
     expected = "Node with identifier 'notfound' not found in tree."
-    assert any(expected in record.getMessage() and record.levelname == "WARNING" for record in caplog.records)
\ No newline at end of file
+    assert any(expected in record.getMessage() and record.levelname == "WARNING" for record in caplog.records)
+
+def test_expand_frontier_builds_levels_with_limits(monkeypatch, tmp_path):
+    from treelib.tree import Tree
+    from gosr.lib import utils
+    tree = Tree()
+    monkeypatch.setattr(utils, "tree", tree)
+    monkeypatch.setattr(g2o, "tree", tree)
+    monkeypatch.setattr(g2o, "save_cache4", lambda path: None)
+    g2o.path = str(tmp_path)
+    g2o.config = {"max_items_per_level": [3, 2], "max_nodes": 12, "max_workers": 4}
+    def fake_call(msg):
+        return [{"title": f"sub {i}", "description": msg[:30]} for i in range(5)]
+    monkeypatch.setattr(g2o, "call_gpt4", fake_call)
+    tree.create_node(data="Goal", identifier="root", tag="root")
+    frontier = [tree.create_node(data=f"Obstacle {i}", parent="root", tag="obstacle") for i in range(2)]
+
+    level1 = g2o.expand_frontier(frontier, "Goal", 1)
+    assert len(level1) == 6
+    assert [len(tree.children(n.identifier)) for n in frontier] == [3, 3]
+
+    level2 = g2o.expand_frontier(level1, "Goal", 2)
+    # 9 nodes so far, so max_nodes leaves room for only 3 more
+    assert len(level2) == 3
+    assert tree.size() == 12
+
+def test_expand_frontier_names_nodes_whose_response_fails(monkeypatch, tmp_path):
+    import pytest
+    from treelib.tree import Tree
+    from gosr.lib import utils
+    tree = Tree()
+    monkeypatch.setattr(utils, "tree", tree)
+    monkeypatch.setattr(g2o, "tree", tree)
+    monkeypatch.setattr(g2o, "save_cache4", lambda path: None)
+    g2o.path = str(tmp_path)
+    g2o.config = {"max_workers": 2}
+    def fake_call(msg):
+        if "Bad" in msg:
+            return [{"name": "no title", "text": "no description"}]
+        return [{"title": "sub", "description": "d"}]
+    monkeypatch.setattr(g2o, "call_gpt4", fake_call)
+    tree.create_node(data="Goal", identifier="root", tag="root")
+    frontier = [tree.create_node(data=d, identifier=d, parent="root", tag="obstacle") for d in ("Good", "Bad")]
+
+    with pytest.raises(ValueError, match="nodes Bad"):
+        g2o.expand_frontier(frontier, "Goal", 1)
+    with pytest.raises(ValueError, match="Node should be dict"):
+        g2o.fetch_causative4(tree.create_node(data=["not", "a", "dict"], parent="root"), "Goal")
@@ -0,0 +1,92 @@
+import httpx
+
+from gosr.lib.geocode import GazetteerGeocoder, GeocodeCache, NominatimGeocoder, city_state_keys, geocode_resources
+from gosr.lib.resource_registry import normalize_address
+
+def test_normalize_address():
+    assert normalize_address("123 Main St., Omaha, NE 68102, USA") == "123 main st omaha ne 68102"
+    assert normalize_address("123  main street,omaha , ne 68102") == "123 main st omaha ne 68102"
+    assert normalize_address("1 St. Louis Ave, St. Louis, MO") == "1 st louis ave st louis mo"
+    assert normalize_address("N/A") == "" and normalize_address(None) == "" and normalize_address("Online") == ""
+    assert city_state_keys("1 main st kansas city mo 64105 1234") == ["st kansas city mo", "kansas city mo", "city mo"]
+    assert city_state_keys("po box 12") == []
+
+def test_gazetteer_matches_address_then_zip_then_city(tmp_path):
+    gazetteer = tmp_path / "gazetteer.csv"
+    gazetteer.write_text('key,lat,lng\n"1 Main St, Kansas City, MO 64105",39.1,-94.5\n64106,39.2,-94.6\n"Independence, MO",39.0,-94.4\n')
+    geocoder = GazetteerGeocoder.from_csv(str(gazetteer))
+    assert geocoder.geocode(normalize_address("1 Main Street, Kansas City, MO 64105")) == (39.1, -94.5, "address")
+    assert geocoder.geocode(normalize_address("500 E 8th St, Kansas City, MO 64106")) == (39.2, -94.6, "zip")
+    assert geocoder.geocode(normalize_address("2 Elm St, Independence, MO")) == (39.0, -94.4, "city")
+    assert geocoder.geocode(normalize_address("2 Elm St, Nowhere, KS")) is None
+
+def test_geocode_resources_dedupes_and_never_regeocodes(tmp_path):
+    class Counting:
+        name = "counting"
+
+        def __init__(self):
+            self.asked = []
+
+        def geocode(self, address):
+            self.asked.append(address)
+            return (39.1, -94.5, "address") if "main" in address else None
+
+    resources = [
+        {"id": 0, "address": "1 Main St, Kansas City, MO"},
+        {"id": 1, "address": "1 main street, kansas city, mo"},
+        {"id": 2, "address": "9 Lost Rd, Kansas City, MO"},
+        {"id": 3, "address": "N/A"},
+    ]
+    geocoder = Counting()
+    with GeocodeCache(str(tmp_path / "geocode-cache.db")) as cache:
+        stats = geocode_resources(resources, geocoder, cache)
+        assert len(geocoder.asked) == 2 and stats["located"] == 2 and stats["unlocated"] == 1
+        assert resources[1]["lat"] == 39.1 and "lat" not in resources[2]
+        stats = geocode_resources(resources, geocoder, cache)
+        assert len(geocoder.asked) == 2 and stats["cached"] == 2
+        geocode_resources(resources, geocoder, cache, retry_misses=True)
+        assert geocoder.asked[2:] == ["9 lost rd kansas city mo"]
+
+def test_nominatim_failures_are_not_cached(tmp_path):
+    responses = [httpx.Response(503), httpx.Response(200, json=[{"lat": "39.1", "lon": "-94.5"}])]
+    geocoder = NominatimGeocoder("http://stand-in", min_interval=0, transport=httpx.MockTransport(lambda request: responses.pop(0)))
+    resources = [{"id": 0, "address": "1 Main St, Kansas City, MO"}]
+    with GeocodeCache(str(tmp_path / "geocode-cache.db")) as cache:
+        assert geocode_resources(resources, geocoder, cache)["failed"] == 1 and cache.count() == 0
+        geocode_resources(resources, geocoder, cache)
+    assert (resources[0]["lat"], resources[0]["lng"]) == (39.1, -94.5)
+
+def test_approximate_entries_are_refined_by_another_geocoder(tmp_path):
+    class Fixed:
+        def __init__(self, name, results):
+            self.name, self.results, self.asked = name, results, []
+
+        def geocode(self, address):
+            self.asked.append(address)
+            return self.results.get(address)
+
+    resources = [
+        {"id": 0, "address": "1 Main St, Kansas City, MO"},
+        {"id": 1, "address": "2 Elm St, Kansas City, MO"},
+        {"id": 2, "address": "3 Oak St, Kansas City, MO"},
+        {"id": 3, "address": "9 Lost Rd, Kansas City, MO"},
+    ]
+    main, elm, oak, lost = (normalize_address(r["address"]) for r in resources)
+    gazetteer = Fixed("gazetteer", {main: (39.1, -94.5, "address"), elm: (39.0, -94.0, "city"), oak: (39.0, -94.0, "city")})
+    precise = Fixed("nominatim", {elm: (39.11, -94.51, "address"), oak: (38.0, -93.0, "city"), lost: (39.2, -94.6, "address")})
+    with GeocodeCache(str(tmp_path / "geocode-cache.db")) as cache:
+        geocode_resources(resources, gazetteer, cache)
+        assert cache.get(elm) == {"coordinates": (39.0, -94.0), "precision": "city", "geocoder": "gazetteer"}
+        # The same geocoder is not asked again
+        assert geocode_resources(resources, gazetteer, cache)["cached"] == 4
+
+        stats = geocode_resources(resources, precise, cache)
+        # Exact entries are kept; approximate ones and misses are looked up again
+        assert sorted(precise.asked) == sorted([elm, oak, lost])
+        assert stats["refined"] == 1
+        assert (resources[1]["lat"], resources[1]["lng"]) == (39.11, -94.51)
+        # A match no more precise than the cached one does not replace it
+        assert (resources[2]["lat"], resources[2]["lng"]) == (39.0, -94.0)
+        assert cache.get(oak) == {"coordinates": (39.0, -94.0), "precision": "city", "geocoder": "nominatim"}
+        assert resources[3]["lat"] == 39.2
+        assert geocode_resources(resources, precise, cache)["cached"] == 4
@@ -0,0 +1,46 @@
+import json
+from treelib.tree import Tree
+from gosr.lib import incremental, utils
+
+def test_fingerprint_changes_with_config_and_version():
+    config = {"locality": "Springfield", "country": "USA", "unrelated": 1}
+    keys = ["locality", "country"]
+    fp = incremental.fingerprint("Obstacle", config, keys, 1)
+    assert fp == incremental.fingerprint("Obstacle", dict(config, unrelated=2), keys, 1)
+    assert fp != incremental.fingerprint("Obstacle", dict(config, locality="Shelbyville"), keys, 1)
+    assert fp != incremental.fingerprint("Obstacle", config, keys, 2)
+    assert fp != incremental.fingerprint("Other obstacle", config, keys, 1)
+
+def test_index_subtrees_skips_unexpanded_nodes():
+    j = {"goal": {"data": "G", "children": [
+        {"obstacle": {"data": "A", "children": [
+            {"solution": {"data": {"title": "S1", "description": "d"}}},
+        ]}},
+        {"obstacle": {"data": "B"}},
+    ]}}
+    index = incremental.index_subtrees(j, "obstacle", "solution")
+    assert list(index) == [incremental.content_key("A")]
+    assert index[incremental.content_key("A")][0]["solution"]["data"]["title"] == "S1"
+
+def test_lookup_and_graft(monkeypatch, tmp_path):
+    previous_tree = {"goal": {"data": "G", "children": [
+        {"obstacle": {"data": "A", "children": [
+            {"solution": {"data": {"title": "S1", "description": "d"}}},
+            {"solution": {"data": {"title": "S2", "description": "d"}}},
+        ]}},
+    ]}}
+    (tmp_path / "s.json").write_text(json.dumps(previous_tree))
+    fp = incremental.fingerprint("A", {}, [], 1)
+    incremental.save_fingerprints(str(tmp_path), "s.json", {incremental.content_key("A"): fp})
+    previous = incremental.load_previous(str(tmp_path), "s.json", "obstacle", "solution")
+
+    tree = Tree()
+    monkeypatch.setattr(utils, "tree", tree)
+    tree.create_node(identifier="ROOT", data="G", tag="goal")
+    node = tree.create_node(data="A", parent="ROOT", tag="obstacle")
+
+    assert incremental.lookup(node, previous, incremental.fingerprint("A", {}, [], 2)) is None
+    children = incremental.lookup(node, previous, fp)
+    incremental.graft(node, children)
+    titles = [c.data["title"] for c in tree.children(node.identifier)]
+    assert titles == ["S1", "S2"]
@@ -0,0 +1,81 @@
+import json
+import sys
+
+import pytest
+
+from gosr.convert import json2parquet
+
+TREE = {"goal": {"data": "G", "children": [
+    {"obstacle": {"data": {"title": "Theme 1", "description": "d1"}, "children": [
+        {"obstacle": {"data": {"title": "Sub", "description": "d2"}, "children": [
+            {"solution": {"data": {"title": "S1", "description": "d3"}, "children": [
+                {"resource": {"data": {"id": 0}}}, {"resource": {"data": {"id": 2}}},
+            ]}},
+        ]}},
+    ]}},
+    {"obstacle": {"data": {"title": "Theme 2", "description": "d4"}, "children": [
+        {"solution": {"data": {"title": "S2", "description": "d5"}, "children": [
+            {"resource": {"data": {"id": 1}}},
+        ]}},
+    ]}},
+]}}
+
+RESOURCES = [
+    {"id": 0, "name": "A", "organization": "X", "url_valid": True},
+    {"id": 1, "program": "B", "organization": {"name": "Y", "website": "http://y"}, "url_valid": "http://y/"},
+    {"id": 2, "program": "A", "organization": "X Inc", "dup": 0},
+]
+
+def test_tree_tables_nodes_and_edges():
+    nodes, edges = json2parquet.tree_tables(TREE)
+    assert [(n["node_id"], n["parent_id"], n["depth"], n["tag"], n["title"]) for n in nodes] == [
+        (0, None, 0, "goal", "G"),
+        (1, 0, 1, "obstacle", "Theme 1"),
+        (2, 1, 2, "obstacle", "Sub"),
+        (3, 2, 3, "solution", "S1"),
+        (4, 3, 4, "resource", None),
+        (5, 3, 4, "resource", None),
+        (6, 0, 1, "obstacle", "Theme 2"),
+        (7, 6, 2, "solution", "S2"),
+        (8, 7, 3, "resource", None),
+    ]
+    assert nodes[4]["resource_id"] == 0
+    json2parquet.resolve_canonical(edges, RESOURCES)
+    assert [(e["resource_id"], e["canonical_id"], e["solution_id"], e["obstacle_id"], e["theme"]) for e in edges] == [
+        (0, 0, 3, 2, "Theme 1"),
+        (2, 0, 3, 2, "Theme 1"),
+        (1, 1, 7, 6, "Theme 2"),
+    ]
+
+def test_resource_table_columns_are_flat():
+    rows = json2parquet.resource_table(RESOURCES)
+    assert list(rows[0]) == json2parquet.resource_columns
+    assert rows[0]["program"] == "A" and rows[0]["url_valid"] == "true" and rows[0]["dup"] is None
+    assert rows[1]["organization"] == "Y" and rows[1]["website"] == "http://y" and rows[1]["url_valid"] == "http://y/"
+    assert rows[2]["dup"] == 0
+    cols = json2parquet.columns(rows, ["id", "program"])
+    assert cols == {"id": [0, 1, 2], "program": ["A", "B", "A"]}
+
+@pytest.mark.parametrize("fmt", ["parquet", "arrow"])
+def test_main_writes_tables_that_read_back(monkeypatch, tmp_path, fmt):
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.parquet as pq
+    (tmp_path / "r.json").write_text(json.dumps(TREE))
+    (tmp_path / "resources.json").write_text(json.dumps(RESOURCES))
+    monkeypatch.setattr(sys, "argv", ["json2parquet.py", str(tmp_path), "--format", fmt])
+    assert json2parquet.main() == 0
+
+    def read(name):
+        filename = str(tmp_path / "tables" / f"{name}.{fmt}")
+        if fmt == "parquet":
+            return pq.read_table(filename)
+        with pa.memory_map(filename) as source:
+            return pa.ipc.open_file(source).read_all()
+
+    nodes, edges = json2parquet.tree_tables(TREE)
+    json2parquet.resolve_canonical(edges, RESOURCES)
+    assert read("nodes").to_pylist() == nodes
+    assert read("edges").to_pylist() == edges
+    resources = read("resources")
+    assert resources.column_names == json2parquet.resource_columns
+    assert resources.to_pylist() == json2parquet.resource_table(RESOURCES)
@@ -0,0 +1,74 @@
+import json
+import sys
+from treelib.tree import Tree
+from gosr.lib import utils
+from gosr.main import o2r, o2s, s2r
+
+def test_strip_resources():
+    j = {"goal": {"data": "G", "children": [
+        {"solution": {"data": "S", "children": [{"resource": {"data": {"id": 0}}}]}},
+    ]}}
+    assert o2r.strip_resources(j) == {"goal": {"data": "G", "children": [{"solution": {"data": "S"}}]}}
+
+def run_o2r(monkeypatch, tmp_path, fake_resources, config=""):
+    """
+    Run o2r.main on a two-obstacle o.json with fake LLM calls and return its tree.
+    """
+    (tmp_path / "config.yaml").write_text("locality: Town\ncountry: Land\npipeline_workers: 2\n" + config)
+    (tmp_path / "o.json").write_text(json.dumps({"root": {"data": "Goal", "children": [
+        {"obstacle": {"data": "Obstacle A"}},
+        {"obstacle": {"data": "Obstacle B"}},
+    ]}}))
+    tree = Tree()
+    for module in (utils, o2r, s2r):
+        monkeypatch.setattr(module, "tree", tree)
+    monkeypatch.setattr(s2r, "global_resources_list", [])
+    monkeypatch.setattr(s2r, "store", None)
+
+    def fake_solutions(msg):
+        return {"solutions": [{"title": "Fix", "description": "Fix A" if "Obstacle A" in msg else "Fix B"}]}
+    monkeypatch.setattr(o2s, "call_gpt4", fake_solutions)
+    monkeypatch.setattr(s2r, "call_gpt4", fake_resources)
+    monkeypatch.setattr(sys, "argv", ["o2r.py", str(tmp_path)])
+
+    assert o2r.main() == 0
+    return tree
+
+def fake_resources(msg):
+    # One resource specific to the solution, and one shared by every solution
+    return {"efforts": [
+        {"name": "Program for A" if "Fix A" in msg else "Program for B", "organization": "Org"},
+        {"name": "Shared Program", "organization": "Org"},
+    ]}
+
+def test_main_pipelines_solutions_into_resources(monkeypatch, tmp_path):
+    tree = run_o2r(monkeypatch, tmp_path, fake_resources)
+
+    r = json.loads((tmp_path / "r.json").read_text())
+    s = json.loads((tmp_path / "s.json").read_text())
+    resources = json.loads((tmp_path / "resources-raw.json").read_text())
+    assert sorted(x["id"] for x in resources) == [0, 1, 2]
+    assert json.dumps(r).count('"resource"') == 4
+    assert "resource" not in json.dumps(s)
+    assert len(json.loads((tmp_path / "r.fingerprints.json").read_text())) == 2
+    assert s2r.store.count() == 3
+    solution_ids = {n.identifier for n in tree.all_nodes() if n.tag == "solution"}
+    assert {r["id"] for r in s2r.store.all()} == {0, 1, 2}
+    assert all(s2r.store.query(solution_id=sid) for sid in solution_ids)
+
+def test_incremental_run_grafts_unchanged_solutions(monkeypatch, tmp_path):
+    run_o2r(monkeypatch, tmp_path, fake_resources, "incremental: true\n")
+    s2r.store.close()
+    first = json.loads((tmp_path / "r.json").read_text())
+
+    def no_resources(msg):
+        raise AssertionError("unchanged solutions should not be researched again")
+    run_o2r(monkeypatch, tmp_path, no_resources, "incremental: true\n")
+    s2r.store.close()
+    assert json.loads((tmp_path / "r.json").read_text()) == first
+
+def test_cluster_solutions_is_rejected(tmp_path, monkeypatch, capsys):
+    (tmp_path / "config.yaml").write_text("locality: Town\ncountry: Land\ncluster_solutions: true\n")
+    monkeypatch.setattr(sys, "argv", ["o2r.py", str(tmp_path)])
+    assert o2r.main() == 1
+    assert "cluster_solutions is not supported" in capsys.readouterr().out
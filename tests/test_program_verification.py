@@ -0,0 +1,55 @@
+import csv
+import json
+import threading
+
+from gosr.lib.program_verification import ProgramVerifier, program_key, write_results_table
+
+programs = [{"program_name": f"P{i}", "website": f"http://p{i}.org"} for i in range(5)]
+
+def fake_call(prompts, packed_ok=True, fail=()):
+    lock = threading.Lock()
+
+    def call(prompt):
+        with lock:
+            prompts.append(prompt)
+        if "these" in prompt:
+            if not packed_ok:
+                return {"programs": []}
+            listed = [json.loads(line.split(". ", 1)[1]) for line in prompt.splitlines() if line[:1].isdigit()]
+            return {"programs": [dict(p, validity="A") for p in listed]}
+        name = next(p["program_name"] for p in programs if repr(p) in prompt)
+        if name in fail:
+            return "No valid response from OpenAI API after 5 attempts!"
+        return {"program_name": name, "validity": "B"}
+    return call
+
+def test_packed_prompts_verify_each_program_once(tmp_path):
+    prompts = []
+    verifier = ProgramVerifier(fake_call(prompts), str(tmp_path / "cp.jsonl"), pack_size=2, max_workers=4)
+    results = verifier.verify(programs + [dict(programs[0])])
+    assert len(prompts) == 3 and verifier.calls == 3
+    # The odd one out is sent on its own, with the single-program prompt
+    assert [results[program_key(p)]["validity"] for p in programs] == ["A", "A", "A", "A", "B"]
+
+def test_bad_packed_answer_falls_back_and_checkpoint_resumes(tmp_path):
+    checkpoint = str(tmp_path / "cp.jsonl")
+    prompts = []
+    first = ProgramVerifier(fake_call(prompts, packed_ok=False, fail={"P3"}), checkpoint, pack_size=5)
+    results = first.verify(programs)
+    assert len(prompts) == 6 and program_key(programs[3]) not in results
+    assert results[program_key(programs[0])] == {"program_name": "P0", "validity": "B"}
+
+    with open(checkpoint, "a", encoding="utf-8") as f:
+        f.write('{"key": "cut')  # An interrupted write
+    prompts.clear()
+    second = ProgramVerifier(fake_call(prompts), checkpoint, pack_size=5)
+    assert second.resumed == 4
+    results = second.verify(programs)
+    assert len(prompts) == 1 and results[program_key(programs[3])]["validity"] == "B"
+
+def test_results_table(tmp_path):
+    filename = str(tmp_path / "verify.results.csv")
+    write_results_table(filename, [("S", 1, {"program": {"validity": "C"}}), ("S", 2, {"organization": "O", "validity": "A"})])
+    with open(filename, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    assert [r["validity"] for r in rows] == ["C", "A"] and rows[1]["organization_name"] == "O"
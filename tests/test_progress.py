@@ -0,0 +1,34 @@
+import io
+import logging
+from treelib.tree import Tree
+from gosr.lib import utils
+from gosr.lib.progress import Progress
+
+def test_status_line_reports_counts_and_eta(monkeypatch):
+    monkeypatch.setattr(utils, "call_stats", {"calls": 10, "in_flight": 3, "cache_hits": 4})
+    stream = io.StringIO()
+    progress = Progress("g2o", total=4, stream=stream, interval=0)
+    progress.advance(2)
+    line = stream.getvalue().splitlines()[-1]
+    assert line.startswith("g2o 2/4 50% | in flight 3 | cache hits 4/10")
+    assert "ETA 0:00" in line
+
+def test_non_tty_output_is_rate_limited():
+    stream = io.StringIO()
+    progress = Progress("s2r", total=100, stream=stream, interval=3600)
+    for _ in range(100):
+        progress.advance()
+    progress.finish()
+    assert len(stream.getvalue().splitlines()) == 2
+
+def test_log_subtree_logs_only_below_identifier(caplog):
+    tree = Tree()
+    tree.create_node(data="Goal", identifier="root", tag="root")
+    a = tree.create_node(data="A", identifier="a", parent="root", tag="obstacle")
+    tree.create_node(data="A1", identifier="a1", parent=a, tag="obstacle")
+    tree.create_node(data="B", identifier="b", parent="root", tag="obstacle")
+    logger = logging.getLogger("test_progress")
+    with caplog.at_level(logging.INFO, logger="test_progress"):
+        assert utils.log_subtree(tree, "a", logger)
+    assert [r.getMessage() for r in caplog.records] == ["> a. A", ">   a1. A1"]
+    assert not utils.log_subtree(tree, "missing", logger)
@@ -0,0 +1,48 @@
+from gosr.lib.r_stats import StatsAccumulator, run_stats
+
+RESOURCES = [
+    {"id": 0, "program": "A", "organization": "X", "url_valid": True},
+    {"id": 1, "program": "B", "organization": "X", "url_valid": False, "website": "http://b"},
+    {"id": 2, "program": "A", "organization": "Y", "dup": 0},
+    {"id": 3, "name": "C", "organization": {"name": "Z"}},
+]
+
+def test_incremental_totals_match_full_recompute(capsys):
+    run_stats(RESOURCES)
+    full = capsys.readouterr().out.strip()
+    stats = StatsAccumulator()
+    for r in RESOURCES:
+        stats.add(r)
+    assert stats.summary() == full == "Total input: 4 Unique programs: 3 Unique orgs: 2"
+    assert stats.url_summary() == "Total resources: 3 no_url_valid: 1 true_url_valid: 1 false_url_valid: 1 base_url_valid: 0"
+    assert stats.totals()["duplicate_programs"] == 1
+
+def test_link_tree_breakdowns():
+    r = {"goal": {"data": "G", "children": [
+        {"obstacle": {"data": {"title": "Theme 1", "description": ""}, "children": [
+            {"obstacle": {"data": "Sub", "children": [
+                {"solution": {"data": {"title": "S1", "description": ""}, "children": [
+                    {"resource": {"data": {"id": 0}}}, {"resource": {"data": {"id": 1}}},
+                ]}},
+                {"solution": {"data": {"title": "S2", "description": ""}, "children": [
+                    {"resource": {"data": {"id": 0}}},
+                ]}},
+            ]}},
+        ]}},
+        {"obstacle": {"data": {"title": "Theme 2", "description": ""}, "children": [
+            {"solution": {"data": {"title": "S3", "description": ""}, "children": [
+                {"resource": {"data": {"id": 3}}},
+            ]}},
+            # Same title as a solution under Theme 1, counted separately
+            {"solution": {"data": {"title": "S1", "description": ""}, "children": [
+                {"resource": {"data": {"id": 4}}},
+            ]}},
+        ]}},
+    ]}}
+    stats = StatsAccumulator()
+    stats.link_tree(r)
+    assert stats.breakdown() == {
+        "per_theme": {"Theme 1": 2, "Theme 2": 2},
+        "per_solution": {3: 2, 6: 1, 9: 1, 11: 1},
+        "solution_titles": {3: "S1", 6: "S2", 9: "S3", 11: "S1"},
+    }
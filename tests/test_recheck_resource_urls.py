@@ -0,0 +1,30 @@
+import httpx
+
+from gosr.lib.resource_store import ResourceStore
+from gosr.lib.url_validator import URLValidator
+from gosr.utils import recheck_resource_urls as recheck
+
+def test_re_check_urls_updates_only_invalid_resources(monkeypatch, tmp_path):
+    resources = [
+        {"id": 0, "program": "A", "website": "https://good.org/a", "url_valid": False},
+        {"id": 1, "program": "B", "website": "http://gone.org/b", "url_valid": False},
+        {"id": 2, "program": "C", "website": "N/A", "url_valid": False},
+        {"id": 3, "program": "D", "website": "http://skip.org/", "url_valid": True},
+    ]
+    requested = []
+
+    def handler(request):
+        requested.append(str(request.url))
+        return httpx.Response(200 if request.url.host == "good.org" else 404)
+
+    store = ResourceStore(str(tmp_path / "resources.db"))
+    monkeypatch.setattr(recheck, "resource_list", resources)
+    monkeypatch.setattr(recheck, "store", store)
+    recheck.re_check_urls(URLValidator(transport=httpx.MockTransport(handler)))
+
+    assert resources[0]["url_valid"] is True and resources[0]["website"] == "https://good.org/a"
+    assert resources[1]["url_valid"] is False
+    assert "url_valid" not in resources[2]
+    assert not any("skip.org" in u for u in requested)
+    assert store.get(0)["url_valid"] is True and "url_valid" not in store.get(2)
+    store.close()
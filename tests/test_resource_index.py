@@ -0,0 +1,49 @@
+import copy
+import json
+import os
+import time
+
+from gosr.lib.resource_index import INDEX_FILENAME, ResourceIndex, load_index
+
+TREE = {"goal": {"data": "G", "children": [
+    {"obstacle": {"data": {"title": "Theme 1", "description": ""}, "children": [
+        {"obstacle": {"data": {"title": "Sub", "description": "x"}, "children": [
+            {"solution": {"data": {"title": "S1", "description": ""}, "children": [
+                {"resource": {"data": {"id": 0}}}, {"resource": {"data": {"id": 1}}},
+            ]}},
+            {"solution": {"data": {"title": "S2", "description": ""}, "children": [
+                {"resource": {"data": {"id": 0}}},
+            ]}},
+        ]}},
+    ]}},
+    {"obstacle": {"label": "Second", "data": {"title": "Theme 2", "description": ""}, "children": [
+        {"solution": {"data": "S3", "children": [{"resource": {"data": {"id": 0}}}]}},
+    ]}},
+]}}
+
+def test_queries_both_directions():
+    index = ResourceIndex.build(TREE)
+    assert index.themes == ["Theme 1", "Second"]
+    assert [s["node"] for s in index.solutions_for(0)] == [3, 6, 9]
+    assert index.solutions_for(0)[0]["obstacle"] == {"title": "Sub", "description": "x"}
+    assert index.solutions_for(0)[2]["obstacle_node"] == 8
+    assert index.themes_for(0) == ["Theme 1", "Second"]
+    assert index.themes_for(1) == ["Theme 1"]
+    assert index.resources_for_theme("Theme 1") == [0, 1]
+    assert index.resources_for_solution(6) == [0]
+    assert [(rid, s["data"]) for rid, s in index.links("Second")] == [(0, "S3")]
+    assert index.solutions_for(42) == [] and index.resources_for_theme("None") == []
+
+def test_load_index_persists_and_rebuilds_when_tree_changes(tmp_path):
+    with open(tmp_path / "r.json", "w") as f:
+        json.dump(TREE, f)
+    assert load_index(str(tmp_path)).resources_for_theme("Second") == [0]
+    assert os.path.exists(tmp_path / INDEX_FILENAME)
+    assert load_index(str(tmp_path)).to_json() == ResourceIndex.build(TREE).to_json()
+
+    tree = copy.deepcopy(TREE)
+    tree["goal"]["children"][1]["obstacle"]["children"][0]["solution"]["children"].append({"resource": {"data": {"id": 5}}})
+    with open(tmp_path / "r.json", "w") as f:
+        json.dump(tree, f)
+    os.utime(tmp_path / "r.json", (time.time() + 5, time.time() + 5))
+    assert load_index(str(tmp_path)).resources_for_theme("Second") == [0, 5]
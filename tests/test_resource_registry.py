@@ -0,0 +1,34 @@
+from gosr.lib.resource_registry import ResourceRegistry, normalize_name, website_domain
+
+def test_normalization():
+    assert normalize_name("The Food Bank & Pantry, Inc.") == "food bank and pantry inc"
+    assert website_domain("https://WWW.Example.org/path?q=1") == "example.org"
+    assert website_domain("example.org/page") == "example.org"
+    assert website_domain("N/A") == ""
+
+def test_add_links_rediscovered_resources():
+    registry = ResourceRegistry()
+    rid, is_new = registry.add({"name": "Meals on Wheels", "organization": "City Services"})
+    assert (rid, is_new) == (0, True)
+    # Same program and organization after normalization
+    assert registry.add({"program_name": "meals on wheels.", "organization": {"name": "CITY SERVICES"}}) == (0, False)
+    # Same program on the same website domain, organization spelled differently
+    registry.add({"name": "Tutoring", "organization": "Library", "website": "https://www.lib.org/tutor"})
+    assert registry.add({"name": "Tutoring", "organization": "Public Library", "website": "http://lib.org"}) == (1, False)
+    # Same domain but a different program is a different resource
+    assert registry.add({"name": "Story Time", "organization": "Library", "website": "http://lib.org"}) == (2, True)
+    assert len(registry.resources) == 3
+    assert registry.duplicates == 2
+    assert [r["id"] for r in registry.find_by_domain("lib.org")] == [1, 2]
+
+def test_loaded_resources_are_indexed_and_ids_continue():
+    resources = [
+        {"id": 0, "program": "A", "organization": "X", "address": "1 Main St."},
+        {"id": 1, "program": "A", "organization": "X", "dup": 0},
+        {"id": 5, "program": "B", "organization": "Y"},
+    ]
+    registry = ResourceRegistry(resources)
+    assert registry.add({"name": "A", "organization": "Other", "address": "1 main st"}) == (0, False)
+    assert registry.add({"name": "C", "organization": "Z"}) == (6, True)
+    assert registry.resources is resources
+    assert len(registry.resources) == 4 and registry.duplicates == 2
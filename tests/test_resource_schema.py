@@ -0,0 +1,60 @@
+from gosr.lib import r_stats
+from gosr.lib.resource_schema import FIELDS, normalize, normalize_all, resolve, get_field
+
+SHAPES = [
+    {"id": 0, "program": "Pantry", "organization": "Harvesters", "website": "https://h.org", "address": "1 Main St",
+     "email": "a@h.org", "description": "Food"},
+    {"id": 1, "name": "Pantry", "organization": {"name": "Harvesters", "website": "https://h.org",
+     "address": {"location": "1 Main St"}, "email": "a@h.org"}},
+    {"id": 2, "Effort Name": "Pantry", "ImplementingOrganization": "Harvesters", "Web Page": "https://h.org"},
+    {"id": 3, "organizations": [{"name": "A", "website": "https://a.org"}, {"name": "B", "email": "b@b.org"}],
+     "title": "Joint Program"},
+    {"id": 4, "name": "Clinic", "address": "2 Oak Ave"},
+    {"id": 5, "organization": {"name": "Only Org"}},
+    {"id": 6, "name": {"en": "Nested name"}, "program": "Plain name", "organization": "Org"},
+]
+
+def expected(resource):
+    values = resolve(resource)
+    return {f: values[f] for f in FIELDS if f in values}
+
+def test_compiled_plans_agree_with_resolution():
+    # Twice, so the second pass runs on compiled plans
+    for _ in range(2):
+        for r in SHAPES:
+            record, missing = normalize(r)
+            assert list(record) == FIELDS
+            assert {f: v for f, v in record.items() if f not in missing} == expected(r)
+
+def test_nested_and_fallback_shapes():
+    record, missing = normalize(SHAPES[1])
+    assert record["organization"] == "Harvesters"
+    assert record["address"] == "1 Main St"
+    assert record["website"] == "https://h.org"
+    assert missing == ["description"]
+    assert record["description"] == "N/A"
+
+    record, _ = normalize(SHAPES[3])
+    assert record["organization"] == "A, B"
+    assert (record["website"], record["email"]) == ("https://a.org", "b@b.org")
+
+    # A place given instead of an organization
+    assert normalize(SHAPES[4])[0]["organization"] == "2 Oak Ave"
+    # A resource that only names its organization
+    assert normalize(SHAPES[5])[0]["program"] == "Only Org"
+    # A dict under a program alias is skipped for the next alias
+    assert normalize(SHAPES[6])[0]["program"] == "Plain name"
+
+def test_structured_errors():
+    records, errors = normalize_all([{"id": 7, "email": "x@y.org"}, {"id": 8, "name": "P", "organization": "O", "dup": 2}])
+    assert errors == [
+        {"index": 0, "id": 7, "missing": ["program", "description", "organization", "address", "website"]},
+        {"index": 1, "id": 8, "missing": ["description", "address", "email", "website"]},
+    ]
+    assert records[1]["dup"] == 2
+    assert get_field("program", {"id": 9}) is None
+
+def test_r_stats_getters_use_schema():
+    assert r_stats.get_program_value(SHAPES[2]) == "Pantry"
+    assert r_stats.get_organization_value(SHAPES[1]) == "Harvesters"
+    assert r_stats.get_organization_value({"name": "P"}) is None
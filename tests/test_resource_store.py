@@ -0,0 +1,68 @@
+import json
+import os
+import time
+
+from gosr.lib.resource_store import ResourceStore, load_resource_list, save_resource_list, store_filename
+
+
+def test_upsert_get_and_query(tmp_path):
+    with ResourceStore(str(tmp_path / "resources.db")) as store:
+        store.upsert({"id": 0, "name": "Food Bank", "organization": {"name": "Harvesters", "website": "https://h.org"}}, "sol-1")
+        store.upsert({"id": 1, "program": "Pantry", "organization": "Harvesters", "url_valid": False})
+        store.upsert({"id": 2, "program": "Food Bank", "organization": "Harvesters", "dup": 0})
+        # Updating keeps the solution the resource was first found for
+        store.upsert({"id": 0, "name": "Food Bank", "organization": {"name": "Harvesters", "website": "https://h.org"}, "url_valid": True})
+
+        assert store.count() == 3
+        assert store.get(0)["url_valid"] is True
+        assert store.get(9) is None
+        assert store.resolve(2)["id"] == 0
+        assert [r["id"] for r in store.query(organization="Harvesters", dup=None)] == [0, 1]
+        assert [r["id"] for r in store.query(url_valid=False)] == [1]
+        assert [r["id"] for r in store.query(website="https://h.org")] == [0]
+        assert [r["id"] for r in store.query(solution_id="sol-1")] == [0]
+
+def test_json_round_trip(tmp_path):
+    resources = [{"id": 1, "program": "B", "organization": "Y"}, {"id": 0, "program": "A", "organization": "X"}]
+    (tmp_path / "resources.json").write_text(json.dumps(resources))
+    with ResourceStore(str(tmp_path / "resources.db")) as store:
+        assert store.import_json(str(tmp_path / "resources.json")) == 2
+        store.export_json(str(tmp_path / "out.json"))
+    assert json.loads((tmp_path / "out.json").read_text()) == sorted(resources, key=lambda r: r["id"])
+
+def test_load_resource_list_reads_each_stage_from_its_table(tmp_path):
+    (tmp_path / "resources.json").write_text(json.dumps([{"id": 0, "program": "From JSON", "organization": "X"}]))
+    (tmp_path / "resources-raw.json").write_text(json.dumps([{"id": 0, "program": "Raw JSON", "organization": "X"}]))
+    assert load_resource_list(str(tmp_path))[0]["program"] == "From JSON"
+
+    with ResourceStore(store_filename(str(tmp_path))) as store:
+        store.upsert({"id": 0, "program": "From store", "organization": "X"})
+    # The store is read while its JSON file is older, and only for the list it holds
+    assert load_resource_list(str(tmp_path))[0]["program"] == "From store"
+    assert load_resource_list(str(tmp_path), "resources-raw.json")[0]["program"] == "Raw JSON"
+
+    save_resource_list(str(tmp_path), [{"id": 1, "program": "Raw", "organization": "Y"}], "resources-raw.json")
+    assert load_resource_list(str(tmp_path), "resources-raw.json") == [{"id": 1, "program": "Raw", "organization": "Y"}]
+    assert json.loads((tmp_path / "resources-raw.json").read_text())[0]["program"] == "Raw"
+    assert load_resource_list(str(tmp_path))[0]["program"] == "From store"
+
+def test_load_resource_list_reimports_a_newer_json_file(tmp_path):
+    with ResourceStore(store_filename(str(tmp_path))) as store:
+        store.upsert({"id": 0, "program": "From store", "organization": "X"})
+        store.export_json(str(tmp_path / "resources.json"))
+    assert load_resource_list(str(tmp_path))[0]["program"] == "From store"
+
+    # e.g. a hand edit, or a script that writes resources.json without the store
+    (tmp_path / "resources.json").write_text(json.dumps([{"id": 1, "program": "Edited", "organization": "Y"}]))
+    later = time.time() + 10
+    os.utime(tmp_path / "resources.json", (later, later))
+    assert load_resource_list(str(tmp_path)) == [{"id": 1, "program": "Edited", "organization": "Y"}]
+    with ResourceStore(store_filename(str(tmp_path))) as store:
+        assert [r["program"] for r in store.all()] == ["Edited"]
+
+def test_replace_all_drops_missing_resources(tmp_path):
+    with ResourceStore(str(tmp_path / "resources.db")) as store:
+        store.upsert_many([{"id": 0, "program": "A"}, {"id": 1, "program": "B"}], "sol-1")
+        store.replace_all([{"id": 1, "program": "B2"}])
+        assert [r["program"] for r in store.all()] == ["B2"]
+        assert store.query(solution_id="sol-1")[0]["id"] == 1
@@ -0,0 +1,50 @@
+import httpx
+
+from gosr.lib.resource_index import ResourceIndex
+from gosr.lib.revalidation import priority, linked_resources, revalidate, schedule
+from gosr.lib.url_cache import DAY, URLCache
+from gosr.lib.url_validator import URLValidator
+
+def test_priority_weighs_age_failures_and_links():
+    now = 100 * DAY
+    fresh = {"checked_at": now - DAY, "failures": 0}
+    old = {"checked_at": now - 30 * DAY, "failures": 0}
+    failed = {"checked_at": now - DAY, "failures": 2}
+    dead = {"checked_at": now - 30 * DAY, "failures": 9}
+    assert priority(None, False, now) > priority(old, False, now) > priority(failed, False, now) > priority(fresh, False, now)
+    assert priority(dead, False, now) < priority(old, False, now)
+    assert priority(fresh, True, now) == 3 * priority(fresh, False, now)
+
+def test_linked_resources_follow_dups():
+    resources = [{"id": 0, "dup": 2}, {"id": 1}, {"id": 2}]
+    index = ResourceIndex(["T"], [{"node": 3, "data": "S", "obstacle_node": 2, "obstacle": "O", "theme": "T", "resources": [0]}])
+    assert linked_resources(resources, index) == {2}
+
+def test_schedule_and_revalidate_within_request_budget(tmp_path):
+    resources = [
+        {"id": 0, "website": "http://recent.org/"},
+        {"id": 1, "website": "http://stale.org/"},
+        {"id": 2, "website": "http://new.org/"},
+        {"id": 3, "website": "N/A"},
+        {"id": 4, "website": "http://stale.org/", "dup": 1},
+        {"id": 5, "website": "http://gone.org/"},
+    ]
+    requested = []
+
+    def handler(request):
+        requested.append(request.url.host)
+        return httpx.Response(404 if request.url.host == "gone.org" else 200)
+
+    with URLCache(str(tmp_path / "url-cache.db"), ttl=0, negative_ttl=0) as cache:
+        cache.put("http://recent.org/", "http://recent.org/", 200, now=99 * DAY)
+        cache.put("http://stale.org/", "http://stale.org/", 200, now=50 * DAY)
+        cache.put("http://gone.org/", "http://gone.org/", 200, now=80 * DAY)
+        plan = schedule(resources, cache, linked={5}, now=100 * DAY)
+        assert [i for _, i in plan] == [2, 5, 1, 0]
+
+        validator = URLValidator(transport=httpx.MockTransport(handler), cache=cache)
+        checked = revalidate(resources, plan, validator, max_requests=2, batch_size=1)
+        assert cache.last_checked("http://gone.org/")["failures"] == 1
+    assert checked == [2, 5] and requested == ["new.org", "gone.org"]
+    assert resources[2]["url_valid"] is True and resources[5]["url_valid"] is False
+    assert "url_valid" not in resources[1]
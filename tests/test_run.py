@@ -0,0 +1,56 @@
+import os
+from gosr.main import run
+
+STAGES = [
+    {"name": "a", "module": "a", "args": [], "inputs": [], "config_keys": ["goal"], "outputs": ["a.json"]},
+    {"name": "b", "module": "b", "args": [], "inputs": ["a.json"], "config_keys": ["locality"], "outputs": ["b.json"]},
+    {"name": "c", "module": "c", "args": [], "inputs": ["b.json"], "config_keys": [], "outputs": ["c.txt"]},
+    {"name": "d", "module": "d", "args": [], "inputs": ["b.json"], "config_keys": [], "outputs": [lambda config: f"{config['goal']}.txt"]},
+]
+
+def fake_run_stage(calls):
+    def run_stage(stage, path, log_filename=None):
+        calls.append(stage["name"])
+        config = {"goal": "g"}
+        for o in run.stage_outputs(stage, config):
+            with open(os.path.join(path, o), "w") as f:
+                f.write(f"{stage['name']} {len(calls)}")
+        return 0
+    return run_stage
+
+def test_plan_waves_groups_independent_exports():
+    waves, deps = run.plan_waves(run.STAGES, {"root_node_name": "Goal"})
+    assert waves[0] == ["g2o"]
+    assert deps["recheck_resource_urls"] == ["raw2resources"]
+    assert ["raw2resources", "json2mm"] in waves
+    assert waves[-1] == ["json2doc", "r2google-maps"]
+
+def test_unchanged_inputs_are_skipped(monkeypatch, tmp_path):
+    monkeypatch.setattr(run, "STAGES", STAGES)
+    calls = []
+    monkeypatch.setattr(run, "run_stage", fake_run_stage(calls))
+    config = {"goal": "g", "locality": "X"}
+    reports = run.run_pipeline(str(tmp_path), config)
+    assert [r["status"] for r in reports] == ["ran"] * 4
+    assert os.path.exists(tmp_path / "g.txt")
+
+    calls.clear()
+    reports = run.run_pipeline(str(tmp_path), config)
+    assert calls == []
+    assert all(r["status"] == "skipped" for r in reports)
+
+def test_config_change_reruns_downstream_only(monkeypatch, tmp_path):
+    monkeypatch.setattr(run, "STAGES", STAGES)
+    calls = []
+    monkeypatch.setattr(run, "run_stage", fake_run_stage(calls))
+    run.run_pipeline(str(tmp_path), {"goal": "g", "locality": "X"})
+    calls.clear()
+    reports = run.run_pipeline(str(tmp_path), {"goal": "g", "locality": "Y"})
+    assert sorted(calls) == ["b", "c", "d"]
+    assert reports[1]["reason"] == "config changed"
+
+def test_failed_stage_blocks_dependents(monkeypatch, tmp_path):
+    monkeypatch.setattr(run, "STAGES", STAGES)
+    monkeypatch.setattr(run, "run_stage", lambda stage, path, log_filename=None: 1)
+    reports = run.run_pipeline(str(tmp_path), {"goal": "g"})
+    assert [r["status"] for r in reports] == ["failed", "blocked", "blocked", "blocked"]
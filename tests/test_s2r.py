@@ -35,12 +35,82 @@ def test_save_tree_raises_if_path_none(monkeypatch):
     except ValueError as e:
         assert "must be set to a valid directory string" in str(e)
 
-def test_save_resources_creates_file(monkeypatch):
-    import tempfile
-    with tempfile.TemporaryDirectory() as tmpdir:
-        s2r.path = tmpdir
-        s2r.global_resources_list = [{"foo": "bar"}]
+def test_save_resources_exports_the_store(monkeypatch, tmp_path):
+    for name in ("store", "registry", "stats", "global_resources_list"):
+        monkeypatch.setattr(s2r, name, getattr(s2r, name))
+    monkeypatch.setattr(s2r, "path", str(tmp_path))
+    s2r.load_resources()
+    try:
+        s2r.store.upsert({"id": 0, "foo": "bar"})
         s2r.save_resources()
-        with open(os.path.join(tmpdir, "resources-raw.json")) as f:
-            data = json.load(f)
-        assert data == [{"foo": "bar"}]
\ No newline at end of file
+    finally:
+        s2r.store.close()
+    with open(os.path.join(tmp_path, "resources-raw.json")) as f:
+        data = json.load(f)
+    assert data == [{"id": 0, "foo": "bar"}]
+
+def test_get_resources_stops_when_calls_stop_finding_new_resources(monkeypatch):
+    from treelib import Node
+    from gosr.lib.resource_registry import ResourceRegistry
+    monkeypatch.setattr(s2r, "registry", ResourceRegistry([{"id": 0, "name": "Known Pantry", "organization": "Org"}]))
+    monkeypatch.setattr(s2r, "max_resource_loops", 5)
+    monkeypatch.setattr(s2r, "min_new_resources", 1)
+    prompts = []
+    replies = [
+        {"efforts": [{"name": "Food Bank", "organization": "Org"}, {"name": "Known Pantry", "organization": "Org"}]},
+        {"efforts": [{"name": "Food Bank", "organization": "Org"}, {"name": "Known Pantry", "organization": "Org"}]},
+        {"efforts": [{"name": "Never reached", "organization": "Org"}]},
+    ]
+    def fake_call(msg):
+        prompts.append(msg)
+        return replies[len(prompts) - 1]
+    monkeypatch.setattr(s2r, "call_gpt4", fake_call)
+    monkeypatch.setattr(s2r, "locality", "Town")
+    monkeypatch.setattr(s2r, "country", "Land")
+
+    resources = s2r.get_resources(Node(data={"title": "Feed people", "description": "Food banks"}))
+    assert len(prompts) == 2
+    assert "Food Bank" in prompts[1] and "Known Pantry" in prompts[1]
+    assert len(resources) == 4
+
+def test_omit_text_keeps_most_relevant_names_within_budget(monkeypatch):
+    monkeypatch.setattr(s2r, "max_omit_tokens", 30)
+    found = [{"name": f"Unrelated Program {i}"} for i in range(20)] + [{"name": "Community Food Bank"}]
+    text = s2r.omit_text_for(found, "Expand community food banks")
+    assert s2r.estimate_tokens(text) <= 30
+    assert "Community Food Bank" in text
+    assert "Unrelated Program 19" in text and "Unrelated Program 0" not in text
+    assert s2r.omit_text_for([], "anything") == ""
+
+def test_link_cluster_fans_out_resource_links(monkeypatch):
+    from treelib import Tree
+    from gosr.lib.r_stats import StatsAccumulator
+    t = Tree()
+    t.create_node("G", "g")
+    t.create_node(data={"title": "Theme", "description": ""}, identifier="o1", parent="g")
+    t.create_node(data={"title": "Community Tech Workshops", "description": ""}, identifier="s1", parent="o1")
+    t.create_node(data={"title": "Local Tech Workshops", "description": ""}, identifier="s2", parent="o1")
+    t.create_node(data={"id": 7}, parent="s1", tag="resource")
+    monkeypatch.setattr(s2r, "tree", t)
+    monkeypatch.setattr(s2r, "stats", StatsAccumulator())
+    s2r.link_cluster(t.get_node("s2"), t.get_node("s1"))
+    assert [c.data for c in t.children("s2")] == [{"id": 7}]
+    assert t.get_node("s2").tag == "solution"
+    assert s2r.stats.breakdown()["per_solution"]["s2"] == 1
+    assert s2r.stats.breakdown()["solution_titles"]["s2"] == "Local Tech Workshops"
+
+def test_grafted_resources_are_counted(monkeypatch):
+    from treelib import Tree
+    from gosr.lib.r_stats import StatsAccumulator
+    t = Tree()
+    t.create_node("G", "g")
+    t.create_node(data={"title": "Theme", "description": ""}, identifier="o1", parent="g")
+    t.create_node(data={"title": "Food Pantries", "description": ""}, identifier="s1", parent="o1")
+    monkeypatch.setattr(s2r, "tree", t)
+    monkeypatch.setattr(s2r.utils, "tree", t)
+    monkeypatch.setattr(s2r, "stats", StatsAccumulator())
+    s2r.graft_resources(t.get_node("s1"), [{"resource": {"data": {"id": 3}}}, {"resource": {"data": {"id": 5}}}])
+    assert [c.data for c in t.children("s1")] == [{"id": 3}, {"id": 5}]
+    assert s2r.stats.breakdown() == {
+        "per_theme": {"Theme": 2}, "per_solution": {"s1": 2}, "solution_titles": {"s1": "Food Pantries"},
+    }
@@ -0,0 +1,25 @@
+from treelib import Node
+
+from gosr.lib.solution_clusters import cluster_solutions, representatives, solution_text
+
+def titles(clusters):
+    return [[n.data["title"] for n in c] for c in clusters]
+
+def test_equivalent_solutions_cluster_and_different_ones_do_not():
+    nodes = [Node(data={"title": t, "description": ""}) for t in [
+        "Public-Private Partnerships", "Community Tech Workshops", "Youth Mentoring Program",
+        "Local Tech Workshops", "Adult Mentoring Program", "Public Private Partnership",
+    ]]
+    clusters = cluster_solutions(nodes)
+    assert titles(clusters) == [
+        ["Public-Private Partnerships", "Public Private Partnership"],
+        ["Community Tech Workshops", "Local Tech Workshops"],
+        ["Youth Mentoring Program"],
+        ["Adult Mentoring Program"],
+    ]
+    reps = representatives(clusters)
+    assert reps == {nodes[3].identifier: nodes[1], nodes[5].identifier: nodes[0]}
+
+def test_solution_text_handles_string_data():
+    assert solution_text("The Local Food Banks") == "food bank"
+    assert solution_text(None) == ""
@@ -0,0 +1,53 @@
+import random
+
+import pytest
+
+from gosr.lib.spatial_index import SpatialIndex, haversine_km
+from gosr.lib.wkt import parse_wkt
+
+# A 0.1 x 0.1 degree square around downtown Kansas City, with a hole
+square = "POLYGON ((-94.6 39.05, -94.5 39.05, -94.5 39.15, -94.6 39.15, -94.6 39.05), (-94.56 39.09, -94.54 39.09, -94.54 39.11, -94.56 39.11, -94.56 39.09))"
+
+def test_parse_wkt():
+    assert parse_wkt("POINT (1 2)") == {"type": "Point", "coordinates": [1.0, 2.0]}
+    assert parse_wkt("MULTIPOINT (1 2, 3 4)")["coordinates"] == [[1.0, 2.0], [3.0, 4.0]]
+    assert parse_wkt("MULTIPOINT ((1 2), (3 4))")["coordinates"] == [[1.0, 2.0], [3.0, 4.0]]
+    assert len(parse_wkt("MULTIPOLYGON (((0 0, 1 0, 1 1, 0 0)), ((5 5, 6 5, 6 6, 5 5)))")["coordinates"]) == 2
+    assert parse_wkt("POLYGON Z ((0 0 1, 1 0 1, 1 1 1, 0 0 1))")["coordinates"][0][1] == [1.0, 0.0]
+    assert parse_wkt("POLYGON EMPTY") is None
+    with pytest.raises(ValueError):
+        parse_wkt("POLYGON ((0 0, 1 0")
+
+def test_queries_match_brute_force():
+    rng = random.Random(1)
+    points = {i: (39 + rng.random() * 0.3, -94.7 + rng.random() * 0.3) for i in range(2000)}
+    index = SpatialIndex(cell_deg=0.02)
+    for i, (lat, lng) in points.items():
+        index.add(i, lat, lng)
+
+    found = index.within_radius(39.1, -94.55, 3)
+    assert {i for i, _ in found} == {i for i, p in points.items() if haversine_km(39.1, -94.55, *p) <= 3}
+    assert [d for _, d in found] == sorted(d for _, d in found)
+    assert set(index.within_bbox(39.1, -94.6, 39.2, -94.5)) == {
+        i for i, (lat, lng) in points.items() if 39.1 <= lat <= 39.2 and -94.6 <= lng <= -94.5}
+
+    polygon = parse_wkt(square)
+    inside = set(index.within_polygon(polygon))
+    assert inside == {i for i, (lat, lng) in points.items()
+                      if 39.05 < lat < 39.15 and -94.6 < lng < -94.5 and not (39.09 < lat < 39.11 and -94.56 < lng < -94.54)}
+    near = set(index.near_polygon(polygon, 1))
+    assert inside < near and all(39.03 < points[i][0] < 39.17 for i in near)
+
+def test_clusters_merge_when_zoomed_out():
+    index = SpatialIndex.from_resources([
+        {"id": 0, "lat": 39.10, "lng": -94.58},
+        {"id": 1, "lat": 39.1001, "lng": -94.5801},
+        {"id": 2, "lat": 38.63, "lng": -90.20},
+        {"id": 3, "lat": 39.10, "lng": -94.58, "dup": 0},
+        {"id": 4, "program": "No address"},
+    ])
+    assert len(index) == 3
+    assert sorted(c["count"] for c in index.cluster(4)) == [1, 2]
+    assert sorted(c["count"] for c in index.cluster(18)) == [1, 1, 1]
+    pair = next(c for c in index.cluster(4) if c["count"] == 2)
+    assert sorted(pair["ids"]) == [0, 1] and pair["lat"] == pytest.approx(39.10005)
@@ -0,0 +1,48 @@
+import httpx
+
+from gosr.lib.url_cache import DAY, URLCache
+from gosr.lib.url_validator import URLValidator
+
+def test_entries_expire_after_their_ttl(tmp_path):
+    with URLCache(str(tmp_path / "url-cache.db"), ttl=10 * DAY, negative_ttl=DAY) as cache:
+        cache.put("HTTP://Good.org/a#top", "http://good.org/a", 200, "http://good.org/a", now=0)
+        cache.put("http://bad.org/", None, 404, "http://bad.org/", now=0)
+        assert cache.get("http://good.org/a", now=5 * DAY)["status"] == 200
+        assert cache.get("http://good.org/a", now=11 * DAY) is None
+        assert cache.get("http://bad.org/", now=DAY / 2)["result"] is None
+        assert cache.get("http://bad.org/", now=2 * DAY) is None
+        cache.put_origin("HTTP://Down.org/x", False, now=0)
+        assert cache.origin_unreachable("http://down.org/other", now=DAY / 2)
+        assert not cache.origin_unreachable("http://down.org/other", now=2 * DAY)
+        # Reachability is per origin: another scheme or host is probed on its own
+        assert not cache.origin_unreachable("https://down.org/other", now=DAY / 2)
+        assert not cache.origin_unreachable("http://www.down.org/other", now=DAY / 2)
+    assert cache.filename.endswith("url-cache.db")
+
+def test_reruns_only_probe_new_urls_and_skip_unreachable_origins(tmp_path):
+    requested = []
+
+    def handler(request):
+        requested.append(str(request.url))
+        if request.url.host == "down.org":
+            raise httpx.ConnectError("refused", request=request)
+        return httpx.Response(200)
+
+    with URLCache(str(tmp_path / "url-cache.db")) as cache:
+        validator = URLValidator(transport=httpx.MockTransport(handler), cache=cache)
+        validator.run(["http://a.org/", "http://down.org/1"])
+        assert len(requested) == 2
+        second = URLValidator(transport=httpx.MockTransport(handler), cache=cache)
+        results = second.run(["http://a.org/", "http://down.org/2", "http://b.org/"])
+    assert results == {"http://a.org/": "http://a.org/", "http://down.org/2": None, "http://b.org/": "http://b.org/"}
+    assert requested[2:] == ["http://b.org/"]
+    assert (second.probed, second.cached) == (1, 2)
+
+def test_consecutive_failures_are_counted_until_a_success(tmp_path):
+    with URLCache(str(tmp_path / "url-cache.db")) as cache:
+        assert cache.last_checked("http://flaky.org/") is None
+        cache.put("http://flaky.org/", None, 503, now=0)
+        cache.put("https://www.flaky.org/", None, 503, now=1)
+        assert cache.last_checked("http://flaky.org/") == {"result": None, "checked_at": 1, "failures": 2}
+        cache.put("http://flaky.org/", "http://flaky.org/", 200, now=2)
+        assert cache.last_checked("http://flaky.org/")["failures"] == 0
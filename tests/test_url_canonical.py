@@ -0,0 +1,17 @@
+from gosr.lib.url_canonical import canonical_url, domain_of, group_by_origin, url_key
+
+def test_canonical_url():
+    assert canonical_url("  WWW.Example.ORG ") == "http://www.example.org/"
+    assert canonical_url("HTTPS://Example.org:443/Programs/?utm_source=x&id=3&fbclid=y#top") == "https://example.org/Programs?id=3"
+    assert canonical_url("http://example.org:8080") == "http://example.org:8080/"
+    assert url_key("https://www.example.org/a/") == url_key("http://example.org/a") == "//example.org/a"
+    assert domain_of("https://WWW.City.gov/parks") == "city.gov"
+
+def test_group_by_origin_dedups_canonical_forms():
+    groups = group_by_origin([
+        "https://city.gov/parks", "https://City.gov/parks/", "https://city.gov/library", "http://other.org",
+    ])
+    assert groups == {
+        "https://city.gov": ["https://city.gov/parks", "https://city.gov/library"],
+        "http://other.org": ["http://other.org/"],
+    }
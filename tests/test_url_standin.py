@@ -0,0 +1,46 @@
+import httpx
+
+from gosr.lib.url_standin import Site, StandInServer
+from gosr.lib.url_validator import URLValidator
+from gosr.utils.bench_url_validator import percentile, run_benchmark
+
+def test_stand_in_pages_behave_as_documented():
+    with StandInServer([Site(hang_seconds=1), Site(rate_limit=2)]) as server:
+        with httpx.Client(timeout=0.3) as client:
+            assert client.head(server.url(0, "/ok")).status_code == 200
+            assert client.head(server.url(0, "/missing")).status_code == 404
+            assert client.head(server.url(0, "/no-head")).status_code == 405
+            assert client.get(server.url(0, "/no-head")).status_code == 200
+            assert client.head(server.url(0, "/head-forbidden")).status_code == 403
+            r = client.get(server.url(0, "/ok"), headers={"Range": "bytes=0-0"})
+            assert r.status_code == 206 and r.content == b"s"
+            r = client.head(server.url(0, "/redirect/2"), follow_redirects=True)
+            assert r.status_code == 200 and len(r.history) == 2
+            assert [client.head(server.url(1, "/")).status_code for _ in range(3)] == [200, 200, 429]
+            for url, error in [(server.url(0, "/hang"), httpx.TimeoutException),
+                               (server.dead_url(), httpx.ConnectError),
+                               (server.tls_url(0), httpx.ConnectError)]:
+                try:
+                    client.head(url)
+                    assert False, url
+                except error:
+                    pass
+
+def test_validator_against_stand_in():
+    with StandInServer([Site(hang_seconds=1)]) as server:
+        urls = [server.url(0, "/page"), server.url(0, "/missing"), server.url(0, "/hang"), server.dead_url("/x"),
+                server.url(0, "/no-head"), server.url(0, "/head-forbidden"), server.url(0, "/redirect/2")]
+        root = server.url(0, "/")
+        validator = URLValidator(timeout=0.3)
+        results = validator.run(urls)
+    assert results == {
+        urls[0]: urls[0], urls[1]: root, urls[2]: root, urls[3]: None,
+        urls[4]: urls[4], urls[5]: urls[5], urls[6]: root + "redirect/0",
+    }
+    assert validator.final_urls[urls[6]] == root + "redirect/0"
+
+def test_benchmark_reports_throughput_and_latency():
+    m = run_benchmark(n_urls=60, n_sites=4, timeout=0.3)
+    assert m["urls"] == 60 and 0 < m["valid"] <= 60
+    assert m["p50"] <= m["p99"] and m["urls_per_second"] > 0
+    assert percentile([1, 2, 3, 4], 50) == 2 and percentile([], 99) == 0.0
@@ -0,0 +1,56 @@
+import asyncio
+
+import httpx
+
+from gosr.lib.url_validator import URLValidator
+
+def test_checks_url_then_root_and_respects_per_host_limit():
+    in_flight = {}
+    peak = {}
+
+    async def handler(request):
+        host = request.url.host
+        in_flight[host] = in_flight.get(host, 0) + 1
+        peak[host] = max(peak.get(host, 0), in_flight[host])
+        await asyncio.sleep(0.01)
+        in_flight[host] -= 1
+        if host == "down.org":
+            raise httpx.ConnectError("refused", request=request)
+        if request.url.path == "/missing":
+            return httpx.Response(404)
+        return httpx.Response(200)
+
+    urls = [f"http://busy.org/page{i}" for i in range(20)] + ["http://ok.org/missing", "http://down.org/x", "http://busy.org/page0"]
+    validator = URLValidator(concurrency=8, per_host=3, transport=httpx.MockTransport(handler))
+    done = []
+    results = validator.run(urls, on_result=lambda url, ret, n, total: done.append((n, total)))
+    assert results["http://busy.org/page5"] == "http://busy.org/page5"
+    assert results["http://ok.org/missing"] == "http://ok.org/"
+    assert results["http://down.org/x"] is None
+    assert len(results) == 22 and done[-1] == (22, 22)
+    assert peak["busy.org"] == 3
+
+def test_slow_request_times_out_as_invalid():
+    async def handler(request):
+        await asyncio.sleep(1)
+        return httpx.Response(200)
+
+    validator = URLValidator(timeout=0.05, transport=httpx.MockTransport(handler))
+    assert validator.run(["http://slow.org/"]) == {"http://slow.org/": None}
+
+def test_each_origin_root_is_probed_once_and_dead_sites_skip_their_pages():
+    requested = []
+
+    def handler(request):
+        requested.append(str(request.url))
+        if request.url.host == "down.org":
+            raise httpx.ConnectError("refused", request=request)
+        return httpx.Response(404 if request.url.path == "/old" else 200)
+
+    urls = ["https://city.gov/parks", "https://City.gov/parks/?utm_source=x", "https://city.gov/old"] + \
+        [f"http://down.org/p{i}" for i in range(5)]
+    results = URLValidator(transport=httpx.MockTransport(handler)).run(urls)
+    assert results["https://City.gov/parks/?utm_source=x"] == "https://city.gov/parks"
+    assert results["https://city.gov/old"] == "https://city.gov/"
+    assert results["http://down.org/p3"] is None
+    assert sorted(requested) == ["http://down.org/", "https://city.gov/", "https://city.gov/old", "https://city.gov/parks"]
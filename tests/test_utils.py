@@ -0,0 +1,44 @@
+import logging
+
+import pytest
+
+from gosr.lib import utils
+from gosr.lib.utils import normalize_batch, normalize_data
+
+PAYLOADS = [
+    [{"title": "A_b", "description": "x"}, {"title": "C", "description": "y"}],
+    {"obstacles": [{"solution": {"solutionTitle": "S", "solutionDescription": "d"}}, "not a dict"]},
+    {"title": 3, "description": "z"},
+    {"wrapper": {"inner": [{"Title": "T", "Description": "D"}]}},
+    "plain text",
+    [],
+]
+
+def test_batch_matches_normalize_data():
+    results, diagnostics = normalize_batch(PAYLOADS)
+    assert results == [normalize_data(p) for p in PAYLOADS]
+    assert diagnostics["failed"] == 0
+    assert diagnostics["signatures"] == 3
+
+def test_batch_reports_failures_once_per_signature(caplog):
+    bad = [{"name": "no title", "text": "no description"}]
+    with caplog.at_level(logging.WARNING, logger=utils.logger.name):
+        results, diagnostics = normalize_batch([bad, bad, PAYLOADS[0]])
+    with pytest.raises(ValueError):
+        normalize_data(bad)
+    assert results == [None, None, normalize_data(PAYLOADS[0])]
+    assert diagnostics["failed"] == 2 and diagnostics["failed_payloads"] == [0, 1]
+    assert diagnostics["missing_keys"] == {("name", "text"): 2}
+    assert len([r for r in caplog.records if "Missing title or description" in r.getMessage()]) == 1
+
+def test_insert_nodes_aggregates_missing_title_warnings(monkeypatch, caplog):
+    from treelib import Tree
+    tree = Tree()
+    tree.create_node(tag="goal", identifier="root", data="Goal")
+    monkeypatch.setattr(utils, "tree", tree)
+    items = [{"description": f"d{i}", "extra": i} for i in range(5)]
+    with caplog.at_level(logging.INFO, logger=utils.logger.name):
+        created = utils.insert_nodes("root", items, tag="obstacle")
+    assert len(created) == 5
+    messages = [r.getMessage() for r in caplog.records]
+    assert messages == ["No title_key or id_key in 5 items with keys ['description', 'extra']"]